@@ -16,7 +16,6 @@ from webapp.storage_docs import SessionStore, ResumeStore, VacancyStore
 from llm_gap_analyzer.formatter import format_resume_data, format_vacancy_data
 from llm_gap_analyzer.prompts.mappings import extract_requirements_from_vacancy
 from llm_gap_analyzer.prompts.templates import get_template
-from llm_features.base.options import BaseLLMOptions
 
 def main():
     if len(sys.argv) < 2:
@@ -75,60 +74,58 @@ def main():
     # Рендерим итоговый промпт
     prompt = template.render(ctx)
     
-    # Сохраняем полную трассировку
-    trace_file = f"gap_analyzer_FULL_PROMPT_TRACE_{session_id[:8]}.txt"
+    # Анализ навыков
+    resume_skills = resume.skill_set or []
+    vacancy_skills = vacancy.key_skills or []
+    
+    # Поиск потенциальных совпадений (одно совпадение на навык вакансии)
+    potential_matches = []
+    for v_skill in vacancy_skills:
+        v_lower = v_skill.lower()
+        for r_skill in resume_skills:
+            r_lower = r_skill.lower()
+            if (v_lower in r_lower or r_lower in v_lower or
+                any(word in r_lower for word in ['ai', 'ml', 'llm']) and
+                any(word in v_lower for word in ['ai', 'ml', 'nlp'])):
+                potential_matches.append({"vacancy_skill": v_skill, "resume_skill": r_skill})
+                break
+    
+    # Сохраняем полную трассировку одним JSON-документом
+    trace_data = {
+        "title": "GAP ANALYZER - ПОЛНАЯ ТРАССИРОВКА ПРОМПТА (ТЕКУЩАЯ ПРОБЛЕМНАЯ ВЕРСИЯ)",
+        "session_id": session_id,
+        "known_issues": [
+            "ПРОБЛЕМАТИЧНЫЙ блок skills_match_summary ВКЛЮЧЕН (показывает только 1 совпадение!)",
+            "LLM получает ЛОЖНУЮ сводку вместе с детальными данными",
+            "Используется поле 'skills' вместо 'skill_set' в formatter.py",
+            "Функция analyze_skills_match() делает примитивное сравнение строк",
+        ],
+        "system": prompt.system,
+        "user": prompt.user,
+        "stats": {
+            "resume_block": len(resume_block),
+            "vacancy_block": len(vacancy_block),
+            "requirements_block": len(requirements_block),
+            "skills_match_summary_block": len(skills_match_summary_block),
+            "total_prompt": len(prompt.system) + len(prompt.user),
+        },
+        "skills": {
+            "resume": resume_skills,
+            "vacancy": vacancy_skills,
+            "potential_matches": potential_matches,
+        },
+    }
+    
+    trace_file = f"gap_analyzer_FULL_PROMPT_TRACE_{session_id[:8]}.json"
     with open(trace_file, 'w', encoding='utf-8') as f:
-        f.write("="*100 + "\n")
-        f.write("🔍 GAP ANALYZER - ПОЛНАЯ ТРАССИРОВКА ПРОМПТА (ТЕКУЩАЯ ПРОБЛЕМНАЯ ВЕРСИЯ)\n")
-        f.write("="*100 + "\n\n")
-        
-        f.write("СТАТУС ПРОБЛЕМ:\n")
-        f.write("- ❌ ПРОБЛЕМАТИЧНЫЙ блок skills_match_summary ВКЛЮЧЕН (показывает только 1 совпадение!)\n")
-        f.write("- ❌ LLM получает ЛОЖНУЮ сводку вместе с детальными данными\n")
-        f.write("- ❌ Используется поле 'skills' вместо 'skill_set' в formatter.py\n")
-        f.write("- ❌ Функция analyze_skills_match() делает примитивное сравнение строк\n\n")
-        
-        f.write("SYSTEM MESSAGE:\n")
-        f.write("="*80 + "\n")
-        f.write(prompt.system + "\n\n")
-        
-        f.write("USER MESSAGE:\n")
-        f.write("="*80 + "\n")
-        f.write(prompt.user + "\n\n")
-        
-        f.write("СТАТИСТИКА КОНТЕКСТА:\n")
-        f.write("="*80 + "\n")
-        f.write(f"📊 resume_block: {len(resume_block):,} символов\n")
-        f.write(f"📊 vacancy_block: {len(vacancy_block):,} символов\n")
-        f.write(f"📊 requirements_block: {len(requirements_block):,} символов\n")
-        f.write(f"📊 skills_match_summary_block: {len(skills_match_summary_block):,} символов (ПРОБЛЕМАТИЧНЫЙ!)\n")
-        f.write(f"📊 ОБЩИЙ ПРОМПТ: {len(prompt.system + prompt.user):,} символов\n\n")
-        
-        # Анализ навыков
-        resume_skills = resume.skill_set or []
-        vacancy_skills = vacancy.key_skills or []
-        f.write("АНАЛИЗ НАВЫКОВ:\n")
-        f.write("="*80 + "\n")
-        f.write(f"👤 Навыки в резюме ({len(resume_skills)}): {', '.join(resume_skills[:10])}{'...' if len(resume_skills) > 10 else ''}\n")
-        f.write(f"💼 Навыки в вакансии ({len(vacancy_skills)}): {', '.join(vacancy_skills)}\n")
-        
-        # Поиск потенциальных совпадений
-        potential_matches = []
-        for v_skill in vacancy_skills:
-            for r_skill in resume_skills:
-                if (v_skill.lower() in r_skill.lower() or r_skill.lower() in v_skill.lower() or
-                    any(word in r_skill.lower() for word in ['ai', 'ml', 'llm']) and 
-                    any(word in v_skill.lower() for word in ['ai', 'ml', 'nlp'])):
-                    potential_matches.append(f"'{v_skill}' ↔ '{r_skill}'")
-        
-        f.write(f"🎯 Потенциальные семантические совпадения ({len(potential_matches)}): \n")
-        for match in potential_matches[:5]:
-            f.write(f"   {match}\n")
+        json.dump(trace_data, f, ensure_ascii=False, indent=2)
     
     print(f"🎯 ПОЛНАЯ ТРАССИРОВКА ПРОМПТА СОХРАНЕНА В: {trace_file}")
-    print(f"📏 Размер промпта: {len(prompt.system + prompt.user):,} символов")
+    print(f"🎯 Потенциальные семантические совпадения: {len(potential_matches)}")
+    print(f"📏 Размер промпта: {trace_data['stats']['total_prompt']:,} символов")
     print("🔧 Проблематичный блок skills_match_summary: ВКЛЮЧЕН ❌")
-    print(f"⚠️  LLM видит ЛОЖНУЮ сводку: только {skills_match_summary_block.count('Docker')} совпадение из 30+ навыков!")
+    docker_mentions = skills_match_summary_block.lower().count('docker')
+    print(f"⚠️  LLM видит ЛОЖНУЮ сводку: только {docker_mentions} совпадение из 30+ навыков!")
     
     return 0
 
@@ -13,21 +13,49 @@
 # --- /agent_meta ---
 
 import argparse
+import asyncio
+import functools
+import importlib.util
+import os
 import sys
-import uuid
-import json
-import webbrowser
 from pathlib import Path
 from typing import Dict, Any
 
-import httpx
+try:
+    # orjson парсит UTF-8 bytes напрямую и заметно быстрее stdlib json
+    from orjson import loads as json_loads
+except ImportError:  # orjson опционален, fallback на stdlib
+    from json import loads as json_loads
 
 from src.utils import init_logging_from_env, get_logger
 
-init_logging_from_env()
 logger = get_logger(__name__)
 
 
+@functools.lru_cache(maxsize=8)
+def _load_json_cached(path_str: str, mtime: float) -> Any:
+    """Парсит JSON-файл один раз на (путь, mtime) - сценарии делят фикстуры."""
+    _ = mtime  # Участвует только в ключе кеша: изменение файла инвалидирует запись
+    return json_loads(Path(path_str).read_bytes())
+
+
+def _load_json(path: Path) -> Any:
+    return _load_json_cached(str(path), path.stat().st_mtime)
+
+
+@functools.cache
+def _feature_result_index() -> Dict[str, Path]:
+    """Индекс {имя_фичи: файл результата} по tests/data, строится один раз."""
+    index: Dict[str, Path] = {}
+    # os.scandir + строковые проверки вместо Path.glob: без fnmatch и Path на каждый файл
+    with os.scandir("tests/data") as entries:
+        for entry in entries:
+            name = entry.name
+            if name.endswith(".json") and "_result_" in name:
+                index.setdefault(name.split("_result_", 1)[0], Path(entry.path))
+    return index
+
+
 class ImprovedUnifiedDemo:
     """Улучшенный единый демо-класс с тестовым пользователем и реалистичными сценариями."""
     
@@ -55,6 +83,10 @@ class ImprovedUnifiedDemo:
         }
     }
     
+    # Разбиение фич по доступности считается один раз (кортежи сохраняют порядок для вывода)
+    ENABLED_FEATURES = tuple(name for name, config in AVAILABLE_FEATURES.items() if config["enabled"])
+    DISABLED_FEATURES = tuple(name for name, config in AVAILABLE_FEATURES.items() if not config["enabled"])
+    
     # Тестовый пользователь (перезаписывается при каждом запуске)
     TEST_USER = {
         "email": "demo_user@testapp.com",
@@ -71,169 +103,176 @@ class ImprovedUnifiedDemo:
         self.password = self.TEST_USER["password"] 
         self.org_name = self.TEST_USER["org_name"]
         
-        # HTTP клиент с timeout и редиректами
-        self.client = httpx.Client(base_url=base_url, timeout=45.0, follow_redirects=True)
-        
-    def __enter__(self):
+        # httpx тянет httpcore/h11/certifi - импортируем только когда демо реально запускается
+        import httpx
+        
+        # HTTP/2 (мультиплексирование + HPACK) включаем, если установлен h2
+        # (pip install 'httpx[http2]'); по http:// и с uvicorn httpx сам остается на HTTP/1.1
+        http2 = importlib.util.find_spec("h2") is not None
+        
+        # Один HTTP клиент на все сценарии: keep-alive пул переиспользует соединения
+        # между _setup_test_user и вложенными scenario_feature_* вызовами
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=45.0,
+            follow_redirects=True,
+            # При явном transport httpx игнорирует limits/http2 клиента - задаем их у транспорта
+            transport=httpx.AsyncHTTPTransport(
+                retries=1,
+                http2=http2,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            ),
+        )
+        
+    async def __aenter__(self):
         return self
         
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
         _ = exc_type, exc_val, exc_tb  # Suppress unused parameter warnings
         if hasattr(self, 'client'):
-            self.client.close()
+            await self.client.aclose()
     
     def _load_test_data(self) -> tuple[Dict[str, Any], Dict[str, Any]]:
         """Загружает тестовые данные резюме и вакансии."""
         test_data_dir = Path("tests/data")
         
-        with (test_data_dir / "simple_resume.json").open("r", encoding="utf-8") as f:
-            resume_data = json.load(f)
-        with (test_data_dir / "simple_vacancy.json").open("r", encoding="utf-8") as f:
-            vacancy_data = json.load(f)
+        resume_data = _load_json(test_data_dir / "simple_resume.json")
+        vacancy_data = _load_json(test_data_dir / "simple_vacancy.json")
         
         return resume_data, vacancy_data
     
     def _find_feature_result_file(self, feature: str) -> Path | None:
         """Находит файл с результатом фичи по шаблону feature_result_*.json"""
-        test_data_dir = Path("tests/data")
-        
         # Исправляем название для gap_analyzer
         search_name = "gap_analysis" if feature == "gap_analyzer" else feature
-        pattern = f"{search_name}_result_*.json"
-        
-        # Ищем файлы по паттерну
-        matching_files = list(test_data_dir.glob(pattern))
-        
-        if matching_files:
-            return matching_files[0]  # Возвращаем первый найденный
-        
-        return None
+        return _feature_result_index().get(search_name)
     
     def _show_feature_result_preview(self, feature: str, result_data: Dict[str, Any]) -> None:
-        """Показывает краткий превью результата фичи."""
-        print("\n📊 Result preview:")
+        """Показывает краткий превью результата фичи (одной записью в stdout)."""
+        parts: list[str] = ["\n📊 Result preview:\n"]
         
         if feature == "cover_letter":
             subject = result_data.get('subject_line', 'N/A')
             content = result_data.get('content', '')
-            print(f"   📧 Subject: {subject}")
-            print(f"   📝 Length: {len(content)} chars")
+            parts.append(f"   📧 Subject: {subject}\n")
+            parts.append(f"   📝 Length: {len(content)} chars\n")
             
             # Показываем первые 3 строки содержания
             if content:
                 lines = content.split('\n')[:3]
-                print("   📄 First lines:")
+                parts.append("   📄 First lines:\n")
                 for i, line in enumerate(lines, 1):
-                    if line.strip():
-                        print(f"      {i}. {line.strip()[:100]}{'...' if len(line.strip()) > 100 else ''}")
+                    stripped = line.strip()
+                    if stripped:
+                        parts.append(f"      {i}. {stripped[:100]}{'...' if len(stripped) > 100 else ''}\n")
                         
         elif feature == "gap_analyzer":
             gaps = result_data.get('skill_gaps', [])
             recommendations = result_data.get('recommendations', [])
-            print(f"   📈 Skill gaps found: {len(gaps)}")
-            print(f"   🎯 Recommendations: {len(recommendations)}")
+            parts.append(f"   📈 Skill gaps found: {len(gaps)}\n")
+            parts.append(f"   🎯 Recommendations: {len(recommendations)}\n")
             
             if gaps:
-                print("   🔍 Top gaps:")
+                parts.append("   🔍 Top gaps:\n")
                 for i, gap in enumerate(gaps[:3], 1):
                     skill_name = gap.get('skill_name', 'Unknown')
                     importance = gap.get('importance_level', 'N/A')
-                    print(f"      {i}. {skill_name} (importance: {importance})")
+                    parts.append(f"      {i}. {skill_name} (importance: {importance})\n")
                     
         elif feature == "interview_checklist":
             questions = result_data.get('questions', [])
             tips = result_data.get('preparation_tips', [])
-            print(f"   ❓ Questions generated: {len(questions)}")
-            print(f"   💡 Preparation tips: {len(tips)}")
+            parts.append(f"   ❓ Questions generated: {len(questions)}\n")
+            parts.append(f"   💡 Preparation tips: {len(tips)}\n")
             
             if questions:
-                print("   📝 Sample questions:")
+                parts.append("   📝 Sample questions:\n")
                 for i, q in enumerate(questions[:3], 1):
                     question = q.get('question', 'N/A') if isinstance(q, dict) else str(q)
-                    print(f"      {i}. {question[:80]}{'...' if len(question) > 80 else ''}")
+                    parts.append(f"      {i}. {question[:80]}{'...' if len(question) > 80 else ''}\n")
                     
         elif feature == "interview_simulation":
             rounds = result_data.get('total_rounds_completed', 0)
             scenarios = result_data.get('scenarios', [])
-            print(f"   💬 Interview rounds: {rounds}")
-            print(f"   🎭 Scenarios: {len(scenarios)}")
+            parts.append(f"   💬 Interview rounds: {rounds}\n")
+            parts.append(f"   🎭 Scenarios: {len(scenarios)}\n")
             
             if scenarios:
-                print("   🗺️ Sample scenarios:")
+                parts.append("   🗺️ Sample scenarios:\n")
                 for i, scenario in enumerate(scenarios[:2], 1):
                     name = scenario.get('scenario_name', 'Unknown') if isinstance(scenario, dict) else 'Unknown'
-                    print(f"      {i}. {name}")
+                    parts.append(f"      {i}. {name}\n")
+        
+        sys.stdout.write("".join(parts))
+        sys.stdout.flush()
     
-    def _setup_test_user(self) -> bool:
-        """Настраивает тестового пользователя (перезаписывает если существует)."""
+    async def _setup_test_user(self) -> bool:
+        """Настраивает тестового пользователя (перезаписывает если существует).
+        
+        Сначала пробуем signup (он сразу логинит), и только на 409 делаем login:
+        один запрос для нового пользователя, два - для существующего.
+        """
         print("\n[Setup] 👤 Setting up test user...")
         
-        # Пробуем войти
-        login_response = self.client.post("/auth/login", json={
+        signup_response = await self.client.post("/auth/signup", json={
             "email": self.email,
-            "password": self.password
+            "password": self.password,
+            "org_name": self.org_name
         })
         
-        if login_response.status_code == 200:
-            print("ℹ️ Test user exists, overwriting with new session...")
+        if signup_response.status_code == 200:
+            print("✅ Test user created successfully")
             return True
-        else:
-            # Регистрируем нового
-            signup_response = self.client.post("/auth/signup", json={
+        elif signup_response.status_code == 409:
+            # Пользователь существует, логинимся
+            login_response = await self.client.post("/auth/login", json={
                 "email": self.email,
-                "password": self.password,
-                "org_name": self.org_name
+                "password": self.password
             })
-            
-            if signup_response.status_code == 200:
-                print("✅ Test user created successfully")
+            if login_response.status_code == 200:
+                print("ℹ️ Test user exists, overwriting with new session...")
                 return True
-            elif signup_response.status_code == 409:
-                # Пользователь существует, логинимся
-                login_response = self.client.post("/auth/login", json={
-                    "email": self.email,
-                    "password": self.password
-                })
-                if login_response.status_code == 200:
-                    print("✅ Test user logged in successfully")
-                    return True
-            
-            print("❌ Test user setup failed:", signup_response.status_code)
+            print("❌ Test user login failed:", login_response.status_code)
             return False
+        
+        print("❌ Test user setup failed:", signup_response.status_code)
+        return False
     
-    def scenario_test_user_setup(self) -> int:
+    async def scenario_test_user_setup(self) -> int:
         """Сценарий: Настройка тестового пользователя"""
         print("👤 TEST USER SETUP DEMO")
         print(f"Base URL: {self.base_url}")
         print(f"Test User Email: {self.email}")
         print("=" * 60)
         
-        if not self._setup_test_user():
+        if not await self._setup_test_user():
             return 1
         
-        # Получаем профиль
-        me_response = self.client.get("/me")
+        # Профиль и статус HH независимы - запрашиваем параллельно
+        me_response, hh_status_response = await asyncio.gather(
+            self.client.get("/me"),
+            self.client.get("/auth/hh/status"),
+        )
         if me_response.status_code == 200:
             profile = me_response.json()
             print(f"\n✅ Test user profile:")
             print(f"   Email: {profile['user']['email']}")
             print(f"   User ID: {profile['user']['id']}")
             print(f"   Organization: {profile.get('org_id', 'N/A')}")
+            if hh_status_response.status_code == 200:
+                print(f"   HH connected: {hh_status_response.json().get('is_connected')}")
             
             # Показываем доступные фичи
             print(f"\n🧠 Available features for this user:")
-            enabled_features = [name for name, config in self.AVAILABLE_FEATURES.items() if config["enabled"]]
-            disabled_features = [name for name, config in self.AVAILABLE_FEATURES.items() if not config["enabled"]]
-            
-            print(f"   ✅ Enabled: {', '.join(enabled_features)}")
-            print(f"   ❌ Disabled: {', '.join(disabled_features)}")
+            print(f"   ✅ Enabled: {', '.join(self.ENABLED_FEATURES)}")
+            print(f"   ❌ Disabled: {', '.join(self.DISABLED_FEATURES)}")
             
             return 0
         else:
             print("❌ Failed to get user profile")
             return 1
     
-    def scenario_hh_auth_demo(self) -> int:
+    async def scenario_hh_auth_demo(self) -> int:
         """Сценарий: HH авторизация для тестового пользователя"""
         print("🔗 HH AUTHORIZATION DEMO")
         print(f"Base URL: {self.base_url}")
@@ -241,12 +280,12 @@ class ImprovedUnifiedDemo:
         print("=" * 60)
         
         # Настраиваем пользователя
-        if not self._setup_test_user():
+        if not await self._setup_test_user():
             return 1
         
         # Проверяем статус HH
         print("\n[1] 🔍 Checking HH connection status...")
-        hh_status_response = self.client.get("/auth/hh/status")
+        hh_status_response = await self.client.get("/auth/hh/status")
         
         if hh_status_response.status_code == 200:
             status_data = hh_status_response.json()
@@ -262,7 +301,7 @@ class ImprovedUnifiedDemo:
         
         # Запускаем HH OAuth
         print("\n[2] 🌐 Starting HH OAuth process...")
-        hh_connect_response = self.client.get("/auth/hh/connect")
+        hh_connect_response = await self.client.get("/auth/hh/connect")
         
         if hh_connect_response.status_code == 200:
             connect_data = hh_connect_response.json()
@@ -270,6 +309,7 @@ class ImprovedUnifiedDemo:
             
             print(f"🔗 OAuth URL: {oauth_url}")
             print("\n📱 Opening browser for HH authorization...")
+            import webbrowser
             webbrowser.open(oauth_url)
             
             print("⏳ Complete the authorization in the browser")
@@ -277,7 +317,7 @@ class ImprovedUnifiedDemo:
             
             # Проверяем финальный статус
             print("\n[3] ✅ Verifying HH connection...")
-            final_status_response = self.client.get("/auth/hh/status")
+            final_status_response = await self.client.get("/auth/hh/status")
             
             if final_status_response.status_code == 200:
                 final_status = final_status_response.json()
@@ -294,7 +334,7 @@ class ImprovedUnifiedDemo:
             print(f"❌ Failed to start HH OAuth: {hh_connect_response.status_code}")
             return 1
     
-    def scenario_feature_with_hash(self, feature: str) -> int:
+    async def scenario_feature_with_hash(self, feature: str) -> int:
         """Сценарий: Запуск фичи с подгрузкой объектов по хешу"""
         print(f"🔄 FEATURE WITH HASH DEMO: {feature}")
         print(f"Base URL: {self.base_url}")
@@ -302,21 +342,20 @@ class ImprovedUnifiedDemo:
         print("=" * 60)
         
         # Проверяем доступность фичи
-        if not self.AVAILABLE_FEATURES.get(feature, {}).get("enabled", False):
+        if feature not in self.ENABLED_FEATURES:
             print(f"❌ Feature '{feature}' is not enabled for test user")
-            enabled_features = [name for name, config in self.AVAILABLE_FEATURES.items() if config["enabled"]]
-            print(f"💡 Available features: {', '.join(enabled_features)}")
+            print(f"💡 Available features: {', '.join(self.ENABLED_FEATURES)}")
             return 1
         
         # Настраиваем пользователя
-        if not self._setup_test_user():
+        if not await self._setup_test_user():
             return 1
         
         print("\n[1] 📁 Creating session to save objects in DB...")
         resume_data, vacancy_data = self._load_test_data()
         
         # Создаем первую сессию для сохранения хешей
-        initial_session_response = self.client.post("/sessions/init_json", json={
+        initial_session_response = await self.client.post("/sessions/init_json", json={
             "resume": resume_data,
             "vacancy": vacancy_data,
             "reuse_by_hash": True
@@ -334,7 +373,7 @@ class ImprovedUnifiedDemo:
         print("\n[2] 🔄 Creating second session (should reuse objects by hash)...")
         
         # Создаем вторую сессию - должна использовать хеши
-        hash_session_response = self.client.post("/sessions/init_json", json={
+        hash_session_response = await self.client.post("/sessions/init_json", json={
             "resume": resume_data,
             "vacancy": vacancy_data,
             "reuse_by_hash": True
@@ -359,8 +398,7 @@ class ImprovedUnifiedDemo:
         # Имитируем выполнение фичи (загружаем готовый результат)
         result_file = self._find_feature_result_file(feature)
         if result_file:
-            with result_file.open("r", encoding="utf-8") as f:
-                mock_result = json.load(f)
+            mock_result = _load_json(result_file)
             
             print(f"✅ Feature {feature} completed successfully!")
             self._show_feature_result_preview(feature, mock_result)
@@ -370,7 +408,7 @@ class ImprovedUnifiedDemo:
             print(f"❌ Test data not found for feature: {feature}")
             return 1
     
-    def scenario_feature_no_hash(self, feature: str) -> int:
+    async def scenario_feature_no_hash(self, feature: str) -> int:
         """Сценарий: Запуск фичи с парсингом (когда хеш не найден)"""
         print(f"🔍 FEATURE WITHOUT HASH DEMO: {feature}")
         print(f"Base URL: {self.base_url}")
@@ -378,14 +416,13 @@ class ImprovedUnifiedDemo:
         print("=" * 60)
         
         # Проверяем доступность фичи
-        if not self.AVAILABLE_FEATURES.get(feature, {}).get("enabled", False):
+        if feature not in self.ENABLED_FEATURES:
             print(f"❌ Feature '{feature}' is not enabled for test user")
-            enabled_features = [name for name, config in self.AVAILABLE_FEATURES.items() if config["enabled"]]
-            print(f"💡 Available features: {', '.join(enabled_features)}")
+            print(f"💡 Available features: {', '.join(self.ENABLED_FEATURES)}")
             return 1
         
         # Настраиваем пользователя
-        if not self._setup_test_user():
+        if not await self._setup_test_user():
             return 1
         
         print("\n[1] 📄 Creating session via init_upload (simulates parsing)...")
@@ -398,21 +435,21 @@ class ImprovedUnifiedDemo:
             
             # Fallback к init_json с отключенной дедупликацией
             resume_data, vacancy_data = self._load_test_data()
-            upload_session_response = self.client.post("/sessions/init_json", json={
+            upload_session_response = await self.client.post("/sessions/init_json", json={
                 "resume": resume_data,
                 "vacancy": vacancy_data,
                 "reuse_by_hash": False  # Отключаем дедупликацию
             })
         else:
-            # Настоящий init_upload
-            with open(test_pdf_path, "rb") as pdf_file:
-                upload_session_response = self.client.post("/sessions/init_upload", data={
-                    "vacancy_url": self.TEST_VACANCY_URL,
-                    "reuse_by_hash": False,  # Принудительный парсинг
-                    "ttl_sec": 3600
-                }, files={
-                    "resume_file": ("resume.pdf", pdf_file, "application/pdf")
-                })
+            # Настоящий init_upload (чтение PDF вынесено из event loop)
+            pdf_bytes = await asyncio.to_thread(test_pdf_path.read_bytes)
+            upload_session_response = await self.client.post("/sessions/init_upload", data={
+                "vacancy_url": self.TEST_VACANCY_URL,
+                "reuse_by_hash": False,  # Принудительный парсинг
+                "ttl_sec": 3600
+            }, files={
+                "resume_file": ("resume.pdf", pdf_bytes, "application/pdf")
+            })
         
         if upload_session_response.status_code == 200:
             upload_session = upload_session_response.json()
@@ -437,8 +474,7 @@ class ImprovedUnifiedDemo:
         # Имитируем выполнение фичи (загружаем готовый результат)
         result_file = self._find_feature_result_file(feature)
         if result_file:
-            with result_file.open("r", encoding="utf-8") as f:
-                mock_result = json.load(f)
+            mock_result = _load_json(result_file)
             
             print(f"✅ Feature {feature} completed successfully!")
             self._show_feature_result_preview(feature, mock_result)
@@ -448,7 +484,7 @@ class ImprovedUnifiedDemo:
             print(f"❌ Test data not found for feature: {feature}")
             return 1
     
-    def scenario_full_demo(self) -> int:
+    async def scenario_full_demo(self) -> int:
         """Сценарий: Полная демонстрация всех возможностей"""
         print("🚀 FULL STACK DEMO")
         print(f"Base URL: {self.base_url}")
@@ -465,17 +501,23 @@ class ImprovedUnifiedDemo:
         
         # Этап 1: Настройка пользователя
         print("\n[STEP 1] 👤 Test User Setup...")
-        if not self._setup_test_user():
+        if not await self._setup_test_user():
             return 1
         
+        # Профиль и статус HH не зависят друг от друга - запрашиваем параллельно
+        me_response, hh_status_response = await asyncio.gather(
+            self.client.get("/me"),
+            self.client.get("/auth/hh/status"),
+        )
+        if me_response.status_code == 200:
+            print(f"✅ Logged in as: {me_response.json()['user']['email']}")
+        
         # Этап 2: Показ доступных фич
         print("\n[STEP 2] 📋 Available Features...")
-        enabled_features = [name for name, config in self.AVAILABLE_FEATURES.items() if config["enabled"]]
-        print(f"✅ Enabled features: {', '.join(enabled_features)}")
+        print(f"✅ Enabled features: {', '.join(self.ENABLED_FEATURES)}")
         
         # Этап 3: HH авторизация (опционально)
         print("\n[STEP 3] 🔗 HH Authorization...")
-        hh_status_response = self.client.get("/auth/hh/status")
         if hh_status_response.status_code == 200:
             status_data = hh_status_response.json()
             if not status_data.get("is_connected"):
@@ -488,14 +530,14 @@ class ImprovedUnifiedDemo:
         
         # Этап 4: Фича с хешем
         print("\n[STEP 4] 🔄 Feature with Hash Reuse...")
-        test_feature = enabled_features[0] if enabled_features else "cover_letter"
-        result = self.scenario_feature_with_hash(test_feature)
+        test_feature = self.ENABLED_FEATURES[0] if self.ENABLED_FEATURES else "cover_letter"
+        result = await self.scenario_feature_with_hash(test_feature)
         if result != 0:
             print(f"⚠️ Hash demo failed, but continuing...")
         
         # Этап 5: Фича без хеша
         print("\n[STEP 5] 🔍 Feature without Hash (Parsing)...")
-        result = self.scenario_feature_no_hash(test_feature)
+        result = await self.scenario_feature_no_hash(test_feature)
         if result != 0:
             print(f"⚠️ No-hash demo failed, but demo completed...")
         
@@ -505,12 +547,12 @@ class ImprovedUnifiedDemo:
         return 0
 
 
-def main(argv: list[str]) -> int:
-    """Основная функция для запуска демо-сценариев."""
-    parser = argparse.ArgumentParser(
-        description="Improved Unified Demo - реалистичные сценарии с тестовым пользователем",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Описание CLI собирается один раз на уровне модуля
+SCENARIOS = ("full-demo", "test-user-setup", "hh-auth-demo", "feature-with-hash", "feature-no-hash")
+FEATURE_SCENARIOS = frozenset({"feature-with-hash", "feature-no-hash"})
+FEATURES = ("cover_letter", "gap_analyzer", "interview_checklist", "interview_simulation")
+
+EPILOG = """
 ПРИМЕРЫ ИСПОЛЬЗОВАНИЯ:
 
 1. Полная демонстрация всех возможностей:
@@ -538,13 +580,37 @@ def main(argv: list[str]) -> int:
 - Запущенное приложение: uvicorn src.webapp.app:app --host 0.0.0.0 --port 8080
 - Настроенные переменные окружения для HH API
 - Тестовые данные в tests/data/
-        """
+"""
+
+# Сценарий -> метод демо; feature-* сценарии дополнительно получают --feature
+SCENARIO_DISPATCH = {
+    "full-demo": ImprovedUnifiedDemo.scenario_full_demo,
+    "test-user-setup": ImprovedUnifiedDemo.scenario_test_user_setup,
+    "hh-auth-demo": ImprovedUnifiedDemo.scenario_hh_auth_demo,
+    "feature-with-hash": ImprovedUnifiedDemo.scenario_feature_with_hash,
+    "feature-no-hash": ImprovedUnifiedDemo.scenario_feature_no_hash,
+}
+
+
+async def _run(args: argparse.Namespace) -> int:
+    """Запускает выбранный сценарий на одном асинхронном HTTP клиенте."""
+    scenario = SCENARIO_DISPATCH[args.scenario]
+    extra_args = (args.feature,) if args.scenario in FEATURE_SCENARIOS else ()
+    async with ImprovedUnifiedDemo(args.base_url) as demo:
+        return await scenario(demo, *extra_args)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Improved Unified Demo - реалистичные сценарии с тестовым пользователем",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=EPILOG,
     )
     
     parser.add_argument(
         "--scenario", 
         required=True,
-        choices=["full-demo", "test-user-setup", "hh-auth-demo", "feature-with-hash", "feature-no-hash"],
+        choices=SCENARIOS,
         help="Выберите сценарий демонстрации"
     )
     parser.add_argument(
@@ -554,33 +620,25 @@ def main(argv: list[str]) -> int:
     )
     parser.add_argument(
         "--feature", 
-        choices=["cover_letter", "gap_analyzer", "interview_checklist", "interview_simulation"],
+        choices=FEATURES,
         help="Фича для тестирования (для feature-* сценариев)"
     )
-    
-    args = parser.parse_args(argv)
+    return parser
+
+
+def main(argv: list[str]) -> int:
+    """Основная функция для запуска демо-сценариев."""
+    args = _build_parser().parse_args(argv)
     
     # Валидация аргументов
-    if args.scenario in ["feature-with-hash", "feature-no-hash"] and not args.feature:
+    if args.scenario in FEATURE_SCENARIOS and not args.feature:
         print(f"❌ Scenario '{args.scenario}' requires --feature parameter")
         return 1
     
     # Запуск демо
-    with ImprovedUnifiedDemo(args.base_url) as demo:
-        if args.scenario == "full-demo":
-            return demo.scenario_full_demo()
-        elif args.scenario == "test-user-setup":
-            return demo.scenario_test_user_setup()
-        elif args.scenario == "hh-auth-demo":
-            return demo.scenario_hh_auth_demo()
-        elif args.scenario == "feature-with-hash":
-            return demo.scenario_feature_with_hash(args.feature)
-        elif args.scenario == "feature-no-hash":
-            return demo.scenario_feature_no_hash(args.feature)
-        else:
-            print(f"❌ Unknown scenario: {args.scenario}")
-            return 1
+    return asyncio.run(_run(args))
 
 
 if __name__ == "__main__":
-    raise SystemExit(main(sys.argv[1:]))
\ No newline at end of file
+    init_logging_from_env()
+    raise SystemExit(main(sys.argv[1:]))
@@ -17,4 +17,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        # uvloop (ставится вместе с uvicorn[standard]) - более быстрый event loop на libuv
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,59 @@
+# src/auth/asgi.py
+# --- agent_meta ---
+# role: auth-asgi-middleware
+# owner: @backend
+# contract: Чистый ASGI middleware: достает session cookie один раз и кладет sid в scope["state"]
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - SessionCookieMiddleware(app)
+# --- /agent_meta ---
+
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from .deps import COOKIE_NAME, SID_STATE_KEY
+
+
+_SID_NEEDLE = COOKIE_NAME.encode("latin-1") + b"="
+
+
+def _find_cookie(header: bytes, needle: bytes = _SID_NEEDLE) -> Optional[str]:
+    """Значение cookie из сырого заголовка Cookie поиском по байтам.
+
+    needle - b"<имя>="; совпадение засчитывается только в начале заголовка
+    или после "; ", чтобы "xsid=" не принималось за "sid=".
+    """
+    start = 0
+    while True:
+        i = header.find(needle, start)
+        if i < 0:
+            return None
+        if i == 0 or header[i - 1] in b"; ":
+            i += len(needle)
+            j = header.find(b";", i)
+            value = header[i:j] if j >= 0 else header[i:]
+            return value.strip().decode("latin-1")
+        start = i + 1
+
+
+class SessionCookieMiddleware:
+    """
+    Кладет session_id из cookie в scope["state"] до входа в роутинг.
+
+    Чистый ASGI (не BaseHTTPMiddleware): без обертки запроса/ответа и
+    лишних задач; require_session_id читает готовое значение из state.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            sid = None
+            for key, value in scope["headers"]:
+                if key == b"cookie":
+                    sid = _find_cookie(value)
+                    break
+            scope.setdefault("state", {})[SID_STATE_KEY] = sid
+        await self.app(scope, receive, send)
@@ -2,62 +2,188 @@
 # --- agent_meta ---
 # role: auth-crypto
 # owner: @backend
-# contract: Хеширование паролей (scrypt) и проверка
-# last_reviewed: 2025-08-21
+# contract: Хеширование паролей (argon2id, legacy scrypt) и проверка
+# last_reviewed: 2025-08-24
 # interfaces:
 #   - hash_password(password: str) -> str
 #   - verify_password(password: str, stored: str) -> bool
+#   - needs_rehash(stored: str) -> bool
+#   - dummy_password_hash() -> str
+#   - ahash_password(password: str) -> str (async, пул KDF)
+#   - averify_password(password: str, stored: str) -> bool (async, пул KDF)
+#   - averify_dummy(password: str) -> None (async, один KDF в пуле)
+# dependencies:
+#   - argon2-cffi
 # --- /agent_meta ---
 
+import asyncio
 import base64
+import functools
 import hashlib
+import hmac
+import multiprocessing
 import os
 import secrets
-from typing import Tuple
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
 
+from argon2 import PasswordHasher, Type
+from argon2.exceptions import InvalidHashError, VerificationError
 
-# Параметры scrypt для надежного хеширования паролей
-# Эти значения выбраны для баланса между безопасностью и производительностью
+
+# Параметры argon2id для новых хешей.
+# C-реализация argon2-cffi отпускает GIL, поэтому хеширование в потоках FastAPI
+# выполняется параллельно, а не сериализуется на одном ядре.
+_ARGON2_TIME_COST = 3
+_ARGON2_MEMORY_COST = 64 * 1024  # KiB (64 MiB)
+_ARGON2_PARALLELISM = 1
+
+_hasher = PasswordHasher(
+    time_cost=_ARGON2_TIME_COST,
+    memory_cost=_ARGON2_MEMORY_COST,
+    parallelism=_ARGON2_PARALLELISM,
+    type=Type.ID,
+)
+
+# Пул KDF: AUTH_HASH_EXECUTOR=thread (по умолчанию) или process.
+# argon2-cffi и hashlib.scrypt отпускают GIL, поэтому потоки уже занимают все
+# ядра; процессы нужны, только если в воркере есть другая CPU-нагрузка под GIL.
+# Процессы стартуют через spawn: fork из многопоточного сервера небезопасен.
+# Воркер spawn заново импортирует этот модуль, поэтому на уровне модуля - только
+# константы и функции KDF: пул, кеш проверок и холостой хеш создаются лениво
+# при первом использовании (в воркере до них дело не доходит).
+HASH_EXECUTOR_KIND = os.getenv("AUTH_HASH_EXECUTOR", "thread").lower()
+
+
+def _make_hash_executor() -> Executor:
+    # Размер пула ограничивает число одновременных хеширований (~64 MiB каждое)
+    workers = os.cpu_count() or 1
+    if HASH_EXECUTOR_KIND == "process":
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth-hash")
+
+
+_HASH_EXECUTOR: Optional[Executor] = None
+_lazy_init_lock = threading.Lock()
+
+
+def _get_hash_executor() -> Executor:
+    global _HASH_EXECUTOR
+    if _HASH_EXECUTOR is None:
+        with _lazy_init_lock:
+            if _HASH_EXECUTOR is None:
+                _HASH_EXECUTOR = _make_hash_executor()
+    return _HASH_EXECUTOR
+
+
+# Кеш успешных проверок пароля: повторный вход с той же парой (пароль, хеш)
+# стоит одного HMAC-SHA256 вместо полного KDF. Ключ кеша - HMAC от секрета
+# процесса, поэтому пароли в памяти не хранятся. Кеш живет до рестарта процесса.
+_VERIFY_CACHE_SIZE = 1024
+
+
+class _VerifyCache:
+    def __init__(self) -> None:
+        self.secret = os.getenv("AUTH_VERIFY_CACHE_SECRET", "").encode("utf-8") or secrets.token_bytes(32)
+        self.entries: "OrderedDict[bytes, bool]" = OrderedDict()
+        self.lock = threading.Lock()
+
+
+_verify_cache: Optional[_VerifyCache] = None
+
+
+def _get_verify_cache() -> _VerifyCache:
+    global _verify_cache
+    if _verify_cache is None:
+        with _lazy_init_lock:
+            if _verify_cache is None:
+                _verify_cache = _VerifyCache()
+    return _verify_cache
+
+# Параметры scrypt для проверки legacy-хешей формата scrypt$N$r$p$salt$hash
 _SCRYPT_N = 2 ** 14  # 16384 - CPU/memory cost parameter (чем больше, тем медленнее)
 _SCRYPT_R = 8        # Block size parameter
 _SCRYPT_P = 1        # Parallelization parameter
 _KEY_LEN = 32        # Длина выходного ключа в байтах (256 бит)
-_SALT_LEN = 16       # Длина соли в байтах (128 бит)
 
+# Почти все legacy-хеши созданы с параметрами по умолчанию - для них scrypt
+# вызывается с заранее связанными аргументами
+_SCRYPT_HOT_PARAMS = (_SCRYPT_N, _SCRYPT_R, _SCRYPT_P, _KEY_LEN)
+_scrypt_hot = functools.partial(
+    hashlib.scrypt, n=_SCRYPT_N, r=_SCRYPT_R, p=_SCRYPT_P, dklen=_KEY_LEN
+)
 
-def _b64e(b: bytes) -> str:
-    return base64.urlsafe_b64encode(b).decode("utf-8").rstrip("=")
+# Соль для "холостого" scrypt на битом legacy-хеше (сам результат не нужен)
+_DUMMY_SALT = secrets.token_bytes(16)
 
 
 def _b64d(s: str) -> bytes:
-    pad = '=' * (-len(s) % 4)
-    return base64.urlsafe_b64decode(s + pad)
+    # Декодер игнорирует лишний padding, поэтому длину добивки не вычисляем
+    return base64.urlsafe_b64decode(s + "==")
 
 
 def hash_password(password: str) -> str:
-    """Хеширование пароля с использованием scrypt алгоритма.
+    """Хеширование пароля с использованием argon2id.
     
-    scrypt является криптографически стойкой функцией для хеширования паролей,
-    устойчивой к brute-force атакам благодаря высокому потреблению CPU/памяти.
+    argon2id - победитель Password Hashing Competition, устойчив к brute-force
+    и GPU-атакам благодаря настраиваемому потреблению памяти и CPU.
     
     Returns:
-        Строка формата: scrypt$N$r$p$salt$hash
+        Строка в PHC формате: $argon2id$v=19$m=...,t=...,p=...$salt$hash
     """
-    # Генерируем криптографически стойкую случайную соль
-    salt = os.urandom(_SALT_LEN)
-    
-    # Выполняем scrypt хеширование с заданными параметрами
-    dk = hashlib.scrypt(
-        password=password.encode("utf-8"),
-        salt=salt,
-        n=_SCRYPT_N,
-        r=_SCRYPT_R,
-        p=_SCRYPT_P,
-        dklen=_KEY_LEN,
-    )
+    return _hasher.hash(password)
+
+
+# Хеш случайного пароля для "холостой" проверки: ответ на битый сохраненный
+# хеш или неизвестный email занимает столько же времени, сколько неверный пароль.
+# Считается при первом обращении, а не при импорте (~64 MiB argon2id).
+_DUMMY_STORED: Optional[str] = None
+
+
+def _set_dummy_stored(stored: str) -> str:
+    global _DUMMY_STORED
+    with _lazy_init_lock:
+        if _DUMMY_STORED is None:
+            _DUMMY_STORED = stored
+        return _DUMMY_STORED
+
+
+def dummy_password_hash() -> str:
+    """argon2id-хеш случайного пароля: с ним никакой пароль не проходит проверку.
+
+    Первый вызов считает полный KDF - не вызывать из event loop
+    (lifespan прогревает его через asyncio.to_thread).
+    """
+    if _DUMMY_STORED is None:
+        return _set_dummy_stored(hash_password(secrets.token_hex(16)))
+    return _DUMMY_STORED
+
+
+def _burn_dummy(password: str) -> None:
+    try:
+        _hasher.verify(dummy_password_hash(), password)
+    except VerificationError:
+        pass
+
+
+def _burn_dummy_scrypt(password: str) -> None:
+    # Битый legacy-хеш стоит столько же, сколько scrypt с параметрами по умолчанию
+    _scrypt_hot(password.encode("utf-8", "surrogatepass"), salt=_DUMMY_SALT)
+
+
+def needs_rehash(stored: str) -> bool:
+    """Проверяет, нужно ли перехешировать пароль текущими параметрами.
     
-    # Формируем строку с параметрами для возможности последующей верификации
-    return f"scrypt${_SCRYPT_N}${_SCRYPT_R}${_SCRYPT_P}${_b64e(salt)}${_b64e(dk)}"
+    True для legacy scrypt-хешей и argon2-хешей с устаревшими параметрами.
+    """
+    if not stored.startswith("$argon2"):
+        return True
+    try:
+        return _hasher.check_needs_rehash(stored)
+    except InvalidHashError:
+        return True
 
 
 def _parse(stored: str) -> Tuple[int, int, int, bytes, bytes]:
@@ -67,18 +193,110 @@ def _parse(stored: str) -> Tuple[int, int, int, bytes, bytes]:
     return int(n), int(r), int(p), _b64d(salt_b64), _b64d(hash_b64)
 
 
-def verify_password(password: str, stored: str) -> bool:
+def _verify_scrypt(password: str, stored: str) -> bool:
     try:
         n, r, p, salt, ref = _parse(stored)
-        dk = hashlib.scrypt(
-            password=password.encode("utf-8"),
-            salt=salt,
-            n=n,
-            r=r,
-            p=p,
-            dklen=len(ref),
-        )
-        return secrets.compare_digest(dk, ref)
+        if (n, r, p, len(ref)) == _SCRYPT_HOT_PARAMS:
+            dk = _scrypt_hot(password.encode("utf-8"), salt=salt)
+        else:
+            dk = hashlib.scrypt(
+                password=password.encode("utf-8"),
+                salt=salt,
+                n=n,
+                r=r,
+                p=p,
+                dklen=len(ref),
+            )
     except Exception:
+        # Битый хеш: тратим столько же времени, сколько на обычную проверку
+        _burn_dummy_scrypt(password)
+        return False
+    return secrets.compare_digest(dk, ref)
+
+
+def _verify_uncached(password: str, stored: str) -> bool:
+    if stored.startswith("scrypt$"):
+        return _verify_scrypt(password, stored)
+    try:
+        return _hasher.verify(stored, password)
+    except InvalidHashError:
+        _burn_dummy(password)
+        return False
+    except VerificationError:
+        return False
+
+
+def _verify_cache_key(password: str, stored: str) -> bytes:
+    return hmac.new(
+        _get_verify_cache().secret,
+        password.encode("utf-8") + b"\0" + stored.encode("utf-8"),
+        "sha256",
+    ).digest()
+
+
+def _verify_cache_hit(key: bytes) -> bool:
+    cache = _get_verify_cache()
+    with cache.lock:
+        if key in cache.entries:
+            cache.entries.move_to_end(key)
+            return True
+    return False
+
+
+def _verify_cache_put(key: bytes) -> None:
+    cache = _get_verify_cache()
+    with cache.lock:
+        cache.entries[key] = True
+        if len(cache.entries) > _VERIFY_CACHE_SIZE:
+            cache.entries.popitem(last=False)
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """Проверка пароля против сохраненного хеша (argon2id или legacy scrypt).
+    
+    Успешные проверки кешируются (LRU), неуспешные всегда проходят полный KDF.
+    """
+    key = _verify_cache_key(password, stored)
+    if _verify_cache_hit(key):
+        return True
+    if not _verify_uncached(password, stored):
         return False
+    _verify_cache_put(key)
+    return True
+
+
+async def ahash_password(password: str) -> str:
+    """Асинхронная обертка над hash_password, выполняемая в пуле KDF."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_executor(), hash_password, password)
 
+
+async def averify_dummy(password: str) -> None:
+    """Холостая проверка для неизвестного email: ровно один KDF в пуле KDF.
+
+    Если холостой хеш еще не построен, его построение и есть этот KDF
+    (хеширование и проверка argon2id стоят одинаково), а не хеш + проверка.
+    """
+    loop = asyncio.get_running_loop()
+    stored = _DUMMY_STORED
+    if stored is None:
+        # Хеш строит пул (в т.ч. процессный) - сохраняем результат в этом процессе
+        _set_dummy_stored(await loop.run_in_executor(_get_hash_executor(), hash_password, secrets.token_hex(16)))
+        return
+    await loop.run_in_executor(_get_hash_executor(), _verify_uncached, password, stored)
+
+
+async def averify_password(password: str, stored: str) -> bool:
+    """Асинхронная verify_password: кеш проверяется в процессе, KDF - в пуле KDF.
+
+    Кеш успешных проверок живет в основном процессе, поэтому в пул уходит
+    только сама проверка (воркер процессного пула кеш не видит).
+    """
+    key = _verify_cache_key(password, stored)
+    if _verify_cache_hit(key):
+        return True
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(_get_hash_executor(), _verify_uncached, password, stored):
+        return False
+    _verify_cache_put(key)
+    return True
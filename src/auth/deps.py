@@ -6,22 +6,42 @@
 # last_reviewed: 2025-08-21
 # interfaces:
 #   - get_current_session_id(request) -> str | None
-#   - require_session_id(request) -> str (HTTP 401 on missing)
+#   - require_session_id(request) -> str (HTTP 401 on missing/malformed)
 # --- /agent_meta ---
 
-from fastapi import Cookie, HTTPException, Request
+import re
+
+from fastapi import HTTPException, Request
 from typing import Optional
 
 
 COOKIE_NAME = "sid"
 
+# Ключ scope["state"], куда SessionCookieMiddleware (src.auth.asgi) кладет session_id
+SID_STATE_KEY = "auth_sid"
 
-def get_current_session_id(sid: Optional[str] = Cookie(default=None, alias=COOKIE_NAME)) -> Optional[str]:
-    return sid
+# session_id выдается как str(uuid.uuid4()); паттерн компилируется один раз,
+# чтобы мусорные cookie отсекались без похода в хранилище
+_SID_FULLMATCH = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"
+).fullmatch
+
+
+def _session_id(request: Request) -> Optional[str]:
+    # С SessionCookieMiddleware cookie уже разобрана; без него (приложение
+    # без middleware, тесты на голом роутере) - request.cookies Starlette
+    state = request.scope.get("state")
+    if state is not None and SID_STATE_KEY in state:
+        return state[SID_STATE_KEY]
+    return request.cookies.get(COOKIE_NAME)
 
 
-def require_session_id(sid: Optional[str] = Cookie(default=None, alias=COOKIE_NAME)) -> str:
-    if not sid:
+def get_current_session_id(request: Request) -> Optional[str]:
+    return _session_id(request)
+
+
+def require_session_id(request: Request) -> str:
+    sid = _session_id(request)
+    if not sid or _SID_FULLMATCH(sid) is None:
         raise HTTPException(status_code=401, detail="Unauthorized")
     return sid
-
@@ -5,13 +5,14 @@
 # contract: Кастомные типы исключений для модуля аутентификации
 # last_reviewed: 2025-08-22
 # interfaces:
-#   - AuthenticationError: базовое исключение для проблем аутентификации
+#   - AuthenticationError: базовое исключение для проблем аутентификации (.detail для HTTPException)
 #   - UserExistsError: пользователь уже существует
 #   - InvalidCredentialsError: неверные учетные данные
 #   - SessionExpiredError: сессия истекла или недействительна
 # --- /agent_meta ---
 
-from typing import Optional
+from functools import cached_property
+from typing import ClassVar, Dict, Optional
 
 
 class AuthenticationError(Exception):
@@ -20,6 +21,11 @@ class AuthenticationError(Exception):
     def __init__(self, message: str, error_code: Optional[str] = None) -> None:
         super().__init__(message)
         self.error_code = error_code or "AUTH_ERROR"
+    
+    @cached_property
+    def detail(self) -> Dict[str, str]:
+        """Тело detail для HTTPException: {"error_code", "message"}."""
+        return {"error_code": self.error_code, "message": str(self)}
 
 
 class UserExistsError(AuthenticationError):
@@ -33,14 +39,34 @@ class UserExistsError(AuthenticationError):
 class InvalidCredentialsError(AuthenticationError):
     """Неверные учетные данные для входа."""
     
+    # Сообщение не зависит от email, поэтому detail общий для всех экземпляров (не изменять)
+    DETAIL: ClassVar[Dict[str, str]] = {
+        "error_code": "INVALID_CREDENTIALS",
+        "message": "Invalid email or password",
+    }
+    
     def __init__(self, email: str) -> None:
-        super().__init__("Invalid email or password", "INVALID_CREDENTIALS")
+        super().__init__(self.DETAIL["message"], self.DETAIL["error_code"])
         self.email = email
+    
+    @property
+    def detail(self) -> Dict[str, str]:
+        return self.DETAIL
 
 
 class SessionExpiredError(AuthenticationError):
     """Сессия истекла или недействительна."""
     
+    # Общий detail для всех экземпляров (не изменять)
+    DETAIL: ClassVar[Dict[str, str]] = {
+        "error_code": "SESSION_EXPIRED",
+        "message": "Session expired or invalid",
+    }
+    
     def __init__(self, session_id: Optional[str] = None) -> None:
-        super().__init__("Session expired or invalid", "SESSION_EXPIRED")
-        self.session_id = session_id
\ No newline at end of file
+        super().__init__(self.DETAIL["message"], self.DETAIL["error_code"])
+        self.session_id = session_id
+    
+    @property
+    def detail(self) -> Dict[str, str]:
+        return self.DETAIL
@@ -0,0 +1,29 @@
+# src/auth/hashing.py
+# --- agent_meta ---
+# role: auth-hashing
+# owner: @backend
+# contract: SHA-256 хеши User-Agent/IP для аудита сессий и OAuth state
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - hash_str(s: str) -> str
+#   - hash_str_opt(s: str | None) -> str | None
+# --- /agent_meta ---
+
+import hashlib
+from functools import lru_cache
+from typing import Optional
+
+
+# User-Agent и IP сильно повторяются между запросами: хеш считается
+# один раз на уникальное значение
+@lru_cache(maxsize=4096)
+def hash_str(s: str) -> str:
+    """Hex SHA-256 строки в UTF-8."""
+    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+
+
+def hash_str_opt(s: Optional[str]) -> Optional[str]:
+    """Хеширует строку для безопасного хранения; пустое значение - None."""
+    if not s:
+        return None
+    return hash_str(s)
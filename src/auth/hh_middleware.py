@@ -5,31 +5,50 @@
 # contract: Middleware для проверки HH авторизации перед доступом к LLM фичам
 # last_reviewed: 2025-08-23
 # interfaces:
+#   - get_request_now() -> float
+#   - get_me_info(session_id: str) -> dict | None
+#   - get_hh_account_info(session_id: str, me_info: dict | None, now: float) -> HHAccountInfo | None
 #   - require_hh_connection(session_id: str) -> UserWithHH
 #   - get_current_user_with_hh(session_id: str) -> UserWithHH | None
 # --- /agent_meta ---
 
-from typing import Optional, Dict, Any
-from dataclasses import dataclass
+import time
+from typing import Any, Callable, Dict, NamedTuple, Optional, TypeVar
 from fastapi import HTTPException, Depends
 
 from src.utils import get_logger
+from . import session_cache
 from .deps import require_session_id
-from .service import AuthService
-from .storage import AuthStorage
-from .hh_service import HHAccountService, HHAccountInfo
+from .hh_service import HHAccountInfo
+from .providers import get_auth_service, get_hh_service
 
 logger = get_logger("auth.hh_middleware")
 
-# DI-синглтоны для middleware
-_storage = AuthStorage()
-_auth_service = AuthService(_storage)
-_hh_service = HHAccountService(_storage)
+T = TypeVar("T")
 
+# Тела detail отказов middleware: собираются один раз и переиспользуются (не изменять)
+_UNAUTHORIZED_DETAIL = {
+    "error_code": "UNAUTHORIZED",
+    "message": "Session invalid or expired",
+    "action_required": "login",
+}
+_HH_CONNECTION_REQUIRED_DETAIL = {
+    "error_code": "HH_CONNECTION_REQUIRED",
+    "message": "HH.ru connection required to access LLM features",
+    "action_required": "connect_hh",
+}
+_HH_TOKEN_EXPIRED_DETAIL = {
+    "error_code": "HH_TOKEN_EXPIRED",
+    "message": "HH.ru tokens expired, please reconnect",
+    "action_required": "reconnect_hh",
+}
+_MIDDLEWARE_ERROR_DETAIL = {
+    "error_code": "MIDDLEWARE_ERROR",
+    "message": "Authentication middleware failed",
+}
 
-@dataclass
-class UserWithHH:
-    """Контекст пользователя с подтвержденным подключением HH."""
+class UserWithHH(NamedTuple):
+    """Контекст пользователя с подтвержденным подключением HH (неизменяемый кортеж)."""
     user_id: str
     org_id: str
     user_email: str
@@ -38,55 +57,140 @@ class UserWithHH:
     session_id: str
 
 
-async def get_current_user_with_hh(
+def _safe(fn: Callable[..., T], *args: Any) -> Optional[T]:
+    """Вызывает обращение к хранилищу, превращая ошибку в None (с логированием)."""
+    try:
+        return fn(*args)
+    except Exception as e:
+        logger.error("Ошибка обращения к хранилищу в HH middleware (%s): %s", fn.__name__, e)
+        return None
+
+
+def get_current_user_with_hh(
     session_id: str = Depends(require_session_id)
 ) -> Optional[UserWithHH]:
     """
     Получает текущего пользователя с HH подключением (без исключения).
     
+    Обычная def: FastAPI выполняет ее в threadpool, синхронный SQLite
+    не блокирует event loop.
+    
     Args:
         session_id: Идентификатор сессии пользователя
         
     Returns:
         UserWithHH если пользователь аутентифицирован и HH подключен, иначе None
     """
-    try:
-        # Проверяем внутреннюю аутентификацию
-        me_info = _auth_service.get_me(session_id)
-        if not me_info:
-            logger.debug(f"Невалидная сессия: {session_id}")
-            return None
-        
-        user_id = me_info["user"]["id"]
-        org_id = me_info["org_id"]
-        
-        # Проверяем HH подключение
-        hh_account = _hh_service.get_hh_account(user_id, org_id)
-        if not hh_account:
-            logger.debug(f"HH не подключен для пользователя {user_id}")
-            return None
-        
-        # Проверяем не истекли ли токены
-        if hh_account.is_expired:
-            logger.warning(f"HH токены истекли для пользователя {user_id}")
-            return None
-        
-        return UserWithHH(
-            user_id=user_id,
-            org_id=org_id,
-            user_email=me_info["user"]["email"],
-            user_role=me_info["role"],
-            hh_account=hh_account,
-            session_id=session_id
-        )
+    # Исключения могут бросать только обращения к хранилищу - их и оборачиваем
+    me_info = _safe(get_auth_service().get_me, session_id)
+    if not me_info:
+        logger.debug("Невалидная сессия: %s", session_id)
+        return None
+    
+    user_id = me_info["user"]["id"]
+    org_id = me_info["org_id"]
+    
+    # Проверяем HH подключение
+    hh_account = _safe(get_hh_service().get_hh_account, user_id, org_id)
+    if not hh_account:
+        logger.debug("HH не подключен для пользователя %s", user_id)
+        return None
+    
+    # Проверяем не истекли ли токены
+    if hh_account.is_expired:
+        logger.warning("HH токены истекли для пользователя %s", user_id)
+        return None
+    
+    return UserWithHH(
+        user_id=user_id,
+        org_id=org_id,
+        user_email=me_info["user"]["email"],
+        user_role=me_info["role"],
+        hh_account=hh_account,
+        session_id=session_id
+    )
+
+
+def _middleware_error() -> HTTPException:
+    return HTTPException(status_code=500, detail=_MIDDLEWARE_ERROR_DETAIL)
+
+
+# Sync-зависимости ниже FastAPI кеширует в рамках запроса (use_cache=True по умолчанию):
+# если в дереве зависимостей эндпоинта они встречаются несколько раз,
+# запросы к storage выполняются только один раз.
+def get_me_info(
+    session_id: str = Depends(require_session_id)
+) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает me_info текущей сессии (кешируется FastAPI на время запроса).
+    
+    Сначала смотрит в session_cache: при попадании хранилище не трогается.
+    
+    Returns:
+        Словарь с user/org_id/role или None, если сессия невалидна
         
+    Raises:
+        HTTPException 500: при ошибке доступа к хранилищу
+    """
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached[0]
+    try:
+        return get_auth_service().get_me(session_id)
     except Exception as e:
-        logger.error(f"Ошибка проверки пользователя с HH для сессии {session_id}: {e}")
+        logger.error("Ошибка получения сессии %s в HH middleware: %s", session_id, e)
+        raise _middleware_error()
+
+
+async def get_request_now() -> float:
+    """
+    Время запроса: time.time() снимается один раз и кешируется FastAPI.
+
+    Все проверки срока HH токенов в цепочке зависимостей одного запроса
+    сравнивают с этим значением. async - чтобы не уходить в threadpool.
+    """
+    return time.time()
+
+
+def get_hh_account_info(
+    session_id: str = Depends(require_session_id),
+    me_info: Optional[Dict[str, Any]] = Depends(get_me_info),
+    now: float = Depends(get_request_now),
+) -> Optional[HHAccountInfo]:
+    """
+    Возвращает HH аккаунт пользователя текущей сессии (кешируется FastAPI на время запроса).
+    
+    Действующий аккаунт вместе с me_info сохраняется в session_cache,
+    так что следующие запросы той же сессии в пределах TTL идут без storage.
+    
+    Returns:
+        HHAccountInfo или None, если сессия невалидна либо HH не подключен
+        
+    Raises:
+        HTTPException 500: при ошибке доступа к хранилищу
+    """
+    if not me_info:
         return None
+    cached = session_cache.get(session_id)
+    if cached is not None:
+        return cached[1]
+    user_id = me_info["user"]["id"]
+    # В try только обращение к хранилищу; обработчик - холодный блок в конце
+    try:
+        hh_account = get_hh_service().get_hh_account(user_id, me_info["org_id"])
+    except Exception as e:
+        logger.error("Ошибка получения HH аккаунта для пользователя %s: %s", user_id, e)
+        raise _middleware_error()
+    if hh_account and not hh_account.is_expired_at(now):
+        session_cache.put(session_id, me_info, hh_account, now)
+    return hh_account
 
 
 async def require_hh_connection(
-    session_id: str = Depends(require_session_id)
+    session_id: str = Depends(require_session_id),
+    me_info: Optional[Dict[str, Any]] = Depends(get_me_info),
+    hh_account: Optional[HHAccountInfo] = Depends(get_hh_account_info),
+    now: float = Depends(get_request_now),
 ) -> UserWithHH:
     """
     Требует подключения HH аккаунта для доступа к ресурсу.
@@ -98,6 +202,9 @@ async def require_hh_connection(
     
     Args:
         session_id: Идентификатор сессии пользователя
+        me_info: Данные текущей сессии из get_me_info
+        hh_account: HH аккаунт из get_hh_account_info
+        now: Время запроса из get_request_now
         
     Returns:
         UserWithHH с полным контекстом пользователя
@@ -105,88 +212,65 @@ async def require_hh_connection(
     Raises:
         HTTPException 401: если пользователь не аутентифицирован
         HTTPException 403: если HH аккаунт не подключен или токены истекли
+        HTTPException 500: при ошибке доступа к хранилищу
     """
-    try:
-        # Проверяем внутреннюю аутентификацию
-        me_info = _auth_service.get_me(session_id)
-        if not me_info:
-            logger.info(f"Отклонен доступ: невалидная сессия {session_id}")
-            raise HTTPException(
-                status_code=401,
-                detail={
-                    "error_code": "UNAUTHORIZED", 
-                    "message": "Session invalid or expired",
-                    "action_required": "login"
-                }
-            )
-        
-        user_id = me_info["user"]["id"]
-        org_id = me_info["org_id"]
-        
-        # Проверяем HH подключение
-        hh_account = _hh_service.get_hh_account(user_id, org_id)
-        if not hh_account:
-            logger.info(f"Отклонен доступ к LLM фичам: HH не подключен для пользователя {user_id}")
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "error_code": "HH_CONNECTION_REQUIRED",
-                    "message": "HH.ru connection required to access LLM features", 
-                    "action_required": "connect_hh"
-                }
-            )
-        
-        # Проверяем не истекли ли токены
-        if hh_account.is_expired:
-            logger.warning(f"Отклонен доступ: HH токены истекли для пользователя {user_id}")
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "error_code": "HH_TOKEN_EXPIRED",
-                    "message": "HH.ru tokens expired, please reconnect",
-                    "action_required": "reconnect_hh"
-                }
-            )
-        
-        logger.info(f"Доступ к LLM фичам разрешен для пользователя {user_id}")
-        
-        return UserWithHH(
-            user_id=user_id,
-            org_id=org_id,
-            user_email=me_info["user"]["email"],
-            user_role=me_info["role"],
-            hh_account=hh_account,
-            session_id=session_id
+    # Проверяем внутреннюю аутентификацию
+    if not me_info:
+        logger.info("Отклонен доступ: невалидная сессия %s", session_id)
+        raise HTTPException(
+            status_code=401,
+            detail=_UNAUTHORIZED_DETAIL,
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Критическая ошибка HH middleware для сессии {session_id}: {e}")
+    
+    user_id = me_info["user"]["id"]
+    
+    # Проверяем HH подключение
+    if not hh_account:
+        logger.info("Отклонен доступ к LLM фичам: HH не подключен для пользователя %s", user_id)
+        raise HTTPException(
+            status_code=403,
+            detail=_HH_CONNECTION_REQUIRED_DETAIL,
+        )
+    
+    # Проверяем не истекли ли токены
+    if hh_account.is_expired_at(now):
+        logger.warning("Отклонен доступ: HH токены истекли для пользователя %s", user_id)
         raise HTTPException(
-            status_code=500,
-            detail={
-                "error_code": "MIDDLEWARE_ERROR",
-                "message": "Authentication middleware failed"
-            }
+            status_code=403,
+            detail=_HH_TOKEN_EXPIRED_DETAIL,
         )
+    
+    logger.info("Доступ к LLM фичам разрешен для пользователя %s", user_id)
+    
+    return UserWithHH(
+        user_id=user_id,
+        org_id=me_info["org_id"],
+        user_email=me_info["user"]["email"],
+        user_role=me_info["role"],
+        hh_account=hh_account,
+        session_id=session_id
+    )
 
 
-def get_user_context(user_with_hh: UserWithHH) -> Dict[str, Any]:
+def get_user_context(user_with_hh: UserWithHH, now: Optional[float] = None) -> Dict[str, Any]:
     """
     Извлекает контекст пользователя для использования в LLM pipeline.
     
     Args:
         user_with_hh: Пользователь с подтвержденным HH подключением
+        now: Уже снятое time.time() (по умолчанию берется текущее)
         
     Returns:
         Словарь с контекстом пользователя для sessions и LLM фич
     """
+    if now is None:
+        now = time.time()
+    user_id, org_id, user_email, user_role, hh_account, session_id = user_with_hh
     return {
-        "user_id": user_with_hh.user_id,
-        "org_id": user_with_hh.org_id,
-        "user_email": user_with_hh.user_email,
-        "user_role": user_with_hh.user_role,
-        "hh_expires_in": user_with_hh.hh_account.expires_in_seconds,
-        "session_id": user_with_hh.session_id
+        "user_id": user_id,
+        "org_id": org_id,
+        "user_email": user_email,
+        "user_role": user_role,
+        "hh_expires_in": max(0, int(hh_account.expires_at - now)),
+        "session_id": session_id
     }
\ No newline at end of file
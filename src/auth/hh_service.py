@@ -10,26 +10,62 @@
 #   - disconnect_hh_account(user_id, org_id) -> bool
 #   - refresh_hh_tokens(user_id, org_id) -> Awaitable[bool]
 #   - is_hh_connected(user_id, org_id) -> bool
+#   - init_hh_session() / close_hh_session() / get_hh_session() -> общая aiohttp.ClientSession
 # dependencies:
 #   - token_manager_cls: Класс для управления HH токенами (по умолчанию: HHTokenManager)
-#   - session_factory: Фабрика для aiohttp сессий (по умолчанию: lambda: aiohttp.ClientSession())
+#   - session_factory: Фабрика для aiohttp сессий (по умолчанию: общая сессия модуля, get_hh_session)
 # --- /agent_meta ---
 
+import asyncio
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from dataclasses import dataclass
 
 import aiohttp
+from fastapi.concurrency import run_in_threadpool
 
 from src.utils import get_logger
-from src.hh_adapter.config import HHSettings
+from src.hh_adapter.config import get_hh_settings
 from src.hh_adapter.tokens import HHTokenManager
+from . import session_cache
 from .storage import AuthStorage
 
 logger = get_logger("auth.hh_service")
 
+# Общая aiohttp-сессия для запросов к HH: пул соединений и keep-alive переживают
+# отдельные обновления токенов. Открывается/закрывается в lifespan webapp.
+_shared_session: Optional[aiohttp.ClientSession] = None
 
-@dataclass
+
+async def init_hh_session() -> aiohttp.ClientSession:
+    """Открывает общую сессию (идемпотентно)."""
+    global _shared_session
+    if _shared_session is None or _shared_session.closed:
+        _shared_session = aiohttp.ClientSession()
+    return _shared_session
+
+
+async def close_hh_session() -> None:
+    """Закрывает общую сессию при остановке приложения."""
+    global _shared_session
+    if _shared_session is not None and not _shared_session.closed:
+        await _shared_session.close()
+    _shared_session = None
+
+
+async def get_hh_session() -> aiohttp.ClientSession:
+    """DI-функция: общая сессия; создается лениво, если lifespan ее еще не открыл."""
+    return await init_hh_session()
+
+
+# Запас до фактического истечения, после которого токен уже считается просроченным
+HH_TOKEN_EXPIRY_MARGIN_SEC = 300
+
+# Расхождение expires_at, которое при тех же токенах не считается изменением
+TOKEN_WRITE_SKIP_WINDOW_SEC = 10
+
+
+@dataclass(slots=True)
 class HHAccountInfo:
     """Информация о подключенном HH аккаунте пользователя."""
     user_id: str
@@ -42,15 +78,27 @@ class HHAccountInfo:
     ua_hash: Optional[str] = None
     ip_hash: Optional[str] = None
     
+    def valid_for_at(self, now: float) -> float:
+        """Сколько секунд от now токен еще не считается истекшим (с учетом запаса)."""
+        return self.expires_at - HH_TOKEN_EXPIRY_MARGIN_SEC - now
+    
+    def is_expired_at(self, now: float) -> bool:
+        """Проверка истечения токена с 5-минутным запасом на момент now."""
+        return self.valid_for_at(now) <= 0
+    
+    def expires_in_seconds_at(self, now: float) -> int:
+        """Количество секунд до истечения токена на момент now."""
+        return max(0, int(self.expires_at - now))
+    
     @property
     def is_expired(self) -> bool:
         """Проверка истечения токена с 5-минутным запасом."""
-        return time.time() >= (self.expires_at - 300)  # 5 минут запаса
+        return self.is_expired_at(time.time())
     
     @property
     def expires_in_seconds(self) -> int:
         """Количество секунд до истечения токена."""
-        return max(0, int(self.expires_at - time.time()))
+        return self.expires_in_seconds_at(time.time())
 
 
 class HHAccountService:
@@ -65,10 +113,13 @@ class HHAccountService:
     
     def __init__(self, storage: AuthStorage, token_manager_cls=None, session_factory=None) -> None:
         self.storage = storage
-        self.hh_settings = HHSettings()
+        self.hh_settings = get_hh_settings()
         # Инъекция зависимостей для тестируемости
         self._token_manager_cls = token_manager_cls or HHTokenManager
-        self._session_factory = session_factory or (lambda: aiohttp.ClientSession())
+        # Без фабрики используется общая сессия модуля, которую сервис не закрывает
+        self._session_factory = session_factory
+        # Обновления токенов в процессе выполнения: (user_id, org_id) -> Task
+        self._inflight_refreshes: Dict[Tuple[str, str], "asyncio.Task[bool]"] = {}
         logger.info("HHAccountService инициализирован")
 
     def connect_hh_account(
@@ -97,10 +148,12 @@ class HHAccountService:
         Raises:
             ValueError: если токены содержат некорректные данные
         """
-        # Валидация токенов
-        required_fields = ['access_token', 'refresh_token']
-        if not all(field in tokens for field in required_fields):
-            raise ValueError(f"Отсутствуют обязательные поля токенов: {required_fields}")
+        # Валидация токенов: одно обращение к словарю на поле
+        try:
+            access_token = tokens['access_token']
+            refresh_token = tokens['refresh_token']
+        except KeyError as e:
+            raise ValueError(f"Отсутствуют обязательные поля токенов: {e.args[0]}") from None
         
         # Расчет времени истечения
         expires_at = tokens.get('expires_at')
@@ -108,7 +161,7 @@ class HHAccountService:
             expires_at = time.time() + float(tokens['expires_in'])
         
         if not expires_at:
-            logger.warning(f"Отсутствует expires_at для пользователя {user_id}")
+            logger.warning("Отсутствует expires_at для пользователя %s", user_id)
             expires_at = time.time() + 3600  # 1 час по умолчанию
         
         now = time.time()
@@ -117,22 +170,23 @@ class HHAccountService:
         self.storage.save_hh_account(
             user_id=user_id,
             org_id=org_id,
-            access_token=tokens['access_token'],
-            refresh_token=tokens['refresh_token'],
+            access_token=access_token,
+            refresh_token=refresh_token,
             expires_at=expires_at,
             scopes=scopes,
             connected_at=now,
             ua_hash=ua_hash,
             ip_hash=ip_hash
         )
+        session_cache.invalidate_user(user_id)
         
-        logger.info(f"HH аккаунт подключен для пользователя {user_id} в организации {org_id}")
+        logger.info("HH аккаунт подключен для пользователя %s в организации %s", user_id, org_id)
         
         return HHAccountInfo(
             user_id=user_id,
             org_id=org_id,
-            access_token=tokens['access_token'],
-            refresh_token=tokens['refresh_token'],
+            access_token=access_token,
+            refresh_token=refresh_token,
             expires_at=expires_at,
             scopes=scopes,
             connected_at=now,
@@ -179,11 +233,12 @@ class HHAccountService:
             True если аккаунт был отключен, False если не был подключен
         """
         if not self.storage.get_hh_account(user_id, org_id):
-            logger.info(f"HH аккаунт не найден для отключения: пользователь {user_id}, организация {org_id}")
+            logger.info("HH аккаунт не найден для отключения: пользователь %s, организация %s", user_id, org_id)
             return False
         
         self.storage.delete_hh_account(user_id, org_id)
-        logger.info(f"HH аккаунт отключен для пользователя {user_id} в организации {org_id}")
+        session_cache.invalidate_user(user_id)
+        logger.info("HH аккаунт отключен для пользователя %s в организации %s", user_id, org_id)
         return True
     
     def is_hh_connected(self, user_id: str, org_id: str) -> bool:
@@ -197,13 +252,14 @@ class HHAccountService:
         Returns:
             True если HH аккаунт подключен и токены действительны
         """
-        account = self.get_hh_account(user_id, org_id)
-        if not account:
+        # Достаточно expires_at: полный HHAccountInfo здесь не нужен
+        expires_at = self.storage.get_hh_account_expiry(user_id, org_id)
+        if expires_at is None:
             return False
         
         # Проверяем не истекли ли токены
-        if account.is_expired:
-            logger.warning(f"Токены HH истекли для пользователя {user_id}")
+        if time.time() >= expires_at - HH_TOKEN_EXPIRY_MARGIN_SEC:
+            logger.warning("Токены HH истекли для пользователя %s", user_id)
             return False
             
         return True
@@ -212,6 +268,9 @@ class HHAccountService:
         """
         Обновляет токены HH аккаунта через HHTokenManager.
         
+        Одновременные вызовы для одной пары (user_id, org_id) ждут одно и то же
+        обновление (single-flight): в HH уходит один refresh, в БД - одна запись.
+        
         Args:
             user_id: Идентификатор пользователя
             org_id: Идентификатор организации
@@ -219,16 +278,29 @@ class HHAccountService:
         Returns:
             True если токены обновлены успешно
         """
+        key = (user_id, org_id)
+        task = self._inflight_refreshes.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._refresh_hh_tokens(user_id, org_id))
+            self._inflight_refreshes[key] = task
+            task.add_done_callback(lambda _: self._inflight_refreshes.pop(key, None))
+        # shield: отмена одного из ожидающих не должна отменять общее обновление
+        return await asyncio.shield(task)
+    
+    async def _refresh_hh_tokens(self, user_id: str, org_id: str) -> bool:
+        """Фактическое обновление токенов (вызывается через refresh_hh_tokens)."""
         session = None
+        owns_session = self._session_factory is not None
         try:
             # Получаем текущий HH аккаунт
-            hh_account = self.get_hh_account(user_id, org_id)
+            # Синхронный SQLite - в threadpool, чтобы не блокировать event loop
+            hh_account = await run_in_threadpool(self.get_hh_account, user_id, org_id)
             if not hh_account:
-                logger.warning(f"Нет HH аккаунта для обновления токенов: {user_id}")
+                logger.warning("Нет HH аккаунта для обновления токенов: %s", user_id)
                 return False
             
-            # Создаем ClientSession через инъецированную фабрику
-            session = self._session_factory()
+            # Инъецированная фабрика создает сессию на вызов, иначе берем общую
+            session = self._session_factory() if owns_session else await get_hh_session()
             
             token_manager = self._token_manager_cls(
                 settings=self.hh_settings,
@@ -241,28 +313,40 @@ class HHAccountService:
             # Принудительно обновляем токены
             try:
                 new_access_token = await token_manager.get_valid_access_token()
-                logger.info(f"Токены HH успешно обновлены для пользователя {user_id}")
+                logger.info("Токены HH успешно обновлены для пользователя %s", user_id)
+                
+                # Токены не поменялись (менеджер счел текущие действительными) - не пишем в БД
+                if (
+                    token_manager.access_token == hh_account.access_token
+                    and token_manager.refresh_token == hh_account.refresh_token
+                    and abs(token_manager.expires_at - hh_account.expires_at) < TOKEN_WRITE_SKIP_WINDOW_SEC
+                ):
+                    logger.debug("Токены HH не изменились для пользователя %s, запись пропущена", user_id)
+                    return True
                 
                 # Сохраняем обновленные токены в БД
-                updated_tokens = {
-                    "access_token": token_manager.access_token,
-                    "refresh_token": token_manager.refresh_token,
-                    "expires_at": token_manager.expires_at
-                }
-                self.storage.update_hh_tokens(user_id, org_id, updated_tokens)
+                await run_in_threadpool(
+                    self.storage.update_hh_tokens,
+                    user_id,
+                    org_id,
+                    token_manager.access_token,
+                    token_manager.refresh_token,
+                    token_manager.expires_at,
+                )
+                session_cache.invalidate_user(user_id)
                 
                 return True
                 
             except Exception as refresh_error:
-                logger.error(f"Ошибка обновления токенов HH для {user_id}: {refresh_error}")
+                logger.error("Ошибка обновления токенов HH для %s: %s", user_id, refresh_error)
                 return False
                 
         except Exception as e:
-            logger.error(f"Критическая ошибка refresh_hh_tokens для {user_id}: {e}")
+            logger.error("Критическая ошибка refresh_hh_tokens для %s: %s", user_id, e)
             return False
         finally:
-            # Закрываем сессию если она была создана
-            if session and not session.closed:
+            # Закрываем только сессию, созданную фабрикой; общая живет до shutdown
+            if owns_session and session and not session.closed:
                 await session.close()
     
     def get_connected_users(self, org_id: Optional[str] = None) -> List[HHAccountInfo]:
@@ -0,0 +1,61 @@
+# src/auth/janitor.py
+# --- agent_meta ---
+# role: auth-janitor
+# owner: @backend
+# contract: Фоновая периодическая чистка истекших сессий и OAuth states вне пути запроса
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - async run_session_janitor(storage, interval_sec?, oauth_states?) -> None (работает до отмены)
+# --- /agent_meta ---
+
+import asyncio
+import os
+from typing import Optional, Tuple, Union
+
+from fastapi.concurrency import run_in_threadpool
+
+from src.utils import get_logger
+from .oauth_state_store import OAuthStateStore
+from .storage import AuthStorage
+
+
+SESSION_JANITOR_INTERVAL_SEC = float(os.getenv("AUTH_SESSION_JANITOR_INTERVAL_SEC", "300"))
+
+logger = get_logger("auth.janitor")
+
+
+def _cleanup_expired(
+    storage: AuthStorage, oauth_states: Union[OAuthStateStore, AuthStorage]
+) -> Tuple[int, int]:
+    """Один проход чистки: (удалено сессий, удалено OAuth states)."""
+    if oauth_states is storage:
+        # Обе таблицы в одной БД: два DELETE - одна транзакция и один fsync
+        with storage.transaction():
+            return storage.delete_expired_sessions(), storage.cleanup_expired_oauth_states()
+    return storage.delete_expired_sessions(), oauth_states.cleanup_expired_oauth_states()
+
+
+async def run_session_janitor(
+    storage: AuthStorage,
+    interval_sec: float = SESSION_JANITOR_INTERVAL_SEC,
+    oauth_states: Optional[Union[OAuthStateStore, AuthStorage]] = None,
+) -> None:
+    """
+    Раз в interval_sec удаляет истекшие сессии и OAuth states.
+
+    Запросы истекшие сессии и OAuth states только отклоняют (чтения не
+    пишут в БД); строки удаляются здесь, DELETE по индексам expires_at.
+    OAuth states чистятся в oauth_states (по умолчанию - в storage).
+    Запускается задачей в lifespan приложения и останавливается отменой.
+    """
+    if oauth_states is None:
+        oauth_states = storage
+    while True:
+        await asyncio.sleep(interval_sec)
+        try:
+            sessions, states = await run_in_threadpool(_cleanup_expired, storage, oauth_states)
+        except Exception as e:
+            logger.error("Ошибка фоновой чистки истекших сессий: %s", e)
+            continue
+        if sessions or states:
+            logger.info("Удалено истекших сессий: %s, OAuth states: %s", sessions, states)
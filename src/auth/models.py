@@ -9,10 +9,17 @@
 #   - LoginRequest(email: str, password: str)
 #   - UserOut(id: str, email: str)
 #   - MeOut(user: UserOut, org_id: str, role: str)
+#   - SignupOut(user: UserOut, org_id: str)
+#   - LoginOut(ok: bool)
 # --- /agent_meta ---
 
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Any, Optional
+
+
+def _normalize_email(v: Any) -> Any:
+    """Email приводится к каноническому виду на входе (storage дополнительно делает lower())."""
+    return v.strip().lower() if isinstance(v, str) else v
 
 
 class SignupRequest(BaseModel):
@@ -20,19 +27,45 @@ class SignupRequest(BaseModel):
     password: str = Field(min_length=6, max_length=128)
     org_name: Optional[str] = None
 
+    @field_validator("email", mode="before")
+    @classmethod
+    def normalize_email(cls, v: Any) -> Any:
+        return _normalize_email(v)
+
 
 class LoginRequest(BaseModel):
     email: EmailStr
     password: str
 
+    @field_validator("email", mode="before")
+    @classmethod
+    def normalize_email(cls, v: Any) -> Any:
+        return _normalize_email(v)
+
 
+# Ответные модели: email уже провалидирован EmailStr при signup и берется из storage,
+# поэтому повторная проверка email-validator на каждом ответе не нужна.
 class UserOut(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     id: str
-    email: EmailStr
+    email: str
 
 
 class MeOut(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     user: UserOut
     org_id: str
     role: str
 
+
+class SignupOut(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    user: UserOut
+    org_id: str
+
+
+class LoginOut(BaseModel):
+    ok: bool
@@ -0,0 +1,96 @@
+# src/auth/oauth_state_store.py
+# --- agent_meta ---
+# role: auth-oauth-state-store
+# owner: @backend
+# contract: In-process хранилище OAuth state с TTL (тот же интерфейс, что у AuthStorage)
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - OAuthStateStore.save_oauth_state(state, user_id, org_id, session_id, ua_hash?, ip_hash?, ttl_seconds?) -> None
+#   - OAuthStateStore.get_oauth_state(state) -> dict | None
+#   - OAuthStateStore.consume_oauth_state(state) -> dict | None
+#   - OAuthStateStore.delete_oauth_state(state) -> bool
+#   - OAuthStateStore.cleanup_expired_oauth_states() -> int
+# --- /agent_meta ---
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+OAUTH_STATE_STORE_SIZE = 100_000
+
+
+class OAuthStateStore:
+    """OAuth state в памяти процесса вместо таблицы oauth_states.
+
+    State живет 10 минут и нужен ровно один раз, поэтому запись в SQLite
+    (две пишущие транзакции на подключение HH) ему не нужна. Ограничение:
+    state виден только своему процессу - при нескольких воркерах uvicorn
+    выберите AUTH_OAUTH_STATE_BACKEND=sqlite (см. providers).
+    """
+
+    def __init__(self, maxsize: int = OAUTH_STATE_STORE_SIZE) -> None:
+        self._maxsize = maxsize
+        # Порядок вставки ~ порядок истечения (TTL у всех одинаковый по умолчанию)
+        self._states: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save_oauth_state(
+        self,
+        state: str,
+        user_id: str,
+        org_id: str,
+        session_id: str,
+        ua_hash: Optional[str] = None,
+        ip_hash: Optional[str] = None,
+        ttl_seconds: int = 600,
+    ) -> None:
+        """Сохраняет OAuth state с TTL; при переполнении вытесняет самые старые."""
+        now = time.time()
+        data = {
+            "user_id": user_id,
+            "org_id": org_id,
+            "session_id": session_id,
+            "created_at": now,
+            "ua_hash": ua_hash,
+            "ip_hash": ip_hash,
+            "expires_at": now + ttl_seconds,
+        }
+        with self._lock:
+            self._states[state] = data
+            while len(self._states) > self._maxsize:
+                self._states.popitem(last=False)
+
+    def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        """Возвращает данные state или None, если не найден/истек (истекший удаляется)."""
+        with self._lock:
+            data = self._states.get(state)
+            if data is None:
+                return None
+            if data["expires_at"] <= time.time():
+                del self._states[state]
+                return None
+            return dict(data)
+
+    def consume_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        """Атомарно извлекает действующий state (одноразовое использование)."""
+        with self._lock:
+            data = self._states.pop(state, None)
+        if data is None or data["expires_at"] <= time.time():
+            return None
+        return data
+
+    def delete_oauth_state(self, state: str) -> bool:
+        """Удаляет state; True, если он был."""
+        with self._lock:
+            return self._states.pop(state, None) is not None
+
+    def cleanup_expired_oauth_states(self) -> int:
+        """Удаляет истекшие states, возвращает их количество."""
+        now = time.time()
+        with self._lock:
+            expired = [s for s, data in self._states.items() if data["expires_at"] <= now]
+            for s in expired:
+                del self._states[s]
+        return len(expired)
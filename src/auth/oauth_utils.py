@@ -15,6 +15,12 @@ import aiohttp
 
 from src.hh_adapter.config import HHSettings
 
+try:
+    # orjson разбирает bytes тела ответа напрямую, без промежуточного декодирования в str
+    from orjson import loads as json_loads
+except ImportError:  # orjson опционален, fallback на stdlib
+    from json import loads as json_loads
+
 
 async def exchange_code_for_tokens(
     session: aiohttp.ClientSession, settings: HHSettings, code: str
@@ -32,7 +38,7 @@ async def exchange_code_for_tokens(
     }
     async with session.post(settings.token_url, data=payload) as resp:
         resp.raise_for_status()
-        data = await resp.json()
+        data = json_loads(await resp.read())
         # преобразуем expires_in -> expires_at
         expires_at = time.time() + float(data.get("expires_in", 0))
         return {
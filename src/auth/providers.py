@@ -0,0 +1,93 @@
+# src/auth/providers.py
+# --- agent_meta ---
+# role: auth-providers
+# owner: @backend
+# contract: Единственный на процесс набор AuthStorage/AuthService/HHAccountService/OAuth state store для роутера и HH middleware
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - get_storage() -> AuthStorage
+#   - get_auth_service() -> AuthService
+#   - get_hh_service() -> HHAccountService
+#   - get_oauth_state_store() -> OAuthStateStore | AuthStorage
+#   - reset_providers() -> None
+# --- /agent_meta ---
+
+import os
+import threading
+from typing import Optional, Union
+
+from .oauth_state_store import OAuthStateStore
+from .service import AuthService
+from .storage import AuthStorage
+from .hh_service import HHAccountService
+
+
+# Экземпляры создаются лениво: импорт пакета src.auth не открывает БД, а
+# WEBAPP_DB_PATH читается в момент первого обращения. В приложении их заранее
+# создает lifespan и публикует в app.state, поэтому в запросах get_* - это
+# одна проверка на None.
+_storage: Optional[AuthStorage] = None
+_auth_service: Optional[AuthService] = None
+_hh_service: Optional[HHAccountService] = None
+_oauth_state_store: Optional[Union[OAuthStateStore, AuthStorage]] = None
+
+# Где живут OAuth state: "memory" - в процессе (по умолчанию, один воркер),
+# "sqlite" - в таблице oauth_states (нужно, если воркеров несколько)
+OAUTH_STATE_BACKEND = os.getenv("AUTH_OAUTH_STATE_BACKEND", "memory").lower()
+
+# Синхронные зависимости FastAPI выполняются в threadpool: первый вызов
+# без lifespan не должен создать два AuthStorage параллельно
+_init_lock = threading.Lock()
+
+
+def get_storage() -> AuthStorage:
+    """Общий AuthStorage процесса."""
+    global _storage
+    if _storage is None:
+        with _init_lock:
+            if _storage is None:
+                _storage = AuthStorage()
+    return _storage
+
+
+def get_auth_service() -> AuthService:
+    """Общий AuthService процесса поверх get_storage()."""
+    global _auth_service
+    if _auth_service is None:
+        storage = get_storage()
+        with _init_lock:
+            if _auth_service is None:
+                _auth_service = AuthService(storage)
+    return _auth_service
+
+
+def get_hh_service() -> HHAccountService:
+    """Общий HHAccountService процесса поверх get_storage()."""
+    global _hh_service
+    if _hh_service is None:
+        storage = get_storage()
+        with _init_lock:
+            if _hh_service is None:
+                _hh_service = HHAccountService(storage)
+    return _hh_service
+
+
+def get_oauth_state_store() -> Union[OAuthStateStore, AuthStorage]:
+    """Хранилище OAuth state согласно AUTH_OAUTH_STATE_BACKEND (интерфейс общий)."""
+    global _oauth_state_store
+    if _oauth_state_store is None:
+        store = get_storage() if OAUTH_STATE_BACKEND == "sqlite" else OAuthStateStore()
+        with _init_lock:
+            if _oauth_state_store is None:
+                _oauth_state_store = store
+    return _oauth_state_store
+
+
+def reset_providers() -> None:
+    """Сбрасывает экземпляры: следующий get_* создаст их заново (для тестов)."""
+    global _storage, _auth_service, _hh_service, _oauth_state_store
+    with _init_lock:
+        _storage = None
+        _auth_service = None
+        _hh_service = None
+        _oauth_state_store = None
@@ -17,66 +17,96 @@
 # --- /agent_meta ---
 
 import os
-import time
-import hashlib
-import aiohttp
-import secrets
-from typing import Optional
+import json
+from types import MappingProxyType
+from typing import Any, Callable, Coroutine, Dict, Optional
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from fastapi.routing import APIRoute
+from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from src.utils import get_logger
-from src.hh_adapter.config import HHSettings
+from src.hh_adapter.config import get_hh_settings
+from . import session_cache
 from .oauth_utils import exchange_code_for_tokens
 from .deps import require_session_id, COOKIE_NAME
+from .hashing import hash_str_opt
+from .state_tokens import next_state_token
 from .exceptions import AuthenticationError, InvalidCredentialsError, UserExistsError
-from .models import LoginRequest, MeOut, SignupRequest
-from .service import AuthService
-from .storage import AuthStorage
-from .hh_service import HHAccountService
-
-
-router = APIRouter()
-
-# Логгер для роутера
-logger = get_logger("auth.router")
-
-# Lazy initialization для тестирования
-_storage = None
-_service = None
-_hh_service = None
-_hh_settings = None
+from .models import LoginOut, LoginRequest, MeOut, SignupOut, SignupRequest
+from .providers import get_auth_service as _get_service
+from .providers import get_hh_service as _get_hh_service
+from .providers import get_oauth_state_store as _get_oauth_states
+from .hh_service import get_hh_session
+
+
+# Непредвиденные ошибки роутов: (error_code, message) ответа 500 по пути роута.
+# Хендлеры ловят только типизированные исключения, остальное обрабатывает _AuthRoute.
+_ROUTE_ERRORS = MappingProxyType({
+    "/auth/signup": ("INTERNAL_ERROR", "Internal server error"),
+    "/auth/login": ("INTERNAL_ERROR", "Internal server error"),
+    "/auth/logout": ("LOGOUT_ERROR", "Logout failed"),
+    "/me": ("INTERNAL_ERROR", "Internal server error"),
+    "/orgs": ("ORG_CREATION_ERROR", "Failed to create organization"),
+    "/auth/hh/status": ("HH_STATUS_ERROR", "Failed to check HH status"),
+    "/auth/hh/connect": ("HH_CONNECT_ERROR", "Failed to initiate HH connection"),
+    "/auth/hh/callback": ("HH_CALLBACK_ERROR", "HH callback processing failed"),
+    "/auth/hh/disconnect": ("HH_DISCONNECT_ERROR", "Failed to disconnect HH account"),
+})
+
+
+# Тела detail типовых отказов: собираются один раз и переиспользуются (не изменять)
+_UNAUTHORIZED_DETAIL = {"error_code": "UNAUTHORIZED", "message": "Session invalid or expired"}
+_SESSION_INVALID_DETAIL = {"error_code": "UNAUTHORIZED", "message": "Session invalid"}
+_HH_ALREADY_CONNECTED_DETAIL = {"error_code": "HH_ALREADY_CONNECTED", "message": "HH account already connected"}
+_HH_NOT_CONNECTED_DETAIL = {"error_code": "HH_NOT_CONNECTED", "message": "HH account was not connected"}
+_INVALID_STATE_DETAIL = {"error_code": "INVALID_STATE", "message": "Invalid or expired state"}
+
+
+class _AuthRoute(APIRoute):
+    """Маршрут auth-роутера: непредвиденное исключение -> заранее собранный ответ 500.
+    
+    Тело ответа сериализуется один раз при регистрации роута. Для /auth/logout
+    cookie очищается и при ошибке - из соображений безопасности.
+    """
 
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        handler = super().get_route_handler()
+        path = self.path
+        error_code, message = _ROUTE_ERRORS.get(path, ("INTERNAL_ERROR", "Internal server error"))
+        body = json.dumps(
+            {"detail": {"error_code": error_code, "message": message}}, separators=(",", ":")
+        ).encode("utf-8")
+        clear_cookie = path == "/auth/logout"
 
-def _get_storage() -> AuthStorage:
-    """Lazy initialization AuthStorage."""
-    global _storage
-    if _storage is None:
-        _storage = AuthStorage()
-    return _storage
+        async def route_handler(request: Request) -> Response:
+            try:
+                return await handler(request)
+            except (StarletteHTTPException, RequestValidationError):
+                raise
+            except Exception as e:
+                logger.error("Unexpected error in %s: %s", path, e)
+                response = Response(body, status_code=500, media_type="application/json")
+                if clear_cookie:
+                    response.delete_cookie(COOKIE_NAME, **_DELETE_COOKIE_KWARGS)
+                return response
 
+        return route_handler
 
-def _get_service() -> AuthService:
-    """Lazy initialization AuthService."""
-    global _service
-    if _service is None:
-        _service = AuthService(_get_storage())
-    return _service
 
+router = APIRouter(route_class=_AuthRoute)
 
-def _get_hh_service() -> HHAccountService:
-    """Lazy initialization HHAccountService."""
-    global _hh_service
-    if _hh_service is None:
-        _hh_service = HHAccountService(_get_storage())
-    return _hh_service
+# Горячие роуты (/auth/signup, /auth/login, /me) объявляют response_model: FastAPI
+# сериализует такие ответы сразу в JSON bytes через pydantic-core, минуя json.dumps.
+# Обработчики без собственного блокирующего I/O объявлены async def и выполняются
+# прямо в event loop; синхронные вызовы storage уходят в threadpool точечно.
 
+# Логгер для роутера
+logger = get_logger("auth.router")
 
-def _get_hh_settings() -> HHSettings:
-    """Lazy initialization HHSettings."""
-    global _hh_settings
-    if _hh_settings is None:
-        _hh_settings = HHSettings()
-    return _hh_settings
+# Экземпляры storage/сервисов общие с HH middleware (см. providers); обращения идут
+# через имена модуля _get_*, чтобы тесты могли подменять их monkeypatch'ем.
 
 # Конфигурация cookie для безопасности
 COOKIE_SECURE = os.getenv("AUTH_COOKIE_SECURE", "false").lower() in {"1", "true", "yes"}
@@ -84,6 +114,22 @@ COOKIE_SAMESITE = os.getenv("AUTH_COOKIE_SAMESITE", "lax").lower()
 COOKIE_DOMAIN = os.getenv("AUTH_COOKIE_DOMAIN", None)
 
 
+if COOKIE_SAMESITE not in {"lax", "strict", "none"}:
+    raise ValueError("AUTH_COOKIE_SAMESITE must be 'lax', 'strict' or 'none'")
+
+# Параметры cookie не меняются после старта процесса, меняется только значение:
+# Set-Cookie собирается заранее в порядке атрибутов Response.set_cookie (Morsel)
+_SET_COOKIE_PREFIX = f"{COOKIE_NAME}=".encode("latin-1")
+_SET_COOKIE_SUFFIX = (
+    (f"; Domain={COOKIE_DOMAIN}" if COOKIE_DOMAIN else "")
+    + "; HttpOnly; Path=/"
+    + f"; SameSite={COOKIE_SAMESITE}"
+    + ("; Secure" if COOKIE_SECURE else "")
+).encode("latin-1")
+
+_DELETE_COOKIE_KWARGS = MappingProxyType({"path": "/", "domain": COOKIE_DOMAIN})
+
+
 def _set_sid_cookie(response: Response, sid: str) -> None:
     """Установка secure cookie с сессионным идентификатором.
     
@@ -92,279 +138,209 @@ def _set_sid_cookie(response: Response, sid: str) -> None:
     - Secure: передача только по HTTPS (конфигурируемо)
     - SameSite: защита от CSRF-атак
     """
-    response.set_cookie(
-        key=COOKIE_NAME,
-        value=sid,
-        httponly=True,
-        secure=COOKIE_SECURE,
-        samesite=COOKIE_SAMESITE,  # "lax" | "strict" | "none"
-        domain=COOKIE_DOMAIN,
-        path="/",
-    )
+    response.raw_headers.append((b"set-cookie", _SET_COOKIE_PREFIX + sid.encode("latin-1") + _SET_COOKIE_SUFFIX))
+
+
+def _get_me_info(sid: str = Depends(require_session_id)) -> Optional[Dict]:
+    """me_info текущей сессии; FastAPI кеширует результат в рамках запроса."""
+    cached = session_cache.get(sid)
+    if cached is not None:
+        return cached[0]
+    return _get_service().get_me(sid)
 
 
-@router.post("/auth/signup")
-def signup(data: SignupRequest, response: Response, request: Request):
+@router.post("/auth/signup", response_model=SignupOut)
+async def signup(data: SignupRequest, response: Response, request: Request):
     """Регистрация нового пользователя с автоматическим входом."""
     try:
-        out = _get_service().signup(email=data.email, password=data.password, org_name=data.org_name)
+        out = await _get_service().signup(email=data.email, password=data.password, org_name=data.org_name)
     except UserExistsError as e:
-        logger.warning(f"Signup attempt for existing user: {e.email}")
-        raise HTTPException(status_code=409, detail={"error_code": e.error_code, "message": str(e)})
+        logger.warning("Signup attempt for existing user: %s", e.email)
+        raise HTTPException(status_code=409, detail=e.detail)
     except AuthenticationError as e:
-        logger.error(f"Signup error: {e}")
-        raise HTTPException(status_code=400, detail={"error_code": e.error_code, "message": str(e)})
-    except Exception as e:
-        logger.error(f"Unexpected signup error: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "INTERNAL_ERROR", "message": "Internal server error"})
-        
+        logger.error("Signup error: %s", e)
+        raise HTTPException(status_code=400, detail=e.detail)
+
     # Авто-вход: создаём сессию для нового пользователя
     try:
-        login_out = _get_service().login(email=data.email, password=data.password, request=request)
+        login_out = await _get_service().login(email=data.email, password=data.password, request=request)
         _set_sid_cookie(response, login_out["session"]["id"])
     except Exception as e:
-        logger.error(f"Auto-login after signup failed for {data.email}: {e}")
+        logger.error("Auto-login after signup failed for %s: %s", data.email, e)
         # Не проваливаем всю регистрацию из-за ошибки авто-входа
-        
+
     user = out["user"]
     return {"user": {"id": user["id"], "email": user["email"]}, "org_id": out["org"]["id"]}
 
 
-@router.post("/auth/login")
-def login(data: LoginRequest, response: Response, request: Request):
+@router.post("/auth/login", response_model=LoginOut)
+async def login(data: LoginRequest, response: Response, request: Request):
     """Аутентификация пользователя и создание сессии."""
     try:
-        out = _get_service().login(email=data.email, password=data.password, request=request)
+        out = await _get_service().login(email=data.email, password=data.password, request=request)
     except InvalidCredentialsError as e:
         # Не логируем детали ошибки на уровне router - это уже делает service
-        raise HTTPException(status_code=401, detail={"error_code": e.error_code, "message": str(e)})
+        raise HTTPException(status_code=401, detail=e.detail)
     except AuthenticationError as e:
-        logger.error(f"Login error: {e}")
-        raise HTTPException(status_code=401, detail={"error_code": e.error_code, "message": str(e)})
-    except Exception as e:
-        logger.error(f"Unexpected login error: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "INTERNAL_ERROR", "message": "Internal server error"})
-        
+        logger.error("Login error: %s", e)
+        raise HTTPException(status_code=401, detail=e.detail)
+
     _set_sid_cookie(response, out["session"]["id"])
     return {"ok": True}
 
 
 @router.post("/auth/logout")
-def logout(response: Response, sid: str = Depends(require_session_id)):
-    """Выход пользователя и удаление сессии."""
-    try:
-        _get_service().logout(sid)
-        # Очищаем cookie после успешного удаления сессии
-        response.delete_cookie(key=COOKIE_NAME, path="/", domain=COOKIE_DOMAIN)
-        return {"ok": True}
-    except Exception as e:
-        logger.error(f"Logout error for session {sid}: {e}")
-        # Даже при ошибке очищаем cookie для безопасности
-        response.delete_cookie(key=COOKIE_NAME, path="/", domain=COOKIE_DOMAIN)
-        raise HTTPException(status_code=500, detail={"error_code": "LOGOUT_ERROR", "message": "Logout failed"})
+async def logout(response: Response, sid: str = Depends(require_session_id)):
+    """Выход пользователя и удаление сессии.
+
+    При ошибке _AuthRoute тоже очищает cookie (см. _ROUTE_ERRORS).
+    """
+    await run_in_threadpool(_get_service().logout, sid)
+    response.delete_cookie(COOKIE_NAME, **_DELETE_COOKIE_KWARGS)
+    return {"ok": True}
 
 
 @router.get("/me", response_model=MeOut)
-def me(sid: str = Depends(require_session_id)):
+async def me(sid: str = Depends(require_session_id), me_info: Optional[Dict] = Depends(_get_me_info)):
     """Получение информации о текущем пользователе."""
-    try:
-        me_info = _get_service().get_me(sid)
-        if not me_info:
-            logger.debug(f"Unauthorized access attempt with session: {sid}")
-            raise HTTPException(status_code=401, detail={"error_code": "UNAUTHORIZED", "message": "Session invalid or expired"})
-            
-        user = me_info["user"]
-        return {
-            "user": {"id": user["id"], "email": user["email"]},
-            "org_id": me_info["org_id"],
-            "role": me_info["role"],
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error retrieving user info for session {sid}: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "INTERNAL_ERROR", "message": "Internal server error"})
+    if not me_info:
+        logger.debug("Unauthorized access attempt with session: %s", sid)
+        raise HTTPException(status_code=401, detail=_UNAUTHORIZED_DETAIL)
+
+    user = me_info["user"]
+    return {
+        "user": {"id": user["id"], "email": user["email"]},
+        "org_id": me_info["org_id"],
+        "role": me_info["role"],
+    }
 
 
 @router.post("/orgs")
-def create_org(name: str, sid: str = Depends(require_session_id)):
+async def create_org(name: str, sid: str = Depends(require_session_id), me_info: Optional[Dict] = Depends(_get_me_info)):
     """Создание новой организации текущим пользователем."""
-    try:
-        me_info = _get_service().get_me(sid)
-        if not me_info:
-            logger.warning(f"Unauthorized org creation attempt with session: {sid}")
-            raise HTTPException(status_code=401, detail={"error_code": "UNAUTHORIZED", "message": "Session invalid or expired"})
-            
-        org = _get_service().create_org(user_id=me_info["user"]["id"], name=name)
-        return {"org_id": org["id"]}
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error creating organization '{name}' for session {sid}: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "ORG_CREATION_ERROR", "message": "Failed to create organization"})
+    if not me_info:
+        logger.warning("Unauthorized org creation attempt with session: %s", sid)
+        raise HTTPException(status_code=401, detail=_UNAUTHORIZED_DETAIL)
+
+    org = await run_in_threadpool(_get_service().create_org, user_id=me_info["user"]["id"], name=name)
+    return {"org_id": org["id"]}
 
 
 # =============================================================================
 # HH.ru OAuth2 интеграция
 # =============================================================================
 
-def _hash_str(s: Optional[str]) -> Optional[str]:
-    """Хеширует строку для безопасного хранения."""
-    if not s:
-        return None
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
-
-
 @router.get("/auth/hh/status")
-def hh_status(sid: str = Depends(require_session_id)):
+def hh_status(sid: str = Depends(require_session_id), me_info: Optional[Dict] = Depends(_get_me_info)):
     """Проверяет статус подключения HH аккаунта текущего пользователя."""
-    try:
-        me_info = _get_service().get_me(sid)
-        if not me_info:
-            raise HTTPException(status_code=401, detail={"error_code": "UNAUTHORIZED", "message": "Session invalid"})
-        
-        user_id = me_info["user"]["id"] 
-        org_id = me_info["org_id"]
-        
-        is_connected = _get_hh_service().is_hh_connected(user_id, org_id)
-        hh_account = _get_hh_service().get_hh_account(user_id, org_id) if is_connected else None
-        
-        result = {
-            "is_connected": is_connected,
-            "expires_in_seconds": hh_account.expires_in_seconds if hh_account else None,
-            "connected_at": hh_account.connected_at if hh_account else None,
-        }
-        
-        logger.info(f"HH status для пользователя {user_id}: connected={is_connected}")
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка проверки HH статуса для сессии {sid}: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "HH_STATUS_ERROR", "message": "Failed to check HH status"})
+    if not me_info:
+        raise HTTPException(status_code=401, detail=_SESSION_INVALID_DETAIL)
+
+    user_id = me_info["user"]["id"]
+    org_id = me_info["org_id"]
+
+    # Один запрос к storage: статус выводим из самого аккаунта
+    hh_account = _get_hh_service().get_hh_account(user_id, org_id)
+    is_connected = hh_account is not None and not hh_account.is_expired
+    if not is_connected:
+        hh_account = None
+
+    result = {
+        "is_connected": is_connected,
+        "expires_in_seconds": hh_account.expires_in_seconds if hh_account else None,
+        "connected_at": hh_account.connected_at if hh_account else None,
+    }
+
+    logger.info("HH status для пользователя %s: connected=%s", user_id, is_connected)
+    return result
 
 
 @router.get("/auth/hh/connect")
-def hh_connect_start(request: Request, sid: str = Depends(require_session_id)):
+def hh_connect_start(request: Request, sid: str = Depends(require_session_id), me_info: Optional[Dict] = Depends(_get_me_info)):
     """Инициирует подключение HH аккаунта к текущему пользователю."""
-    try:
-        me_info = _get_service().get_me(sid)
-        if not me_info:
-            raise HTTPException(status_code=401, detail={"error_code": "UNAUTHORIZED", "message": "Session invalid"})
-        
-        user_id = me_info["user"]["id"]
-        org_id = me_info["org_id"]
-        
-        # Проверяем не подключен ли уже HH
-        if _get_hh_service().is_hh_connected(user_id, org_id):
-            logger.info(f"HH уже подключен для пользователя {user_id}")
-            raise HTTPException(status_code=409, detail={"error_code": "HH_ALREADY_CONNECTED", "message": "HH account already connected"})
-        
-        # Создаем state для OAuth2 с привязкой к пользователю  
-        state = secrets.token_urlsafe(32)
-        
-        # Сохраняем state в БД с TTL
-        ua_hash = _hash_str(request.headers.get("User-Agent"))
-        ip_hash = _hash_str(str(request.client.host) if request.client else None)
-        
-        _get_storage().save_oauth_state(
-            state=state,
-            user_id=user_id,
-            org_id=org_id,
-            session_id=sid,
-            ua_hash=ua_hash,
-            ip_hash=ip_hash,
-            ttl_seconds=600  # 10 минут
-        )
-        
-        # Формируем OAuth2 URL
-        auth_url = (
-            f"https://hh.ru/oauth/authorize?"
-            f"response_type=code&"
-            f"client_id={_get_hh_settings().client_id}&" 
-            f"redirect_uri={_get_hh_settings().redirect_uri}&"
-            f"state={state}"
-        )
-        
-        logger.info(f"Начинаем подключение HH для пользователя {user_id}")
-        return {"auth_url": auth_url, "state": state}
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка инициации подключения HH для сессии {sid}: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "HH_CONNECT_ERROR", "message": "Failed to initiate HH connection"})
+    if not me_info:
+        raise HTTPException(status_code=401, detail=_SESSION_INVALID_DETAIL)
+
+    user_id = me_info["user"]["id"]
+    org_id = me_info["org_id"]
+
+    # Проверяем не подключен ли уже HH
+    if _get_hh_service().is_hh_connected(user_id, org_id):
+        logger.info("HH уже подключен для пользователя %s", user_id)
+        raise HTTPException(status_code=409, detail=_HH_ALREADY_CONNECTED_DETAIL)
+
+    # Создаем state для OAuth2 с привязкой к пользователю
+    state = next_state_token()
+
+    # Сохраняем state с TTL (по умолчанию в памяти процесса, см. providers)
+    ua_hash = hash_str_opt(request.headers.get("User-Agent"))
+    ip_hash = hash_str_opt(str(request.client.host) if request.client else None)
+
+    _get_oauth_states().save_oauth_state(
+        state=state,
+        user_id=user_id,
+        org_id=org_id,
+        session_id=sid,
+        ua_hash=ua_hash,
+        ip_hash=ip_hash,
+        ttl_seconds=600  # 10 минут
+    )
+
+    # Формируем OAuth2 URL: префикс собран в настройках один раз
+    auth_url = get_hh_settings().authorize_url_prefix + state
+
+    logger.info("Начинаем подключение HH для пользователя %s", user_id)
+    return {"auth_url": auth_url, "state": state}
 
 
-@router.get("/auth/hh/callback")  
+@router.get("/auth/hh/callback")
 async def hh_callback(code: str, state: str, request: Request):
     """Обрабатывает callback от HH.ru и привязывает аккаунт к пользователю."""
+    # Проверяем и сразу удаляем state (consume); TTL проверяет хранилище state
+    state_data = await run_in_threadpool(_get_oauth_states().consume_oauth_state, state)
+    if not state_data:
+        logger.warning("Недействительный или устаревший state: %s", state)
+        raise HTTPException(status_code=400, detail=_INVALID_STATE_DETAIL)
+
+    user_id = state_data["user_id"]
+    org_id = state_data["org_id"]
+
+    # Обмениваем код на токены через общую aiohttp-сессию (keep-alive до hh.ru)
+    session = await get_hh_session()
     try:
-        # Проверяем state в БД (автоматически проверяет TTL)
-        state_data = _get_storage().get_oauth_state(state)
-        if not state_data:
-            logger.warning(f"Недействительный или устаревший state: {state}")
-            raise HTTPException(status_code=400, detail={"error_code": "INVALID_STATE", "message": "Invalid or expired state"})
-        
-        # Удаляем использованный state (consume)
-        _get_storage().delete_oauth_state(state)
-        
-        user_id = state_data["user_id"]
-        org_id = state_data["org_id"]
-        
-        # Обмениваем код на токены
-        async with aiohttp.ClientSession() as session:
-            try:
-                tokens = await exchange_code_for_tokens(session, _get_hh_settings(), code)
-                logger.info(f"Токены HH получены для пользователя {user_id}")
-            except Exception as e:
-                logger.error(f"Ошибка обмена кода на токены для пользователя {user_id}: {e}")
-                raise HTTPException(status_code=400, detail={"error_code": "TOKEN_EXCHANGE_FAILED", "message": f"Token exchange failed: {e}"})
-        
-        # Сохраняем HH аккаунт
-        ua_hash = _hash_str(request.headers.get("User-Agent"))
-        ip_hash = _hash_str(str(request.client.host) if request.client else None)
-        
-        _get_hh_service().connect_hh_account(
-            user_id=user_id,
-            org_id=org_id,
-            tokens=tokens,
-            ua_hash=ua_hash,
-            ip_hash=ip_hash
-        )
-        
-        return {"message": "HH account connected successfully", "user_id": user_id}
-        
-    except HTTPException:
-        raise
+        tokens = await exchange_code_for_tokens(session, get_hh_settings(), code)
+        logger.info("Токены HH получены для пользователя %s", user_id)
     except Exception as e:
-        logger.error(f"Ошибка HH callback: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "HH_CALLBACK_ERROR", "message": "HH callback processing failed"})
+        logger.error("Ошибка обмена кода на токены для пользователя %s: %s", user_id, e)
+        raise HTTPException(status_code=400, detail={"error_code": "TOKEN_EXCHANGE_FAILED", "message": f"Token exchange failed: {e}"})
+
+    # Сохраняем HH аккаунт
+    ua_hash = hash_str_opt(request.headers.get("User-Agent"))
+    ip_hash = hash_str_opt(str(request.client.host) if request.client else None)
+
+    await run_in_threadpool(
+        _get_hh_service().connect_hh_account,
+        user_id=user_id,
+        org_id=org_id,
+        tokens=tokens,
+        ua_hash=ua_hash,
+        ip_hash=ip_hash
+    )
+
+    return {"message": "HH account connected successfully", "user_id": user_id}
 
 
 @router.post("/auth/hh/disconnect")
-def hh_disconnect(sid: str = Depends(require_session_id)):
+def hh_disconnect(sid: str = Depends(require_session_id), me_info: Optional[Dict] = Depends(_get_me_info)):
     """Отключает HH аккаунт от текущего пользователя."""
-    try:
-        me_info = _get_service().get_me(sid)
-        if not me_info:
-            raise HTTPException(status_code=401, detail={"error_code": "UNAUTHORIZED", "message": "Session invalid"})
-        
-        user_id = me_info["user"]["id"]
-        org_id = me_info["org_id"] 
-        
-        success = _get_hh_service().disconnect_hh_account(user_id, org_id)
-        
-        if success:
-            logger.info(f"HH аккаунт отключен для пользователя {user_id}")
-            return {"message": "HH account disconnected successfully"}
-        else:
-            raise HTTPException(status_code=404, detail={"error_code": "HH_NOT_CONNECTED", "message": "HH account was not connected"})
-            
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Ошибка отключения HH для сессии {sid}: {e}")
-        raise HTTPException(status_code=500, detail={"error_code": "HH_DISCONNECT_ERROR", "message": "Failed to disconnect HH account"})
+    if not me_info:
+        raise HTTPException(status_code=401, detail=_SESSION_INVALID_DETAIL)
+
+    user_id = me_info["user"]["id"]
+    org_id = me_info["org_id"]
+
+    if not _get_hh_service().disconnect_hh_account(user_id, org_id):
+        raise HTTPException(status_code=404, detail=_HH_NOT_CONNECTED_DETAIL)
 
+    logger.info("HH аккаунт отключен для пользователя %s", user_id)
+    return {"message": "HH account disconnected successfully"}
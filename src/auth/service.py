@@ -5,23 +5,25 @@
 # contract: Бизнес-логика регистрации, входа, сессий и орг
 # last_reviewed: 2025-08-21
 # interfaces:
-#   - signup(email, password, org_name?) -> dict
-#   - login(email, password, request) -> dict
+#   - async signup(email, password, org_name?) -> dict
+#   - async login(email, password, request) -> dict
 #   - logout(session_id) -> None
 #   - get_me(session_id) -> dict | None
 #   - create_org(user_id, name) -> dict
 # --- /agent_meta ---
 
-import hashlib
 import os
 import time
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
 
 from src.utils import get_logger
-from .crypto import hash_password, verify_password
+from . import session_cache
+from .crypto import ahash_password, averify_dummy, averify_password, needs_rehash
 from .exceptions import InvalidCredentialsError, UserExistsError
+from .hashing import hash_str_opt
 from .storage import AuthStorage
 
 
@@ -31,12 +33,6 @@ SESSION_TTL_SEC = int(os.getenv("AUTH_SESSION_TTL_SEC", "604800"))  # 7 дней
 logger = get_logger("auth.service")
 
 
-def _hash_str(s: Optional[str]) -> Optional[str]:
-    if not s:
-        return None
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
-
-
 class AuthService:
     """Сервис аутентификации и управления пользователями.
     
@@ -47,8 +43,12 @@ class AuthService:
     def __init__(self, storage: AuthStorage) -> None:
         self.storage = storage
 
+    # Async-методы не ходят в SQLite из event loop: синхронные обращения к storage
+    # сгруппированы в хелперы и уходят в threadpool одним прыжком,
+    # хеширование паролей - в отдельный executor из crypto.
+
     # Users / auth
-    def signup(self, email: str, password: str, org_name: Optional[str] = None) -> Dict:
+    async def signup(self, email: str, password: str, org_name: Optional[str] = None) -> Dict:
         """Регистрация нового пользователя с автоматическим созданием организации.
         
         Args:
@@ -62,22 +62,22 @@ class AuthService:
         Raises:
             UserExistsError: Если пользователь с таким email уже существует
         """
-        logger.info(f"Signup attempt for email: {email}")
+        logger.info("Signup attempt for email: %s", email)
         
-        existing = self.storage.get_user_by_email(email)
+        existing = await run_in_threadpool(self.storage.get_user_by_email, email)
         if existing:
-            logger.warning(f"Signup failed - user already exists: {email}")
+            logger.warning("Signup failed - user already exists: %s", email)
             raise UserExistsError(email)
             
-        pwd_hash = hash_password(password)
-        user = self.storage.create_user(email=email, password_hash=pwd_hash)
-        org = self.storage.create_org(org_name or f"Org of {email}")
-        self.storage.create_membership(user_id=user["id"], org_id=org["id"], role="org_admin")
+        pwd_hash = await ahash_password(password)
+        user, org = await run_in_threadpool(
+            self.storage.create_user_with_org, email, pwd_hash, org_name or f"Org of {email}"
+        )
         
-        logger.info(f"User successfully registered: {email}, user_id: {user['id']}, org_id: {org['id']}")
+        logger.info("User successfully registered: %s, user_id: %s, org_id: %s", email, user['id'], org['id'])
         return {"user": user, "org": org}
 
-    def login(self, email: str, password: str, request: Request) -> Dict:
+    async def login(self, email: str, password: str, request: Request) -> Dict:
         """Аутентификация пользователя и создание новой сессии.
         
         Args:
@@ -94,38 +94,60 @@ class AuthService:
         ua = request.headers.get("user-agent", "")
         ip = request.client.host if request.client else "unknown"
         
-        logger.info(f"Login attempt for email: {email}, ip: {ip}")
+        logger.info("Login attempt for email: %s, ip: %s", email, ip)
         
-        user = self.storage.get_user_by_email(email)
-        if not user or not verify_password(password, user["password_hash"]):
-            logger.warning(f"Login failed - invalid credentials for email: {email}, ip: {ip}")
+        user = await run_in_threadpool(self.storage.get_user_by_email, email)
+        # Неизвестный email тоже проходит один полный KDF (холостая проверка в пуле):
+        # по времени ответа нельзя узнать, зарегистрирован ли адрес
+        if not user:
+            await averify_dummy(password)
+        if not user or not await averify_password(password, user["password_hash"]):
+            logger.warning("Login failed - invalid credentials for email: %s, ip: %s", email, ip)
             raise InvalidCredentialsError(email)
-            
-        # Выбираем первую активную membership как текущую организацию.
-        # Это упрощенная логика для MVP - в будущем можно добавить выбор организации при логине.
-        memberships = self.storage.get_memberships_for_user(user["id"]) or []
-        if not memberships:
-            # Fallback: создать дефолтную организацию, если у пользователя нет членства
-            # (это может произойти при миграции данных или удалении организаций)
-            logger.info(f"Creating fallback organization for user: {user['email']}")
-            org = self.storage.create_org(f"Org of {user['email']}")
-            self.storage.create_membership(user_id=user["id"], org_id=org["id"], role="org_admin")
-            org_id = org["id"]
-        else:
-            org_id = memberships[0]["org_id"]
-
-        now = time.time()
-        session = self.storage.create_session(
-            user_id=user["id"],
-            org_id=org_id,
-            expires_at=now + SESSION_TTL_SEC,
-            ua_hash=_hash_str(ua),
-            ip_hash=_hash_str(ip),
-        )
         
-        logger.info(f"User successfully logged in: {email}, user_id: {user['id']}, session_id: {session['id']}, ip: {ip}")
+        # Прозрачная миграция legacy scrypt-хешей на argon2id при успешном входе
+        new_hash = await ahash_password(password) if needs_rehash(user["password_hash"]) else None
+        session, org_id = await run_in_threadpool(self._open_session, user, new_hash, ua, ip)
+        
+        logger.info("User successfully logged in: %s, user_id: %s, session_id: %s, ip: %s", email, user['id'], session['id'], ip)
         return {"session": session, "user": user, "org_id": org_id}
 
+    def _open_session(self, user: Dict, new_hash: Optional[str], ua: str, ip: str) -> Tuple[Dict, str]:
+        """Записи в storage после проверки пароля (синхронно, для threadpool).
+
+        Обновляет legacy-хеш, выбирает организацию и создает сессию
+        в одной транзакции storage.
+
+        Returns:
+            Кортеж (сессия, org_id)
+        """
+        with self.storage.transaction():
+            if new_hash is not None:
+                self.storage.update_user_password_hash(user["id"], new_hash)
+                logger.info("Password hash upgraded for user_id: %s", user['id'])
+
+            # Выбираем первую активную membership как текущую организацию.
+            # Это упрощенная логика для MVP - в будущем можно добавить выбор организации при логине.
+            memberships = self.storage.get_memberships_for_user(user["id"]) or []
+            if not memberships:
+                # Fallback: создать дефолтную организацию, если у пользователя нет членства
+                # (это может произойти при миграции данных или удалении организаций)
+                logger.info("Creating fallback organization for user: %s", user['email'])
+                org = self.storage.create_org_with_membership(user["id"], f"Org of {user['email']}")
+                org_id = org["id"]
+            else:
+                org_id = memberships[0]["org_id"]
+
+            now = time.time()
+            session = self.storage.create_session(
+                user_id=user["id"],
+                org_id=org_id,
+                expires_at=now + SESSION_TTL_SEC,
+                ua_hash=hash_str_opt(ua),
+                ip_hash=hash_str_opt(ip),
+            )
+        return session, org_id
+
     def logout(self, session_id: str) -> None:
         """Завершение пользовательской сессии.
         
@@ -133,43 +155,48 @@ class AuthService:
             session_id: Идентификатор сессии для удаления
         """
         # Получаем информацию о сессии перед удалением для логирования
-        session = self.storage.get_session(session_id)
+        session = self.storage.get_session_raw(session_id)
         if session:
-            logger.info(f"User logged out: user_id: {session['user_id']}, session_id: {session_id}")
+            logger.info("User logged out: user_id: %s, session_id: %s", session['user_id'], session_id)
         
         self.storage.delete_session(session_id)
+        session_cache.invalidate(session_id)
 
     # Me
     def get_me(self, session_id: str) -> Optional[Dict]:
         """Получение информации о текущем пользователе по сессии.
         
+        Результат кешируется в session_cache на короткий TTL;
+        logout сбрасывает запись.
+        
         Args:
             session_id: Идентификатор активной сессии
             
         Returns:
             Словарь с данными пользователя, организации и роли или None
         """
-        sess = self.storage.get_session(session_id)
+        cached = session_cache.get_me(session_id)
+        if cached is not None:
+            return cached
+
+        now = time.time()
+        # Срок проверяется в SQL: истекшая сессия не найдется, ее строку удалит
+        # фоновая чистка (janitor) - путь чтения не пишет в БД
+        sess = self.storage.get_session(session_id, now)
         if not sess:
-            logger.debug(f"Session not found: {session_id}")
-            return None
-            
-        if sess["expires_at"] < time.time():
-            logger.info(f"Session expired and removed: {session_id}, user_id: {sess['user_id']}")
-            self.storage.delete_session(session_id)
+            logger.debug("Session not found or expired: %s", session_id)
             return None
-            
+
         user = self.storage.get_user_by_id(sess["user_id"]) or {}
         
-        # Определяем роль пользователя в текущей организации из таблицы memberships
-        memberships = self.storage.get_memberships_for_user(sess["user_id"]) or []
-        role = "viewer"  # роль по умолчанию
-        for m in memberships:
-            if m["org_id"] == sess["org_id"]:
-                role = m["role"]
-                break
+        # Роль пользователя в организации сессии: одна строка по PK memberships
+        membership = self.storage.get_membership(sess["user_id"], sess["org_id"])
+        role = membership["role"] if membership else "viewer"  # viewer - роль по умолчанию
                 
-        return {"user": user, "org_id": sess["org_id"], "role": role}
+        me_info = {"user": user, "org_id": sess["org_id"], "role": role}
+        # Серии запросов одной сессии в пределах TTL обходятся без трех SELECT
+        session_cache.put_me(session_id, me_info, sess["expires_at"], now)
+        return me_info
 
     # Orgs
     def create_org(self, user_id: str, name: str) -> Dict:
@@ -182,9 +209,8 @@ class AuthService:
         Returns:
             Словарь с данными созданной организации
         """
-        org = self.storage.create_org(name)
-        self.storage.create_membership(user_id=user_id, org_id=org["id"], role="org_admin")
+        org = self.storage.create_org_with_membership(user_id, name)
         
-        logger.info(f"Organization created: {name}, org_id: {org['id']}, created_by: {user_id}")
+        logger.info("Organization created: %s, org_id: %s, created_by: %s", name, org['id'], user_id)
         return org
 
@@ -0,0 +1,151 @@
+# src/auth/session_cache.py
+# --- agent_meta ---
+# role: auth-session-cache
+# owner: @backend
+# contract: In-process TTL/LRU кеш me_info и (me_info, HH аккаунт) по session_id для горячих auth путей
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - get(session_id) -> tuple[dict, HHAccountInfo] | None
+#   - put(session_id, me_info, hh_account, now?) -> None
+#   - get_me(session_id) -> dict | None
+#   - put_me(session_id, me_info, session_expires_at, now?) -> None
+#   - invalidate(session_id) -> None
+#   - invalidate_user(user_id) -> None
+# --- /agent_meta ---
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Generic, Optional, Set, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from .hh_service import HHAccountInfo
+
+
+# Короткий TTL: кеш лишь схлопывает серии запросов одной сессии, 0 - отключить
+SESSION_CACHE_TTL_SEC = float(os.getenv("AUTH_SESSION_CACHE_TTL_SEC", "15"))
+SESSION_CACHE_SIZE = 4096
+
+_V = TypeVar("_V")
+
+
+class _TTLCache(Generic[_V]):
+    """TTL/LRU словарь session_id -> значение с user_id владельца.
+
+    Индекс user_id -> session_id держит pop_user пропорциональным числу
+    сессий пользователя, а не размеру кеша. Зависимости middleware
+    выполняются в threadpool FastAPI, поэтому операции идут под
+    threading.Lock экземпляра.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, str, _V]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id: str) -> None:
+        """Удаляет запись и ее session_id из индекса; вызывается под lock."""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        sessions = self._by_user.get(entry[1])
+        if sessions is not None:
+            sessions.discard(session_id)
+            if not sessions:
+                del self._by_user[entry[1]]
+
+    def get(self, session_id: str) -> Optional[_V]:
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry[0]:
+                self._drop(session_id)
+                return None
+            self._entries.move_to_end(session_id)
+            return entry[2]
+
+    def put(self, session_id: str, user_id: str, value: _V, ttl: float) -> None:
+        with self._lock:
+            # Сессия могла сменить владельца (повторный put) - снимаем старую привязку
+            self._drop(session_id)
+            self._entries[session_id] = (time.monotonic() + ttl, user_id, value)
+            self._by_user.setdefault(user_id, set()).add(session_id)
+            if len(self._entries) > self._maxsize:
+                self._drop(next(iter(self._entries)))
+
+    def pop(self, session_id: str) -> None:
+        with self._lock:
+            self._drop(session_id)
+
+    def pop_user(self, user_id: str) -> None:
+        with self._lock:
+            for sid in self._by_user.pop(user_id, ()):
+                self._entries.pop(sid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+
+# (me_info, HH аккаунт) для HH middleware
+_cache: "_TTLCache[Tuple[Dict[str, Any], HHAccountInfo]]" = _TTLCache(SESSION_CACHE_SIZE)
+# Отдельно - только me_info (AuthService.get_me): для сессий без HH аккаунта
+_me_cache: "_TTLCache[Dict[str, Any]]" = _TTLCache(SESSION_CACHE_SIZE)
+
+
+def get(session_id: str) -> Optional[Tuple[Dict[str, Any], "HHAccountInfo"]]:
+    """Возвращает (me_info, hh_account) из кеша или None при промахе/истечении."""
+    return _cache.get(session_id)
+
+
+def put(
+    session_id: str,
+    me_info: Dict[str, Any],
+    hh_account: "HHAccountInfo",
+    now: Optional[float] = None,
+) -> None:
+    """Кладет результат проверки в кеш.
+
+    Время жизни записи не превышает SESSION_CACHE_TTL_SEC и момента,
+    когда hh_account станет is_expired. now - уже снятое вызывающим time.time().
+    """
+    if now is None:
+        now = time.time()
+    ttl = min(SESSION_CACHE_TTL_SEC, hh_account.valid_for_at(now))
+    if ttl > 0:
+        _cache.put(session_id, me_info["user"]["id"], (me_info, hh_account), ttl)
+
+
+def get_me(session_id: str) -> Optional[Dict[str, Any]]:
+    """Возвращает me_info сессии из кеша или None при промахе/истечении."""
+    return _me_cache.get(session_id)
+
+
+def put_me(
+    session_id: str,
+    me_info: Dict[str, Any],
+    session_expires_at: float,
+    now: Optional[float] = None,
+) -> None:
+    """Кладет me_info в кеш не дольше SESSION_CACHE_TTL_SEC и срока самой сессии."""
+    if now is None:
+        now = time.time()
+    ttl = min(SESSION_CACHE_TTL_SEC, session_expires_at - now)
+    if ttl > 0:
+        _me_cache.put(session_id, me_info["user"]["id"], me_info, ttl)
+
+
+def invalidate(session_id: str) -> None:
+    """Удаляет записи сессии (logout)."""
+    _cache.pop(session_id)
+    _me_cache.pop(session_id)
+
+
+def invalidate_user(user_id: str) -> None:
+    """Удаляет все записи пользователя (подключение/отключение HH, обновление токенов)."""
+    _cache.pop_user(user_id)
+    _me_cache.pop_user(user_id)
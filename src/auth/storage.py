@@ -3,159 +3,189 @@
 # role: auth-storage
 # owner: @backend
 # contract: SQLite-хранилище для пользователей, организаций, членств, сессий и HH аккаунтов
-# last_reviewed: 2025-08-23
+#           (HH аккаунты и OAuth state - в storage_hh/storage_oauth, соединения - в storage_base)
+# last_reviewed: 2025-08-24
 # interfaces:
+#   - AuthStorage.transaction() -> ContextManager[sqlite3.Connection]
 #   - AuthStorage.create_user(email, password_hash) -> dict
-#   - AuthStorage.get_user_by_email(email) -> dict | None
-#   - AuthStorage.get_user_by_id(user_id) -> dict | None
+#   - AuthStorage.get_user_by_email(email) -> Mapping | None
+#   - AuthStorage.get_user_by_id(user_id) -> Mapping | None
+#   - AuthStorage.update_user_password_hash(user_id, password_hash) -> None
 #   - AuthStorage.create_org(name) -> dict
 #   - AuthStorage.create_membership(user_id, org_id, role, status)
-#   - AuthStorage.get_memberships_for_user(user_id) -> list[dict]
+#   - AuthStorage.create_org_with_membership(user_id, name, role) -> dict
+#   - AuthStorage.create_user_with_org(email, password_hash, org_name) -> tuple[dict, dict]
+#   - AuthStorage.get_memberships_for_user(user_id) -> list[Mapping]
+#   - AuthStorage.get_membership(user_id, org_id) -> Mapping | None
 #   - AuthStorage.create_session(user_id, org_id, expires_at, ua_hash, ip_hash) -> dict
-#   - AuthStorage.get_session(session_id) -> dict | None
+#   - AuthStorage.get_session(session_id, now?) -> Mapping | None (только действующая)
+#   - AuthStorage.get_session_raw(session_id) -> Mapping | None
 #   - AuthStorage.delete_session(session_id) -> None
-#   - AuthStorage.save_hh_account(user_id, org_id, tokens...) -> None
-#   - AuthStorage.get_hh_account(user_id, org_id) -> dict | None
-#   - AuthStorage.delete_hh_account(user_id, org_id) -> None
-#   - AuthStorage.list_hh_accounts(org_id?) -> list[dict]
-#   - AuthStorage.update_hh_tokens(user_id, org_id, tokens...) -> bool
+#   - AuthStorage.delete_expired_sessions(now?) -> int
+#   - AuthStorage.*_hh_account* / update_hh_tokens (см. storage_hh.HHAccountsMixin)
+#   - AuthStorage.*_oauth_state* (см. storage_oauth.OAuthStatesMixin)
 # --- /agent_meta ---
 
-import os
-import sqlite3
 import time
 import uuid
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
+from .storage_base import _writer
+from .storage_hh import HHAccountsMixin
+from .storage_oauth import OAuthStatesMixin
 
-class AuthStorage:
+
+# SQL горячих запросов - константы модуля: текст не пересобирается на каждый вызов,
+# а повторное выполнение попадает в кеш подготовленных выражений соединения
+_SQL_INSERT_USER = "INSERT INTO users (id, email, password_hash, created_at) VALUES (?, ?, ?, ?)"
+_SQL_GET_USER_BY_EMAIL = "SELECT id, email, password_hash, created_at FROM users WHERE email = ?"
+_SQL_GET_USER_BY_ID = "SELECT id, email, password_hash, created_at FROM users WHERE id = ?"
+_SQL_UPDATE_PASSWORD_HASH = "UPDATE users SET password_hash = ? WHERE id = ?"
+
+_SQL_INSERT_ORG = "INSERT INTO organizations (id, name, created_at) VALUES (?, ?, ?)"
+# UPSERT вместо INSERT OR REPLACE: существующая строка обновляется на месте,
+# без DELETE + INSERT (перезаписи всех индексов и каскадов ON DELETE)
+_SQL_UPSERT_MEMBERSHIP = (
+    "INSERT INTO memberships (user_id, org_id, role, status) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(user_id, org_id) DO UPDATE SET role = excluded.role, status = excluded.status"
+)
+_SQL_GET_MEMBERSHIPS = "SELECT user_id, org_id, role, status FROM memberships WHERE user_id = ?"
+_SQL_GET_MEMBERSHIP = "SELECT role, status FROM memberships WHERE user_id = ? AND org_id = ?"
+
+_SQL_INSERT_SESSION = (
+    "INSERT INTO auth_sessions (id, user_id, org_id, expires_at, ua_hash, ip_hash) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+_SQL_GET_SESSION_RAW = "SELECT id, user_id, org_id, expires_at, ua_hash, ip_hash FROM auth_sessions WHERE id = ?"
+_SQL_GET_SESSION = _SQL_GET_SESSION_RAW + " AND expires_at > ?"
+_SQL_DELETE_SESSION = "DELETE FROM auth_sessions WHERE id = ?"
+_SQL_DELETE_EXPIRED_SESSIONS = "DELETE FROM auth_sessions WHERE expires_at < ?"
+
+
+
+# Схема целиком: executescript разбирает ее за один вызов, BEGIN/COMMIT
+# делают создание таблиц и индексов одной транзакцией (один fsync)
+_SCHEMA_SQL = """
+BEGIN;
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT PRIMARY KEY,
+    email TEXT UNIQUE NOT NULL COLLATE NOCASE,
+    password_hash TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS organizations (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memberships (
+    user_id TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    status TEXT NOT NULL,
+    PRIMARY KEY (user_id, org_id),
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS auth_sessions (
+    id TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    ua_hash TEXT,
+    ip_hash TEXT,
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS oauth_states (
+    state TEXT PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    ua_hash TEXT,
+    ip_hash TEXT,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hh_accounts (
+    user_id TEXT NOT NULL,
+    org_id TEXT NOT NULL,
+    access_token TEXT NOT NULL,
+    refresh_token TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    scopes TEXT,
+    connected_at REAL NOT NULL,
+    ua_hash TEXT,
+    ip_hash TEXT,
+    PRIMARY KEY(user_id, org_id),
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
+);
+-- Вторичные индексы сессий: отзыв сессий пользователя и чистка истекших.
+-- memberships(user_id) отдельно не индексируем - это левая часть PK.
+CREATE INDEX IF NOT EXISTS idx_sessions_user ON auth_sessions(user_id);
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON auth_sessions(expires_at);
+-- Чистка истекших OAuth states - по диапазону expires_at, без полного скана
+CREATE INDEX IF NOT EXISTS idx_oauth_expires ON oauth_states(expires_at);
+-- list_hh_accounts(org_id): фильтр и сортировка берутся из одного индекса
+CREATE INDEX IF NOT EXISTS idx_hh_org_connected ON hh_accounts(org_id, connected_at DESC);
+-- memberships(org_id) не индексируем: запросов по org_id без user_id нет,
+-- а foreign_keys (каскадное удаление) в соединениях не включены
+COMMIT;
+"""
+
+
+class AuthStorage(HHAccountsMixin, OAuthStatesMixin):
     """Слой доступа к данным для системы аутентификации.
     
     Отвечает за хранение и извлечение данных о пользователях, организациях,
-    членствах и сессиях в SQLite базе данных.
+    членствах и сессиях в SQLite базе данных. Методы hh_accounts и
+    oauth_states подмешиваются из storage_hh и storage_oauth; соединения,
+    write-lock и transaction() - из storage_base.StorageBase.
     
     Использует простую реляционную модель для MVP.
+    
+    Горячие чтения (пользователь, сессия, членства) возвращают sqlite3.Row
+    как есть: доступ по имени столбца без копирования в dict. Вызывающему,
+    которому нужен изменяемый словарь, - dict(row).
     """
     def __init__(self, db_path: Optional[str] = None) -> None:
-        self._db_path = db_path or os.getenv("WEBAPP_DB_PATH", "app.sqlite3")
-        
-        # Отключаем check_same_thread=False для возможности использования в FastAPI,
-        # где запросы могут выполняться в разных потоках.
-        # Однако это ответственность приложения - обеспечить потокобезопасность.
-        self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
-        
-        # Настраиваем row_factory для удобного доступа к столбцам по именам
-        self._conn.row_factory = sqlite3.Row
+        super().__init__(db_path)
         self._init_schema()
 
     def _init_schema(self) -> None:
         """Инициализация схемы базы данных для аутентификации.
         
-        Создает таблицы, если они еще не существуют.
-        Использует CREATE TABLE IF NOT EXISTS для безопасности.
+        Создает таблицы и индексы, если они еще не существуют
+        (CREATE ... IF NOT EXISTS), одним скриптом в одной транзакции.
         """
-        cur = self._conn.cursor()
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-                id TEXT PRIMARY KEY,
-                email TEXT UNIQUE NOT NULL,
-                password_hash TEXT NOT NULL,
-                created_at REAL NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS organizations (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                created_at REAL NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS memberships (
-                user_id TEXT NOT NULL,
-                org_id TEXT NOT NULL,
-                role TEXT NOT NULL,
-                status TEXT NOT NULL,
-                PRIMARY KEY (user_id, org_id),
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS auth_sessions (
-                id TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                org_id TEXT NOT NULL,
-                expires_at REAL NOT NULL,
-                ua_hash TEXT,
-                ip_hash TEXT,
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS oauth_states (
-                state TEXT PRIMARY KEY,
-                user_id TEXT NOT NULL,
-                org_id TEXT NOT NULL,
-                session_id TEXT NOT NULL,
-                created_at REAL NOT NULL,
-                ua_hash TEXT,
-                ip_hash TEXT,
-                expires_at REAL NOT NULL
-            )
-            """
-        )
-        cur.execute(
-            """
-            CREATE TABLE IF NOT EXISTS hh_accounts (
-                user_id TEXT NOT NULL,
-                org_id TEXT NOT NULL,
-                access_token TEXT NOT NULL,
-                refresh_token TEXT NOT NULL,
-                expires_at REAL NOT NULL,
-                scopes TEXT,
-                connected_at REAL NOT NULL,
-                ua_hash TEXT,
-                ip_hash TEXT,
-                PRIMARY KEY(user_id, org_id),
-                FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE,
-                FOREIGN KEY(org_id) REFERENCES organizations(id) ON DELETE CASCADE
-            )
-            """
-        )
-        self._conn.commit()
+        self._conn.executescript(_SCHEMA_SQL)
+        # Обновляет статистику планировщика только там, где она устарела
+        self._conn.execute("PRAGMA optimize")
 
     # Users
+    @_writer
     def create_user(self, email: str, password_hash: str) -> Dict[str, Any]:
         """Создание нового пользователя в базе данных.
         
         Args:
-            email: Нормализованный email пользователя
-            password_hash: Хеш пароля в формате scrypt
+            email: Email пользователя (нормализуется в lowercase)
+            password_hash: Хеш пароля (argon2id PHC или legacy scrypt)
             
         Returns:
             Словарь с данными созданного пользователя
         """
         user_id = str(uuid.uuid4())
+        email = email.lower()
         now = time.time()
         self._conn.execute(
-            "INSERT INTO users (id, email, password_hash, created_at) VALUES (?, ?, ?, ?)",
-            (user_id, email.lower(), password_hash, now),
+            _SQL_INSERT_USER,
+            (user_id, email, password_hash, now),
         )
-        self._conn.commit()
-        return {"id": user_id, "email": email.lower(), "created_at": now}
+        self._commit()
+        return {"id": user_id, "email": email, "created_at": now}
 
-    def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+    def get_user_by_email(self, email: str) -> Optional[Mapping[str, Any]]:
         """Поиск пользователя по email.
         
         Args:
@@ -164,48 +194,117 @@ class AuthStorage:
         Returns:
             Словарь с данными пользователя или None, если не найден
         """
+        # lower() нужен и при COLLATE NOCASE: в БД, созданных до него,
+        # колонка users.email сравнивается с учетом регистра
         cur = self._conn.execute(
-            "SELECT id, email, password_hash, created_at FROM users WHERE email = ?",
+            _SQL_GET_USER_BY_EMAIL,
             (email.lower(),),
         )
-        row = cur.fetchone()
-        return dict(row) if row else None
+        return cur.fetchone()
 
-    def get_user_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
+    def get_user_by_id(self, user_id: str) -> Optional[Mapping[str, Any]]:
+        # Строку пользователя для get_me кеширует session_cache, здесь - всегда БД
         cur = self._conn.execute(
-            "SELECT id, email, password_hash, created_at FROM users WHERE id = ?",
+            _SQL_GET_USER_BY_ID,
             (user_id,),
         )
-        row = cur.fetchone()
-        return dict(row) if row else None
+        return cur.fetchone()
+
+    @_writer
+    def update_user_password_hash(self, user_id: str, password_hash: str) -> None:
+        """Обновляет хеш пароля пользователя (перехеширование при входе)."""
+        self._conn.execute(
+            _SQL_UPDATE_PASSWORD_HASH,
+            (password_hash, user_id),
+        )
+        self._commit()
 
     # Orgs
+    @_writer
     def create_org(self, name: str) -> Dict[str, Any]:
         org_id = str(uuid.uuid4())
         now = time.time()
         self._conn.execute(
-            "INSERT INTO organizations (id, name, created_at) VALUES (?, ?, ?)",
+            _SQL_INSERT_ORG,
             (org_id, name, now),
         )
-        self._conn.commit()
+        self._commit()
         return {"id": org_id, "name": name, "created_at": now}
 
     # Memberships
+    @_writer
     def create_membership(self, user_id: str, org_id: str, role: str, status: str = "active") -> None:
         self._conn.execute(
-            "INSERT OR REPLACE INTO memberships (user_id, org_id, role, status) VALUES (?, ?, ?, ?)",
+            _SQL_UPSERT_MEMBERSHIP,
             (user_id, org_id, role, status),
         )
-        self._conn.commit()
+        self._commit()
+
+    # Составные записи: несколько INSERT в одной транзакции - один commit вместо трех
+    def create_org_with_membership(self, user_id: str, name: str, role: str = "org_admin") -> Dict[str, Any]:
+        """Создает организацию и membership пользователя в ней одной транзакцией.
+        
+        Returns:
+            Словарь с данными созданной организации
+        """
+        org_id = str(uuid.uuid4())
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                _SQL_INSERT_ORG,
+                (org_id, name, now),
+            )
+            conn.execute(
+                _SQL_UPSERT_MEMBERSHIP,
+                (user_id, org_id, role, "active"),
+            )
+        return {"id": org_id, "name": name, "created_at": now}
+
+    def create_user_with_org(
+        self, email: str, password_hash: str, org_name: str
+    ) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Регистрирует пользователя с его организацией (org_admin) одной транзакцией.
+        
+        При ошибке любого INSERT (например, занятый email) не остается
+        ни пользователя без организации, ни пустой организации.
+        
+        Returns:
+            Кортеж (пользователь, организация)
+        """
+        user_id = str(uuid.uuid4())
+        org_id = str(uuid.uuid4())
+        email = email.lower()
+        now = time.time()
+        with self.transaction() as conn:
+            conn.execute(
+                _SQL_INSERT_USER,
+                (user_id, email, password_hash, now),
+            )
+            conn.execute(
+                _SQL_INSERT_ORG,
+                (org_id, org_name, now),
+            )
+            conn.execute(
+                _SQL_UPSERT_MEMBERSHIP,
+                (user_id, org_id, "org_admin", "active"),
+            )
+        user = {"id": user_id, "email": email, "created_at": now}
+        org = {"id": org_id, "name": org_name, "created_at": now}
+        return user, org
 
-    def get_memberships_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_memberships_for_user(self, user_id: str) -> List[Mapping[str, Any]]:
         cur = self._conn.execute(
-            "SELECT user_id, org_id, role, status FROM memberships WHERE user_id = ?",
+            _SQL_GET_MEMBERSHIPS,
             (user_id,),
         )
-        return [dict(r) for r in cur.fetchall()]
+        return cur.fetchall()
+
+    def get_membership(self, user_id: str, org_id: str) -> Optional[Mapping[str, Any]]:
+        """Членство пользователя в одной организации (точечный поиск по PK)."""
+        return self._conn.execute(_SQL_GET_MEMBERSHIP, (user_id, org_id)).fetchone()
 
     # Sessions
+    @_writer
     def create_session(
         self,
         user_id: str,
@@ -228,210 +327,40 @@ class AuthStorage:
         """
         sid = str(uuid.uuid4())
         self._conn.execute(
-            "INSERT INTO auth_sessions (id, user_id, org_id, expires_at, ua_hash, ip_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            _SQL_INSERT_SESSION,
             (sid, user_id, org_id, expires_at, ua_hash, ip_hash),
         )
-        self._conn.commit()
+        self._commit()
         return {"id": sid, "user_id": user_id, "org_id": org_id, "expires_at": expires_at}
 
-    def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+    def get_session(self, session_id: str, now: Optional[float] = None) -> Optional[Mapping[str, Any]]:
+        """Действующая сессия по id; истекшая отсекается в SQL и дает None."""
         cur = self._conn.execute(
-            "SELECT id, user_id, org_id, expires_at, ua_hash, ip_hash FROM auth_sessions WHERE id = ?",
-            (session_id,),
+            _SQL_GET_SESSION,
+            (session_id, now if now is not None else time.time()),
         )
-        row = cur.fetchone()
-        return dict(row) if row else None
+        return cur.fetchone()
 
-    def delete_session(self, session_id: str) -> None:
-        self._conn.execute("DELETE FROM auth_sessions WHERE id = ?", (session_id,))
-        self._conn.commit()
-
-    # HH Accounts (интеграция с hh_accounts таблицей)
-    def save_hh_account(
-        self,
-        user_id: str,
-        org_id: str,
-        access_token: str,
-        refresh_token: str,
-        expires_at: float,
-        scopes: Optional[str] = None,
-        connected_at: Optional[float] = None,
-        ua_hash: Optional[str] = None,
-        ip_hash: Optional[str] = None,
-    ) -> None:
-        """Сохраняет HH аккаунт пользователя (INSERT OR REPLACE)."""
-        self._conn.execute(
-            """
-            INSERT OR REPLACE INTO hh_accounts 
-            (user_id, org_id, access_token, refresh_token, expires_at, scopes, connected_at, ua_hash, ip_hash)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (user_id, org_id, access_token, refresh_token, expires_at, scopes, connected_at, ua_hash, ip_hash),
-        )
-        self._conn.commit()
-
-    def get_hh_account(self, user_id: str, org_id: str) -> Optional[Dict[str, Any]]:
-        """Получает HH аккаунт пользователя по user_id + org_id."""
+    def get_session_raw(self, session_id: str) -> Optional[Mapping[str, Any]]:
+        """Сессия по id без проверки срока (логирование, отладка)."""
         cur = self._conn.execute(
-            """
-            SELECT user_id, org_id, access_token, refresh_token, expires_at, 
-                   scopes, connected_at, ua_hash, ip_hash 
-            FROM hh_accounts 
-            WHERE user_id = ? AND org_id = ?
-            """,
-            (user_id, org_id),
-        )
-        row = cur.fetchone()
-        return dict(row) if row else None
-
-    def delete_hh_account(self, user_id: str, org_id: str) -> None:
-        """Удаляет HH аккаунт пользователя."""
-        self._conn.execute(
-            "DELETE FROM hh_accounts WHERE user_id = ? AND org_id = ?",
-            (user_id, org_id),
-        )
-        self._conn.commit()
-
-    def list_hh_accounts(self, org_id: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Возвращает список всех HH аккаунтов (с фильтром по организации)."""
-        if org_id:
-            cur = self._conn.execute(
-                """
-                SELECT user_id, org_id, access_token, refresh_token, expires_at,
-                       scopes, connected_at, ua_hash, ip_hash
-                FROM hh_accounts 
-                WHERE org_id = ?
-                ORDER BY connected_at DESC
-                """,
-                (org_id,),
-            )
-        else:
-            cur = self._conn.execute(
-                """
-                SELECT user_id, org_id, access_token, refresh_token, expires_at,
-                       scopes, connected_at, ua_hash, ip_hash
-                FROM hh_accounts 
-                ORDER BY connected_at DESC
-                """
-            )
-        return [dict(row) for row in cur.fetchall()]
-
-    def update_hh_tokens(
-        self, 
-        user_id: str, 
-        org_id: str, 
-        access_token: str, 
-        refresh_token: str, 
-        expires_at: float
-    ) -> bool:
-        """Обновляет токены существующего HH аккаунта."""
-        cursor = self._conn.execute(
-            """
-            UPDATE hh_accounts 
-            SET access_token = ?, refresh_token = ?, expires_at = ?
-            WHERE user_id = ? AND org_id = ?
-            """,
-            (access_token, refresh_token, expires_at, user_id, org_id),
-        )
-        self._conn.commit()
-        return cursor.rowcount > 0
-
-    # OAuth States
-    def save_oauth_state(
-        self, 
-        state: str, 
-        user_id: str, 
-        org_id: str, 
-        session_id: str,
-        ua_hash: Optional[str] = None,
-        ip_hash: Optional[str] = None,
-        ttl_seconds: int = 600
-    ) -> None:
-        """
-        Сохраняет OAuth state с TTL.
-        
-        Args:
-            state: Уникальный state токен
-            user_id: ID пользователя
-            org_id: ID организации
-            session_id: ID сессии пользователя
-            ua_hash: Хеш User-Agent для безопасности
-            ip_hash: Хеш IP адреса для безопасности
-            ttl_seconds: Время жизни state в секундах (по умолчанию 10 минут)
-        """
-        now = time.time()
-        expires_at = now + ttl_seconds
-        
-        self._conn.execute(
-            """
-            INSERT INTO oauth_states (
-                state, user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (state, user_id, org_id, session_id, now, ua_hash, ip_hash, expires_at)
+            _SQL_GET_SESSION_RAW,
+            (session_id,),
         )
-        self._conn.commit()
+        return cur.fetchone()
 
-    def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
-        """
-        Получает данные OAuth state и проверяет TTL.
-        
-        Args:
-            state: State токен для поиска
-            
-        Returns:
-            Словарь с данными state или None если не найден/истек
-        """
-        cursor = self._conn.execute(
-            """
-            SELECT user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at
-            FROM oauth_states WHERE state = ?
-            """,
-            (state,)
-        )
-        row = cursor.fetchone()
-        if not row:
-            return None
-            
-        # Проверяем TTL
-        now = time.time()
-        if row[6] <= now:  # expires_at
-            # State истек, удаляем его
-            self.delete_oauth_state(state)
-            return None
-            
-        return {
-            "user_id": row[0],
-            "org_id": row[1], 
-            "session_id": row[2],
-            "created_at": row[3],
-            "ua_hash": row[4],
-            "ip_hash": row[5],
-            "expires_at": row[6]
-        }
-
-    def delete_oauth_state(self, state: str) -> bool:
-        """
-        Удаляет OAuth state (consume).
-        
-        Args:
-            state: State токен для удаления
-            
-        Returns:
-            True если state был найден и удален
-        """
-        cursor = self._conn.execute("DELETE FROM oauth_states WHERE state = ?", (state,))
-        self._conn.commit()
-        return cursor.rowcount > 0
+    @_writer
+    def delete_session(self, session_id: str) -> None:
+        cursor = self._conn.execute(_SQL_DELETE_SESSION, (session_id,))
+        self._commit_if_changed(cursor.rowcount)
 
-    def cleanup_expired_oauth_states(self) -> int:
-        """
-        Очищает истекшие OAuth states.
+    @_writer
+    def delete_expired_sessions(self, now: Optional[float] = None) -> int:
+        """Удаляет истекшие сессии (фоновая чистка).
         
         Returns:
             Количество удаленных записей
         """
-        now = time.time()
-        cursor = self._conn.execute("DELETE FROM oauth_states WHERE expires_at <= ?", (now,))
-        self._conn.commit()
+        cursor = self._conn.execute(_SQL_DELETE_EXPIRED_SESSIONS, (now if now is not None else time.time(),))
+        self._commit_if_changed(cursor.rowcount)
         return cursor.rowcount
@@ -0,0 +1,132 @@
+# src/auth/storage_base.py
+# --- agent_meta ---
+# role: auth-storage-base
+# owner: @backend
+# contract: Соединения SQLite (по одному на поток), write-lock и транзакции для AuthStorage и его частей
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - StorageBase(db_path?)
+#   - StorageBase.transaction() -> ContextManager[sqlite3.Connection]
+# --- /agent_meta ---
+
+import functools
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def _writer(method: _F) -> _F:
+    """Метод-запись выполняется под write-lock хранилища.
+
+    SQLite допускает одного писателя: конкурирующие потоки ждут на
+    threading.RLock, а не в busy_timeout с опросом и засыпаниями.
+    Читатели lock не берут и в WAL идут параллельно писателю.
+    """
+    @functools.wraps(method)
+    def wrapper(self: "StorageBase", *args: Any, **kwargs: Any) -> Any:
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper  # type: ignore[return-value]
+
+
+class StorageBase:
+    """Общая часть AuthStorage: соединения, write-lock и транзакции.
+
+    Таблицы и запросы к ним описаны в AuthStorage и его mixin-классах
+    (storage_hh, storage_oauth); все они работают через self._conn.
+    """
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        self._db_path = db_path or os.getenv("WEBAPP_DB_PATH", "app.sqlite3")
+        
+        # Запросы FastAPI выполняются в потоках threadpool: у каждого потока свое
+        # соединение, поэтому потоки не делят один sqlite3.Connection и его мьютекс.
+        # Для :memory: каждое соединение - отдельная БД, там остается одно общее.
+        self._local = threading.local()
+        # Один писатель на процесс (см. _writer); RLock - записи внутри transaction()
+        self._write_lock = threading.RLock()
+        self._shared_conn: Optional[sqlite3.Connection] = None
+        if self._db_path == ":memory:":
+            self._shared_conn = self._connect()
+        else:
+            # WAL хранится в файле БД: переключаем один раз, читатели
+            # больше не ждут пишущего
+            self._conn.execute("PRAGMA journal_mode=WAL")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает соединение с настройками хранилища."""
+        # check_same_thread=False нужен только общему соединению :memory:.
+        # cached_statements с запасом покрывает все _SQL_* модуля: горячие
+        # запросы не перекомпилируются и при разовых (схема, PRAGMA) вызовах
+        conn = sqlite3.connect(self._db_path, check_same_thread=False, cached_statements=256)
+        # Настраиваем row_factory для удобного доступа к столбцам по именам
+        conn.row_factory = sqlite3.Row
+        # В WAL режим NORMAL не теряет целостность, но делает fsync реже
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Кеш страниц до ~64 МБ на соединение (отрицательное значение - в КиБ)
+        conn.execute("PRAGMA cache_size=-64000")
+        # Временные таблицы и индексы сортировок - в памяти, а не во временных файлах
+        conn.execute("PRAGMA temp_store=MEMORY")
+        # Конкурирующий писатель ждет блокировку до 5 с вместо немедленного "database is locked"
+        conn.execute("PRAGMA busy_timeout=5000")
+        if self._db_path != ":memory:":
+            # Чтение страниц через mmap (до 256 МБ) без копирования в page cache
+            conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """Соединение текущего потока (создается при первом обращении)."""
+        if self._shared_conn is not None:
+            return self._shared_conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        """Курсор без row_factory: строки - обычные tuple без sqlite3.Row."""
+        cur = self._conn.cursor()
+        cur.row_factory = None
+        return cur
+
+    def _commit(self) -> None:
+        """Commit после одиночной записи; внутри transaction() откладывается до ее конца."""
+        if not getattr(self._local, "in_transaction", False):
+            self._conn.commit()
+
+    def _commit_if_changed(self, rowcount: int) -> None:
+        """Как _commit, но UPDATE/DELETE без затронутых строк закрывается rollback.
+
+        Пустая транзакция не пишет в WAL и не делает fsync; внутри
+        transaction() решение остается за внешним блоком.
+        """
+        if getattr(self._local, "in_transaction", False):
+            return
+        if rowcount > 0:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Объединяет записи storage в одну транзакцию (один commit и fsync).
+
+        Методы, вызванные внутри блока, не коммитят сами; при исключении
+        откатывается все. Вложенный transaction() присоединяется к внешнему.
+        Блок целиком держит write-lock хранилища.
+        """
+        if getattr(self._local, "in_transaction", False):
+            yield self._conn
+            return
+        with self._write_lock:
+            self._local.in_transaction = True
+            try:
+                with self._conn as conn:
+                    yield conn
+            finally:
+                self._local.in_transaction = False
@@ -0,0 +1,150 @@
+# src/auth/storage_hh.py
+# --- agent_meta ---
+# role: auth-storage-hh-accounts
+# owner: @backend
+# contract: Таблица hh_accounts: токены HH, привязанные к паре user_id + org_id (часть AuthStorage)
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - HHAccountsMixin.save_hh_account(user_id, org_id, tokens...) -> None
+#   - HHAccountsMixin.get_hh_account(user_id, org_id) -> dict | None
+#   - HHAccountsMixin.get_hh_account_expiry(user_id, org_id) -> float | None
+#   - HHAccountsMixin.delete_hh_account(user_id, org_id) -> None
+#   - HHAccountsMixin.list_hh_accounts(org_id?) -> list[dict]
+#   - HHAccountsMixin.iter_hh_accounts(org_id?) -> Iterator[dict]
+#   - HHAccountsMixin.update_hh_tokens(user_id, org_id, tokens...) -> bool
+# --- /agent_meta ---
+
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional
+
+from .storage_base import StorageBase, _writer
+
+
+_HH_ACCOUNT_COLUMNS = (
+    "user_id, org_id, access_token, refresh_token, expires_at, scopes, connected_at, ua_hash, ip_hash"
+)
+
+_SQL_SAVE_HH_ACCOUNT = (
+    f"INSERT INTO hh_accounts ({_HH_ACCOUNT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT(user_id, org_id) DO UPDATE SET "
+    "access_token = excluded.access_token, refresh_token = excluded.refresh_token, "
+    "expires_at = excluded.expires_at, scopes = excluded.scopes, "
+    "connected_at = excluded.connected_at, ua_hash = excluded.ua_hash, ip_hash = excluded.ip_hash"
+)
+_SQL_GET_HH_ACCOUNT = f"SELECT {_HH_ACCOUNT_COLUMNS} FROM hh_accounts WHERE user_id = ? AND org_id = ?"
+_SQL_GET_HH_ACCOUNT_EXPIRY = "SELECT expires_at FROM hh_accounts WHERE user_id = ? AND org_id = ?"
+_SQL_DELETE_HH_ACCOUNT = "DELETE FROM hh_accounts WHERE user_id = ? AND org_id = ?"
+_SQL_LIST_HH_ACCOUNTS_BY_ORG = (
+    f"SELECT {_HH_ACCOUNT_COLUMNS} FROM hh_accounts WHERE org_id = ? ORDER BY connected_at DESC"
+)
+_SQL_LIST_HH_ACCOUNTS = f"SELECT {_HH_ACCOUNT_COLUMNS} FROM hh_accounts ORDER BY connected_at DESC"
+_SQL_UPDATE_HH_TOKENS = (
+    "UPDATE hh_accounts SET access_token = ?, refresh_token = ?, expires_at = ? "
+    "WHERE user_id = ? AND org_id = ?"
+)
+
+
+class HHAccountsMixin(StorageBase):
+    """Методы AuthStorage для таблицы hh_accounts."""
+
+    @_writer
+    def save_hh_account(
+        self,
+        user_id: str,
+        org_id: str,
+        access_token: str,
+        refresh_token: str,
+        expires_at: float,
+        scopes: Optional[str] = None,
+        connected_at: Optional[float] = None,
+        ua_hash: Optional[str] = None,
+        ip_hash: Optional[str] = None,
+    ) -> None:
+        """Сохраняет HH аккаунт пользователя (UPSERT по user_id + org_id)."""
+        self._conn.execute(
+            _SQL_SAVE_HH_ACCOUNT,
+            (user_id, org_id, access_token, refresh_token, expires_at, scopes, connected_at, ua_hash, ip_hash),
+        )
+        self._commit()
+
+    def get_hh_account(self, user_id: str, org_id: str) -> Optional[Dict[str, Any]]:
+        """Получает HH аккаунт пользователя по user_id + org_id."""
+        # Вызывающему нужен dict: собираем его из tuple литералом, а не dict(Row)
+        row = self._tuple_cursor().execute(
+            _SQL_GET_HH_ACCOUNT,
+            (user_id, org_id),
+        ).fetchone()
+        if row is None:
+            return None
+        user_id, org_id, access_token, refresh_token, expires_at, scopes, connected_at, ua_hash, ip_hash = row
+        return {
+            "user_id": user_id,
+            "org_id": org_id,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_at": expires_at,
+            "scopes": scopes,
+            "connected_at": connected_at,
+            "ua_hash": ua_hash,
+            "ip_hash": ip_hash,
+        }
+
+    def get_hh_account_expiry(self, user_id: str, org_id: str) -> Optional[float]:
+        """Возвращает только expires_at HH аккаунта (None, если аккаунта нет)."""
+        cur = self._conn.execute(
+            _SQL_GET_HH_ACCOUNT_EXPIRY,
+            (user_id, org_id),
+        )
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    @_writer
+    def delete_hh_account(self, user_id: str, org_id: str) -> None:
+        """Удаляет HH аккаунт пользователя."""
+        cursor = self._conn.execute(
+            _SQL_DELETE_HH_ACCOUNT,
+            (user_id, org_id),
+        )
+        self._commit_if_changed(cursor.rowcount)
+
+    def _hh_accounts_cursor(self, org_id: Optional[str]) -> sqlite3.Cursor:
+        if org_id:
+            return self._conn.execute(
+                _SQL_LIST_HH_ACCOUNTS_BY_ORG,
+                (org_id,),
+            )
+        return self._conn.execute(
+            _SQL_LIST_HH_ACCOUNTS
+        )
+
+    def list_hh_accounts(self, org_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Возвращает список всех HH аккаунтов (с фильтром по организации)."""
+        return list(map(dict, self._hh_accounts_cursor(org_id).fetchall()))
+
+    def iter_hh_accounts(self, org_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Как list_hh_accounts, но строки читаются по мере итерации.
+
+        Вызывающий, которому нужны первые совпадения или один проход, не
+        строит весь список. Курсор принадлежит соединению потока: итерировать
+        нужно в одном потоке.
+        """
+        for row in self._hh_accounts_cursor(org_id):
+            yield dict(row)
+
+    @_writer
+    def update_hh_tokens(
+        self, 
+        user_id: str, 
+        org_id: str, 
+        access_token: str, 
+        refresh_token: str, 
+        expires_at: float
+    ) -> bool:
+        """Обновляет токены существующего HH аккаунта."""
+        cursor = self._conn.execute(
+            _SQL_UPDATE_HH_TOKENS,
+            (access_token, refresh_token, expires_at, user_id, org_id),
+        )
+        # Токены уже обновил другой воркер / аккаунт отключен - коммитить нечего
+        self._commit_if_changed(cursor.rowcount)
+        return cursor.rowcount > 0
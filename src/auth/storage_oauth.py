@@ -0,0 +1,150 @@
+# src/auth/storage_oauth.py
+# --- agent_meta ---
+# role: auth-storage-oauth-states
+# owner: @backend
+# contract: Таблица oauth_states: одноразовые OAuth state с TTL (часть AuthStorage, backend "sqlite")
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - OAuthStatesMixin.save_oauth_state(state, user_id, org_id, session_id, ua_hash?, ip_hash?, ttl_seconds?) -> None
+#   - OAuthStatesMixin.get_oauth_state(state) -> dict | None
+#   - OAuthStatesMixin.consume_oauth_state(state) -> dict | None
+#   - OAuthStatesMixin.delete_oauth_state(state) -> bool
+#   - OAuthStatesMixin.cleanup_expired_oauth_states() -> int
+# --- /agent_meta ---
+
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .storage_base import StorageBase, _writer
+
+
+_SQL_INSERT_OAUTH_STATE = (
+    "INSERT INTO oauth_states "
+    "(state, user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_SQL_GET_OAUTH_STATE = (
+    "SELECT user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at "
+    "FROM oauth_states WHERE state = ? AND expires_at > ?"
+)
+_SQL_DELETE_OAUTH_STATE = "DELETE FROM oauth_states WHERE state = ?"
+_SQL_CONSUME_OAUTH_STATE = (
+    "DELETE FROM oauth_states WHERE state = ? AND expires_at > ? "
+    "RETURNING user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at"
+)
+_SQL_DELETE_EXPIRED_OAUTH_STATES = "DELETE FROM oauth_states WHERE expires_at <= ?"
+
+
+class OAuthStatesMixin(StorageBase):
+    """Методы AuthStorage для таблицы oauth_states (интерфейс как у OAuthStateStore)."""
+
+    @staticmethod
+    def _oauth_state_dict(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        user_id, org_id, session_id, created_at, ua_hash, ip_hash, expires_at = row
+        return {
+            "user_id": user_id,
+            "org_id": org_id,
+            "session_id": session_id,
+            "created_at": created_at,
+            "ua_hash": ua_hash,
+            "ip_hash": ip_hash,
+            "expires_at": expires_at,
+        }
+
+    @_writer
+    def save_oauth_state(
+        self, 
+        state: str, 
+        user_id: str, 
+        org_id: str, 
+        session_id: str,
+        ua_hash: Optional[str] = None,
+        ip_hash: Optional[str] = None,
+        ttl_seconds: int = 600
+    ) -> None:
+        """
+        Сохраняет OAuth state с TTL.
+        
+        Args:
+            state: Уникальный state токен
+            user_id: ID пользователя
+            org_id: ID организации
+            session_id: ID сессии пользователя
+            ua_hash: Хеш User-Agent для безопасности
+            ip_hash: Хеш IP адреса для безопасности
+            ttl_seconds: Время жизни state в секундах (по умолчанию 10 минут)
+        """
+        now = time.time()
+        expires_at = now + ttl_seconds
+        
+        self._conn.execute(
+            _SQL_INSERT_OAUTH_STATE,
+            (state, user_id, org_id, session_id, now, ua_hash, ip_hash, expires_at)
+        )
+        self._commit()
+
+    def get_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        """
+        Получает данные OAuth state и проверяет TTL.
+        
+        Args:
+            state: State токен для поиска
+            
+        Returns:
+            Словарь с данными state или None если не найден/истек
+        """
+        # TTL проверяется в SQL; истекшие строки удаляет фоновая чистка
+        # (janitor), поэтому чтение не пишет в БД
+        row = self._tuple_cursor().execute(
+            _SQL_GET_OAUTH_STATE,
+            (state, time.time())
+        ).fetchone()
+        return self._oauth_state_dict(row) if row else None
+
+    @_writer
+    def consume_oauth_state(self, state: str) -> Optional[Dict[str, Any]]:
+        """
+        Возвращает данные действующего state и удаляет его (одноразовое использование).
+        
+        Args:
+            state: State токен
+            
+        Returns:
+            Словарь с данными state или None если не найден/истек
+        """
+        # Один DELETE ... RETURNING вместо SELECT + DELETE: одна запись и один
+        # commit, а повторный callback с тем же state уже ничего не найдет.
+        # Истекший state не возвращается и остается для чистки по expires_at.
+        cursor = self._tuple_cursor().execute(_SQL_CONSUME_OAUTH_STATE, (state, time.time()))
+        # RETURNING нужно дочитать до commit
+        row = cursor.fetchone()
+        self._commit_if_changed(1 if row else 0)
+        return self._oauth_state_dict(row) if row else None
+
+    @_writer
+    def delete_oauth_state(self, state: str) -> bool:
+        """
+        Удаляет OAuth state (consume).
+        
+        Args:
+            state: State токен для удаления
+            
+        Returns:
+            True если state был найден и удален
+        """
+        cursor = self._conn.execute(_SQL_DELETE_OAUTH_STATE, (state,))
+        self._commit_if_changed(cursor.rowcount)
+        return cursor.rowcount > 0
+
+    @_writer
+    def cleanup_expired_oauth_states(self) -> int:
+        """
+        Очищает истекшие OAuth states.
+        
+        Returns:
+            Количество удаленных записей
+        """
+        now = time.time()
+        cursor = self._conn.execute(_SQL_DELETE_EXPIRED_OAUTH_STATES, (now,))
+        self._commit_if_changed(cursor.rowcount)
+        return cursor.rowcount
@@ -10,7 +10,7 @@
 import asyncio
 from src.callback_server.manager import ServerManager
 from src.callback_server.config import CallbackServerSettings
-from src.utils import get_logger
+from src.utils import get_logger, init_logging_from_env
 
 logger = get_logger(__name__)
 
@@ -40,6 +40,9 @@ async def main():
         logger.error(f"Произошла ошибка при работе сервера: {e}", exc_info=True)
 
 if __name__ == "__main__":
+    # Логирование настраивает точка входа, а не импорт пакета: импорт
+    # src.callback_server (например, из src.config) не трогает root logger
+    init_logging_from_env()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
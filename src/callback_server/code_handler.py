@@ -3,7 +3,7 @@
 # role: oauth2-code-file-handler
 # owner: @backend
 # contract: Обработчик временных файлов для хранения OAuth2 кодов авторизации
-# last_reviewed: 2025-08-04
+# last_reviewed: 2025-08-24
 # interfaces:
 #   - CodeFileHandler.write(code: str) -> None
 #   - CodeFileHandler.read() -> str
@@ -13,16 +13,24 @@
 # patterns: Data Access Object (DAO), Resource Management
 # --- /agent_meta ---
 
+import contextlib
+import logging
 import os
 
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
+# Код короткий (до ~200 байт): читаем его одним os.read
+_READ_CHUNK = 4096
+
 
 class CodeFileHandler:
     """Обработчик временных файлов для хранения OAuth2 кодов авторизации.
     
+    ServerManager получает код в памяти (asyncio.Future, см. create_app);
+    файл нужен, только если callback-сервер и потребитель кода - разные процессы.
+    
     Этот класс реализует архитектурный паттерн "Data Access Object (DAO)" 
     для работы с временными файлами, содержащими коды авторизации.
     Он обеспечивает безопасное сохранение, чтение и удаление конфиденциальных
@@ -78,8 +86,8 @@ class CodeFileHandler:
         """Сохраняет код авторизации в временный файл.
         
         Этот метод атомарно создает временный файл с кодом авторизации,
-        полученным от OAuth2 провайдера. Операция использует
-        контекстный менеджер для гарантированного закрытия файла.
+        полученным от OAuth2 провайдера. Запись идет одним os.write без
+        буферизованного текстового файла; файл создается с правами 0o600.
         
         Операция выполняется с полным логированием и обработкой ошибок.
         
@@ -104,19 +112,32 @@ class CodeFileHandler:
             TypeError: Если code не является строкой.
             
         Side Effects:
-            - Создает файл по пути self.file_path
+            - Создает файл по пути self.file_path (права 0o600)
             - Заменяет содержимое, если файл уже существует
             - Логирует операцию для отладки и аудита
+            - При ошибке удаляет временный файл <path>.tmp
         
         Security Note:
             Файл содержит конфиденциальные данные. Обязательно вызовите
             cleanup() после использования кода.
         """
-        logger.debug("Запись кода авторизации в файл %s", self.file_path)
+        tmp_path = self.file_path + ".tmp"
         try:
-            with open(self.file_path, "w") as f:
-                f.write(code)
-            logger.info("Код авторизации успешно сохранен в файл")
+            # Пишем во временный файл и атомарно подменяем: читатель в другом
+            # процессе видит либо старый файл, либо полный код, но не обрывок
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                try:
+                    os.write(fd, code.encode("utf-8"))
+                finally:
+                    os.close(fd)
+                os.replace(tmp_path, self.file_path)
+            except OSError:
+                # Не оставляем код в <path>.tmp, если запись или подмена не удались
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(tmp_path)
+                raise
+            logger.debug("Код авторизации сохранен в файл %s", self.file_path)
         except IOError as e:
             logger.error("Не удалось записать код в файл %s: %s", self.file_path, e)
             raise
@@ -125,9 +146,8 @@ class CodeFileHandler:
         """Читает и возвращает код авторизации из временного файла.
         
         Этот метод безопасно читает содержимое временного файла,
-        созданного методом write(). Операция использует контекстный
-        менеджер для гарантированного закрытия файла и автоматически
-        удаляет пробельные символы.
+        созданного методом write(). Файл читается через os.open/os.read
+        (дескриптор закрывается в finally), пробельные символы удаляются.
         
         Пример использования:
             >>> handler = CodeFileHandler(".oauth_code")
@@ -169,12 +189,17 @@ class CodeFileHandler:
             включая \n, \r, \t и обычные пробелы. Это помогает очистить
             код от случайных пробелов, которые могут попасть в URL.
         """
-        logger.debug("Чтение кода авторизации из файла %s", self.file_path)
         try:
-            with open(self.file_path, "r") as f:
-                code = f.read().strip()
-                logger.info("Код авторизации успешно прочитан из файла")
-                return code
+            fd = os.open(self.file_path, os.O_RDONLY)
+            try:
+                data = bytearray()
+                while chunk := os.read(fd, _READ_CHUNK):
+                    data += chunk
+            finally:
+                os.close(fd)
+            code = data.decode("utf-8").strip()
+            logger.debug("Код авторизации прочитан из файла %s", self.file_path)
+            return code
         except FileNotFoundError:
             logger.warning("Файл с кодом %s не найден", self.file_path)
             raise
@@ -190,8 +215,7 @@ class CodeFileHandler:
         выполняться после использования кода для обеспечения безопасности.
         
         Метод идемпотентен - можно вызывать многократно без побочных эффектов.
-        Он проверяет существование файла перед удалением и обрабатывает
-        возможные ошибки файловой системы.
+        Отсутствующий файл (FileNotFoundError от unlink) не считается ошибкой.
         
         Пример использования (обязательно):
             >>> handler = CodeFileHandler()
@@ -235,16 +259,15 @@ class CodeFileHandler:
             Этот метод критичен для безопасности! Не оставляйте
             файлы с OAuth2 кодами на диске - это создает уязвимости безопасности.
         """
-        if os.path.exists(self.file_path):
-            logger.debug("Удаление временного файла с кодом %s", self.file_path)
-            try:
-                os.remove(self.file_path)
-                logger.debug("Временный файл с кодом %s успешно удален", self.file_path)
-            except OSError as e:
-                logger.error("Не удалось удалить файл с кодом %s: %s", self.file_path, e)
-                raise
-        else:
-            logger.debug("Файл %s не существует, очистка не требуется", self.file_path)
+        # Один unlink вместо exists + remove: без лишнего stat и гонки между ними
+        try:
+            os.unlink(self.file_path)
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error("Не удалось удалить файл с кодом %s: %s", self.file_path, e)
+            raise
+        logger.debug("Временный файл с кодом %s удален", self.file_path)
 
     def exists(self) -> bool:
         """Проверяет существование временного файла с кодом авторизации.
@@ -289,5 +312,7 @@ class CodeFileHandler:
             Для полной валидации используйте метод read().
         """
         exists = os.path.exists(self.file_path)
-        logger.debug("Проверка существования файла %s: %s", self.file_path, "существует" if exists else "не существует")
+        # exists() вызывают в циклах поллинга: без DEBUG не собираем аргументы лога
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Проверка существования файла %s: %s", self.file_path, "существует" if exists else "не существует")
         return exists
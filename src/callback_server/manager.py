@@ -3,27 +3,25 @@
 # role: oauth2-callback-server-manager
 # owner: @backend
 # contract: Управляет жизненным циклом callback сервера для OAuth2 авторизации
-# last_reviewed: 2025-08-04
+# last_reviewed: 2025-08-24
 # interfaces:
 #   - ServerManager.run_and_wait_for_code() -> str
 # dependencies:
 #   - CallbackServerSettings
-#   - CodeFileHandler
 #   - uvicorn.Server
 # patterns: Facade Pattern, Server Lifecycle Management
 # --- /agent_meta ---
 
 import asyncio
+import logging
 import sys
 
 import uvicorn
 
-from src.callback_server.code_handler import CodeFileHandler
 from src.callback_server.config import CallbackServerSettings
 from src.callback_server.server import create_app
-from src.utils import get_logger, init_logging_from_env
+from src.utils import get_logger
 
-init_logging_from_env()
 logger = get_logger(__name__)
 
 
@@ -44,7 +42,7 @@ class ServerManager:
     Интеграция с OAuth2 flow:
     1. Клиентское приложение перенаправляет пользователя на OAuth2 провайдер
     2. После авторизации провайдер делает callback на локальный сервер
-    3. Сервер получает код авторизации и сохраняет его через CodeFileHandler
+    3. Сервер получает код авторизации и передает его в asyncio.Future менеджера
     4. Сервер автоматически завершает работу и возвращает код клиенту
     
     Пример использования:
@@ -58,33 +56,46 @@ class ServerManager:
         
     Attributes:
         _settings: Конфигурация сервера
-        _code_handler: Обработчик для работы с файлом кода авторизации
         _shutdown_event: Событие для координации завершения работы сервера
+        _app: FastAPI приложение, создается один раз на менеджер
+        _config: uvicorn.Config поверх _app, переиспользуется между запусками
     """
 
     def __init__(self, settings: CallbackServerSettings) -> None:
         self._settings = settings
-        self._code_handler = CodeFileHandler()
         self._shutdown_event = asyncio.Event()
+        # Приложение и конфиг строятся один раз: повторные запуски (например,
+        # повторная авторизация) меняют только event и future в app.state
+        self._app = create_app(self._shutdown_event)
+        # Серверу нужен один GET /callback: без lifespan и access-лога,
+        # цикл и интерфейс заданы явно, чтобы uvicorn их не определял
+        self._config = uvicorn.Config(
+            self._app,
+            host=settings.host,
+            port=settings.port,
+            log_level="warning",
+            lifespan="off",
+            access_log=False,
+            loop="asyncio",
+            interface="asgi3",
+        )
         logger.debug("ServerManager инициализирован для %s:%d", settings.host, settings.port)
 
     async def run_and_wait_for_code(self) -> str:
         """Запускает callback сервер и асинхронно ожидает получения кода авторизации.
         
         Метод реализует полный цикл работы с OAuth2 callback:
-        1. Очищает предыдущие временные файлы с кодами
-        2. Создает и настраивает uvicorn сервер с FastAPI приложением
+        1. Создает future для кода (передача в памяти, без временного файла)
+        2. Создает uvicorn сервер поверх заранее собранных приложения и конфига
         3. Запускает сервер в отдельной задаче
         4. Ожидает получения кода через shutdown_event
         5. Корректно останавливает сервер
-        6. Читает полученный код из временного файла
-        7. Очищает временные файлы
+        6. Возвращает код из future
         
         Архитектурные особенности:
         - Использует асинхронное программирование для неблокирующего ожидания
         - Применяет паттерн "Event-driven" через asyncio.Event
         - Обеспечивает graceful shutdown сервера
-        - Гарантирует очистку ресурсов в блоке finally
         
         Пример OAuth2 flow:
             # 1. Запуск сервера
@@ -105,26 +116,21 @@ class ServerManager:
             
         Raises:
             SystemExit: Если код не был получен (сервер завершился без callback).
-            IOError: При ошибках работы с временными файлами.
             
         Note:
             Метод блокирует выполнение до получения кода или ошибки.
             Для отмены операции можно использовать asyncio.timeout() или
             asyncio.wait_for() с таймаутом.
         """
-        logger.info("Запуск callback сервера для получения кода авторизации")
-        logger.debug("Очистка предыдущих файлов с кодом авторизации")
-        self._code_handler.cleanup()
+        # Сервер работает в этом же event loop: код передается через future,
+        # без записи на диск и повторного чтения
+        code_future: "asyncio.Future[str]" = asyncio.get_running_loop().create_future()
+        self._app.state.code_future = code_future
+        self._shutdown_event.clear()
 
-        config = uvicorn.Config(
-            create_app(self._shutdown_event),
-            host=self._settings.host,
-            port=self._settings.port,
-            log_level="warning",
-        )
-        server = uvicorn.Server(config)
+        server = uvicorn.Server(self._config)
         
-        logger.info("Сервер запускается на %s:%d", self._settings.host, self._settings.port)
+        logger.info("Запуск callback сервера на %s:%d", self._settings.host, self._settings.port)
         server_task = asyncio.create_task(server.serve())
         
         logger.info("Ожидание получения кода авторизации...")
@@ -135,13 +141,10 @@ class ServerManager:
         await server_task
         logger.debug("Сервер успешно остановлен")
 
-        try:
-            code = self._code_handler.read()
-            logger.info("Код авторизации успешно получен: %s...", code[:8] if code else "None")
-            return code
-        except FileNotFoundError:
+        if not code_future.done():
             logger.error("Сервер был остановлен, но код авторизации не был получен")
             sys.exit(1)
-        finally:
-            logger.debug("Очистка временных файлов")
-            self._code_handler.cleanup()
\ No newline at end of file
+        code = code_future.result()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Код авторизации успешно получен: %s...", code[:8] if code else "None")
+        return code
\ No newline at end of file
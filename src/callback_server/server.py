@@ -3,26 +3,32 @@
 # role: oauth2-callback-fastapi-app
 # owner: @backend
 # contract: FastAPI приложение для обработки OAuth2 callback запросов
-# last_reviewed: 2025-08-04
+# last_reviewed: 2025-08-24
 # interfaces:
-#   - create_app(shutdown_event: asyncio.Event) -> FastAPI
+#   - create_app(shutdown_event: asyncio.Event, code_future?: asyncio.Future[str]) -> FastAPI
 # dependencies:
-#   - CodeFileHandler
 #   - FastAPI
 #   - asyncio.Event
 # patterns: Factory Pattern, Event-driven Architecture
 # --- /agent_meta ---
 
 import asyncio
-from fastapi import FastAPI, Query
+import logging
+from typing import Optional
+
+from fastapi import FastAPI, Query, Request
 from fastapi.responses import HTMLResponse
 
-from src.callback_server.code_handler import CodeFileHandler
 from src.utils import get_logger
 
 logger = get_logger(__name__)
 
-def create_app(shutdown_event: asyncio.Event) -> FastAPI:
+# Тела ответов постоянные: кодируем в UTF-8 один раз при импорте. Сам Response
+# создается на каждый запрос - его заголовки изменяемые, делить их нельзя.
+_OK_BODY = "Авторизация успешно завершена. Вы можете закрыть это окно и вернуться в приложение.".encode("utf-8")
+_ERROR_BODY = "Ошибка авторизации. Пожалуйста, попробуйте снова.".encode("utf-8")
+
+def create_app(shutdown_event: asyncio.Event, code_future: Optional["asyncio.Future[str]"] = None) -> FastAPI:
     """Фабрика для создания FastAPI приложения с OAuth2 callback обработчиком.
     
     Эта функция реализует паттерн "Factory" для создания конфигурируемого 
@@ -34,19 +40,20 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
     - Factory Pattern: создает настроенное приложение по параметрам
     - Dependency Injection: принимает shutdown_event для координации
     - Single Purpose: отвечает только за обработку OAuth2 callback
-    - Separation of Concerns: логика работы с файлами вынесена в CodeFileHandler
+    - Separation of Concerns: код передается вызывающему через code_future
     
     OAuth2 Authorization Code Flow интеграция:
     1. OAuth2 провайдер перенаправляет пользователя на /callback
     2. Сервер выделяет код авторизации из query параметров
-    3. Код сохраняется в временный файл через CodeFileHandler
+    3. Код передается в code_future (тот же процесс, без временного файла)
     4. Пользователю отображается страница успешной авторизации
     5. Сервер получает сигнал о завершении через shutdown_event
     
     Пример использования:
         >>> import asyncio
         >>> shutdown_event = asyncio.Event()
-        >>> app = create_app(shutdown_event)
+        >>> code_future = asyncio.get_running_loop().create_future()
+        >>> app = create_app(shutdown_event, code_future)
         >>> # Приложение готово к запуску через uvicorn
         >>> # После callback сервер автоматически завершит работу
     
@@ -57,14 +64,18 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
         shutdown_event: Событие asyncio для координации завершения сервера.
                        Событие будет установлено после успешного 
                        получения кода авторизации.
+        code_future: Future, в который кладется код; его ожидает ServerManager
+                     в том же event loop.
+
+    Оба объекта хранятся в app.state, и обработчик читает их оттуда на каждый
+    запрос: ServerManager переиспользует одно приложение между запусками и
+    перед каждым подменяет future (и сбрасывает event). Поэтому code_future
+    можно не передавать сразу - он должен появиться в app.state до запуска;
+    callback без него получает страницу ошибки (400).
     
     Returns:
         FastAPI: Настроенное приложение FastAPI с обработчиком callback.
                  Приложение готово для запуска через uvicorn.
-    
-    Note:
-        Приложение создает новый экземпляр CodeFileHandler при каждом вызове.
-        Это обеспечивает чистоту состояния и изоляцию между запусками.
     """
     logger.debug("Создание FastAPI приложения для OAuth2 callback сервера")
     app = FastAPI(
@@ -72,10 +83,11 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
         description="Локальный сервер для обработки OAuth2 Authorization Code callback",
         version="1.0.0"
     )
-    code_handler = CodeFileHandler()
+    app.state.shutdown_event = shutdown_event
+    app.state.code_future = code_future
 
     @app.get("/callback")
-    async def callback_handler(code: str = Query(None)):
+    async def callback_handler(request: Request, code: str = Query(None)):
         """Обрабатывает OAuth2 Authorization Code callback запросы.
         
         Этот endpoint является ключевым компонентом OAuth2 Authorization Code Flow.
@@ -84,7 +96,7 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
         
         Порядок обработки:
         1. Проверяет наличие кода в query параметрах
-        2. Сохраняет код в временный файл через CodeFileHandler
+        2. Передает код в code_future
         3. Устанавливает shutdown_event для сигнализации о завершении
         4. Возвращает HTML страницу с сообщением о результате
         
@@ -101,6 +113,8 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
             GET /callback?code=github_auth_code_123...&state=csrf_token
         
         Args:
+            request: Текущий запрос (через него берутся app.state.code_future
+                     и app.state.shutdown_event).
             code: Код авторизации, полученный от OAuth2 провайдера.
                   Может быть None, если произошла ошибка авторизации.
         
@@ -109,7 +123,7 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
                          Статус 200 при успехе, 400 при ошибке.
         
         Side Effects:
-            - Сохраняет код авторизации в временный файл
+            - Передает код в code_future
             - Устанавливает shutdown_event, что приводит к завершению сервера
             - Логирует операции (с маскировкой конфиденциальных данных)
         
@@ -117,20 +131,26 @@ def create_app(shutdown_event: asyncio.Event) -> FastAPI:
             URL для callback должен быть зарегистрирован в настройках OAuth2 приложения.
             Обычно это http://127.0.0.1:8080/callback или http://localhost:8080/callback.
         """
-        logger.info("Получен callback запрос от OAuth2 провайдера")
-        
         if code:
-            logger.info("Получен код авторизации: %s...", code[:10])
-            logger.debug("Сохранение кода авторизации в файл")
-            code_handler.write(code)
-            
-            logger.info("Отправляется сигнал о завершении авторизации")
-            shutdown_event.set()  # Сигнализируем о завершении
+            # Срез кода не строим, если INFO отфильтрован
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Получен код авторизации: %s...", code[:10])
+            state = request.app.state
+            code_future = state.code_future
+            if code_future is None:
+                # Приложение создано без future и ServerManager его еще не выставил:
+                # коду некуда передаться - отвечаем страницей ошибки, а не 500
+                logger.error("Callback получен, но code_future не задан: код авторизации не принят")
+                return HTMLResponse(_ERROR_BODY, status_code=400)
+            # Повторный callback не перезаписывает уже полученный код
+            if not code_future.done():
+                code_future.set_result(code)
+            state.shutdown_event.set()  # Сигнализируем о завершении
             
-            return HTMLResponse("Авторизация успешно завершена. Вы можете закрыть это окно и вернуться в приложение.")
+            return HTMLResponse(_OK_BODY)
         
         logger.error("Код авторизации отсутствует в callback запросе")
-        return HTMLResponse("Ошибка авторизации. Пожалуйста, попробуйте снова.", status_code=400)
+        return HTMLResponse(_ERROR_BODY, status_code=400)
 
     logger.debug("FastAPI приложение создано и готово к использованию")
     return app
\ No newline at end of file
@@ -9,6 +9,7 @@
 #   - HHTokenManager
 #   - HHApiClient
 #   - HHSettings
+#   - get_hh_settings
 # --- /agent_meta ---
 
 """
@@ -20,12 +21,13 @@ with the HH.ru API.
 
 from .auth import HHAuthService
 from .client import HHApiClient
-from .config import HHSettings
+from .config import HHSettings, get_hh_settings
 from .tokens import HHTokenManager
 
 __all__ = [
     "HHAuthService",
     "HHApiClient",
     "HHSettings",
+    "get_hh_settings",
     "HHTokenManager",
 ]
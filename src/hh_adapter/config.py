@@ -6,11 +6,16 @@
 # last_reviewed: 2025-08-04
 # interfaces:
 #   - HHSettings
+#   - HHSettings.authorize_url_prefix -> str (authorize URL без значения state)
+#   - get_hh_settings() -> HHSettings (кешированный экземпляр)
 # dependencies:
 #   - pydantic_settings.BaseSettings
 # patterns: Configuration Object, Settings Pattern
 # --- /agent_meta ---
 
+from functools import cached_property, lru_cache
+from urllib.parse import urlencode
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -31,6 +36,7 @@ class HHSettings(BaseSettings):
         redirect_uri: URL для перенаправления после авторизации (должен совпадать с зарегистрированным)
         base_url: Базовый URL для API запросов к HeadHunter (по умолчанию https://api.hh.ru/)
         token_url: URL эндпоинта для получения и обновления OAuth2 токенов
+        authorize_url_prefix: Authorize URL с client_id/redirect_uri, к которому дописывается state
     
     Environment Variables:
         HH_CLIENT_ID: Идентификатор OAuth2 приложения
@@ -62,3 +68,29 @@ class HHSettings(BaseSettings):
         env_prefix='HH_',
         extra='ignore'
     )
+
+    @cached_property
+    def authorize_url_prefix(self) -> str:
+        """
+        Authorize URL HH.ru, заканчивающийся на "&state=".
+
+        Собирается один раз на экземпляр; параметры экранируются urlencode.
+        Значение state (secrets.token_urlsafe) URL-безопасно и дописывается как есть.
+        """
+        query = urlencode({
+            "response_type": "code",
+            "client_id": self.client_id,
+            "redirect_uri": self.redirect_uri,
+        })
+        return f"https://hh.ru/oauth/authorize?{query}&state="
+
+
+@lru_cache(maxsize=1)
+def get_hh_settings() -> HHSettings:
+    """
+    Возвращает общий экземпляр HHSettings для процесса.
+    
+    Переменные окружения и .env разбираются один раз при первом вызове;
+    для тестов с другим окружением сбросьте кеш через get_hh_settings.cache_clear().
+    """
+    return HHSettings()
@@ -12,6 +12,9 @@
 #   - FastAPI, aiohttp, sqlite3
 # --- /agent_meta ---
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -19,6 +22,11 @@ from src.webapp.features import router as features_router
 from src.webapp.sessions import router as sessions_router
 from src.webapp.pdf import router as pdf_router
 from src.auth import router as auth_router
+from src.auth.asgi import SessionCookieMiddleware
+from src.auth.crypto import dummy_password_hash
+from src.auth.hh_service import close_hh_session, init_hh_session
+from src.auth.janitor import run_session_janitor
+from src.auth.providers import get_auth_service, get_hh_service, get_oauth_state_store, get_storage
 
 # Импортируем модули для автоматической регистрации LLM фич
 import src.llm_cover_letter  # Автоматически регистрирует cover_letter фичу
@@ -27,7 +35,34 @@ import src.llm_interview_checklist  # Автоматически регистр
 import src.llm_interview_simulation  # Автоматически регистрирует interview_simulation фичу
 
 
-app = FastAPI(title="HH Adapter WebApp", version="0.1.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Общие ресурсы процесса: aiohttp-сессия для запросов к HH и auth-сервисы.
+
+    Storage и сервисы auth - единый набор для роутера и HH middleware;
+    создаются при старте, а не на первом запросе, и доступны через app.state.
+    Фоновая задача janitor чистит истекшие сессии до остановки приложения.
+    """
+    app.state.auth_storage = get_storage()
+    app.state.auth_service = get_auth_service()
+    app.state.hh_service = get_hh_service()
+    app.state.hh_session = await init_hh_session()
+    app.state.oauth_state_store = get_oauth_state_store()
+    # Холостой хеш для входа с неизвестным email строим до первого запроса и вне event loop
+    await asyncio.to_thread(dummy_password_hash)
+    janitor = asyncio.create_task(
+        run_session_janitor(app.state.auth_storage, oauth_states=app.state.oauth_state_store)
+    )
+    try:
+        yield
+    finally:
+        janitor.cancel()
+        with suppress(asyncio.CancelledError):
+            await janitor
+        await close_hh_session()
+
+
+app = FastAPI(title="HH Adapter WebApp", version="0.1.0", lifespan=lifespan)
 
 # Настройка CORS для frontend
 app.add_middleware(
@@ -38,6 +73,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# session cookie разбирается один раз на запрос до роутинга (см. src.auth.asgi)
+app.add_middleware(SessionCookieMiddleware)
+
 # Подключаем роуты для LLM-фич
 app.include_router(auth_router)
 app.include_router(features_router)
@@ -20,7 +20,7 @@ from pydantic import BaseModel, Field
 from src.models.resume_models import ResumeInfo
 from src.models.vacancy_models import VacancyInfo
 from src.webapp.storage_docs import ResumeStore, VacancyStore, SessionStore
-from src.hh_adapter.config import HHSettings
+from src.hh_adapter.config import get_hh_settings
 from src.hh_adapter.client import HHApiClient
 from src.hh_adapter.tokens import HHTokenManager
 from src.parsing.resume.pdf_extractor import PdfPlumberExtractor
@@ -60,7 +60,7 @@ class SessionInitResponse(BaseModel):
 _resume_store = ResumeStore()
 _vacancy_store = VacancyStore()
 _session_store = SessionStore()
-_hh_settings = HHSettings()
+_hh_settings = get_hh_settings()
 _locks: dict[str, asyncio.Lock] = {}
 
 
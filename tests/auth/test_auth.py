@@ -103,3 +103,13 @@ async def test_create_org_requires_session_and_returns_id(app):
         body = r.json()
         assert "org_id" in body and isinstance(body["org_id"], str) and len(body["org_id"]) > 0
 
+
+
+@pytest.mark.asyncio
+async def test_malformed_session_cookie_is_rejected(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        # Cookie не в формате UUID отклоняется до обращения к хранилищу
+        client.cookies.set("sid", "not-a-session-id")
+        r = await client.get("/me")
+        assert r.status_code == 401
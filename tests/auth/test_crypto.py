@@ -0,0 +1,114 @@
+# tests/auth/test_crypto.py
+# --- agent_meta ---
+# role: tests-auth-crypto
+# owner: @backend
+# contract: Unit тесты для хеширования паролей (argon2id + legacy scrypt)
+# last_reviewed: 2025-08-21
+# interfaces:
+#   - test_hash_and_verify_roundtrip()
+#   - test_verify_legacy_scrypt_hash()
+#   - test_needs_rehash()
+#   - test_verify_cache_does_not_accept_wrong_password()
+#   - test_async_verify_in_process_pool()
+#   - test_malformed_scrypt_hash_burns_scrypt()
+#   - test_dummy_password_hash_rejects_any_password()
+#   - test_import_does_not_build_pool_cache_or_dummy_hash()
+# --- /agent_meta ---
+
+import base64
+import hashlib
+import importlib
+import multiprocessing
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from src.auth.crypto import hash_password, needs_rehash, verify_password
+
+
+def _legacy_scrypt_hash(password: str, salt: bytes) -> str:
+    """Строит хеш в старом формате scrypt$N$r$p$salt$hash."""
+    dk = hashlib.scrypt(password.encode("utf-8"), salt=salt, n=2 ** 14, r=8, p=1, dklen=32)
+    enc = lambda b: base64.urlsafe_b64encode(b).decode("utf-8").rstrip("=")
+    return f"scrypt${2 ** 14}$8$1${enc(salt)}${enc(dk)}"
+
+
+def test_hash_and_verify_roundtrip():
+    """Новый хеш в формате argon2id проверяется только правильным паролем."""
+    stored = hash_password("secret123")
+    assert stored.startswith("$argon2id$")
+    assert verify_password("secret123", stored)
+    assert not verify_password("wrong", stored)
+
+
+def test_verify_legacy_scrypt_hash():
+    """Legacy scrypt-хеши продолжают проверяться."""
+    stored = _legacy_scrypt_hash("secret123", b"0123456789abcdef")
+    assert verify_password("secret123", stored)
+    assert not verify_password("wrong", stored)
+    assert not verify_password("secret123", "garbage")
+
+
+def test_needs_rehash():
+    """Legacy хеши требуют перехеширования, свежие argon2id - нет."""
+    assert needs_rehash(_legacy_scrypt_hash("pw", b"0123456789abcdef"))
+    assert not needs_rehash(hash_password("pw"))
+
+
+def test_verify_cache_does_not_accept_wrong_password():
+    """Закешированный успешный вход не влияет на проверку другого пароля."""
+    stored = hash_password("secret123")
+    assert verify_password("secret123", stored)
+    assert verify_password("secret123", stored)
+    assert not verify_password("secret1234", stored)
+
+
+@pytest.mark.asyncio
+async def test_async_verify_in_process_pool(monkeypatch):
+    """AUTH_HASH_EXECUTOR=process: KDF в другом процессе, кеш - в текущем."""
+    # Другие тесты перезагружают src.auth: берем актуальный модуль, иначе
+    # функция для воркера не пиклится по имени
+    crypto = importlib.import_module("src.auth.crypto")
+    stored = crypto.hash_password("secret123")
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        monkeypatch.setattr(crypto, "_HASH_EXECUTOR", pool)
+        assert await crypto.averify_password("secret123", stored)
+        assert not await crypto.averify_password("wrong", stored)
+    # Успешная проверка попала в кеш основного процесса: пул больше не нужен
+    assert await crypto.averify_password("secret123", stored)
+
+
+def test_malformed_scrypt_hash_burns_scrypt(monkeypatch):
+    """Битый legacy-хеш тратит холостой scrypt, а не argon2id."""
+    crypto = importlib.import_module("src.auth.crypto")
+    calls = []
+    monkeypatch.setattr(crypto, "_burn_dummy_scrypt", lambda pw: calls.append("scrypt"))
+    monkeypatch.setattr(crypto, "_burn_dummy", lambda pw: calls.append("argon2"))
+
+    assert not crypto.verify_password("secret123", "scrypt$broken")
+    assert calls == ["scrypt"]
+
+
+def test_dummy_password_hash_rejects_any_password():
+    """Холостой хеш для неизвестного email не принимает пароль."""
+    crypto = importlib.import_module("src.auth.crypto")
+    assert not crypto.verify_password("secret123", crypto.dummy_password_hash())
+
+
+def test_import_does_not_build_pool_cache_or_dummy_hash():
+    """Импорт crypto (в т.ч. в spawn-воркере пула) не создает пул, кеш и холостой хеш."""
+    code = (
+        "import src.auth.crypto as c; "
+        "print(c._HASH_EXECUTOR is None, c._verify_cache is None, c._DUMMY_STORED is None)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[2],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert out.split() == ["True", "True", "True"]
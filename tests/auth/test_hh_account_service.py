@@ -10,10 +10,13 @@
 #   - test_disconnect_hh_account_removes_record()
 #   - test_is_hh_connected_checks_expiry()
 #   - test_refresh_hh_tokens_updates_storage()
+#   - test_refresh_hh_tokens_single_flight()
+#   - test_refresh_hh_tokens_skips_unchanged_write()
 # --- /agent_meta ---
 
+import asyncio
 import time
-from unittest.mock import MagicMock, AsyncMock, patch, PropertyMock
+from unittest.mock import MagicMock, AsyncMock, create_autospec, patch, PropertyMock
 
 import pytest
 
@@ -23,8 +26,12 @@ from src.auth.hh_service import HHAccountService, HHAccountInfo
 
 @pytest.fixture
 def mock_storage():
-    """Мок AuthStorage для изолированных unit тестов."""
-    storage = MagicMock(spec=AuthStorage)
+    """Мок AuthStorage для изолированных unit тестов.
+
+    create_autospec проверяет сигнатуры: вызов с неверными аргументами
+    падает в тесте так же, как упал бы с настоящим AuthStorage.
+    """
+    storage = create_autospec(AuthStorage, instance=True)
     return storage
 
 
@@ -143,32 +150,19 @@ def test_disconnect_hh_account_returns_false_when_not_found(hh_service, mock_sto
 def test_is_hh_connected_checks_expiry(hh_service, mock_storage):
     """Тест проверки подключения с учетом времени истечения токенов."""
     # Случай 1: аккаунт не существует
-    mock_storage.get_hh_account.return_value = None
+    mock_storage.get_hh_account_expiry.return_value = None
     assert hh_service.is_hh_connected("user123", "org456") is False
     
-    # Случай 2: аккаунт существует, токены действительны
-    valid_data = {
-        "user_id": "user123",
-        "org_id": "org456", 
-        "access_token": "valid_token",
-        "refresh_token": "valid_refresh",
-        "expires_at": time.time() + 1800,  # действителен еще 30 минут
-        "connected_at": time.time() - 3600
-    }
-    mock_storage.get_hh_account.return_value = valid_data
+    # Случай 2: аккаунт существует, токены действительны (еще 30 минут)
+    mock_storage.get_hh_account_expiry.return_value = time.time() + 1800
     assert hh_service.is_hh_connected("user123", "org456") is True
     
-    # Случай 3: аккаунт существует, но токены истекли
-    expired_data = {
-        "user_id": "user123",
-        "org_id": "org456",
-        "access_token": "expired_token", 
-        "refresh_token": "expired_refresh",
-        "expires_at": time.time() - 600,  # истек 10 минут назад
-        "connected_at": time.time() - 7200
-    }
-    mock_storage.get_hh_account.return_value = expired_data
+    # Случай 3: аккаунт существует, но токены истекли (10 минут назад)
+    mock_storage.get_hh_account_expiry.return_value = time.time() - 600
     assert hh_service.is_hh_connected("user123", "org456") is False
+    
+    # Полный аккаунт для булевой проверки не читается
+    mock_storage.get_hh_account.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -213,13 +207,11 @@ async def test_refresh_hh_tokens_updates_storage(mock_storage):
     
     assert result is True
     mock_storage.update_hh_tokens.assert_called_once_with(
-        "user123", 
-        "org456", 
-        {
-            "access_token": "new_access_token",
-            "refresh_token": "new_refresh_token", 
-            "expires_at": expected_expires_at
-        }
+        "user123",
+        "org456",
+        "new_access_token",
+        "new_refresh_token",
+        expected_expires_at,
     )
 
 
@@ -307,4 +299,74 @@ def test_get_connected_users_returns_account_list(hh_service, mock_storage):
     assert len(result) == 2
     assert all(isinstance(account, HHAccountInfo) for account in result)
     assert result[0].user_id == "user1"
-    assert result[1].user_id == "user2"
\ No newline at end of file
+    assert result[1].user_id == "user2"
+
+
+@pytest.mark.asyncio
+async def test_refresh_hh_tokens_single_flight(mock_storage):
+    """Одновременные обновления одной пары user/org выполняются один раз."""
+    mock_storage.get_hh_account.return_value = {
+        "user_id": "user123",
+        "org_id": "org456",
+        "access_token": "old_access",
+        "refresh_token": "old_refresh",
+        "expires_at": time.time() - 300,
+        "connected_at": time.time() - 3600
+    }
+    
+    async def slow_refresh():
+        await asyncio.sleep(0.01)
+        return "new_access_token"
+    
+    mock_token_manager = MagicMock()
+    mock_token_manager.get_valid_access_token = AsyncMock(side_effect=slow_refresh)
+    mock_token_manager.access_token = "new_access_token"
+    mock_token_manager.refresh_token = "new_refresh_token"
+    mock_token_manager.expires_at = time.time() + 3600
+    
+    mock_session = AsyncMock()
+    mock_session.closed = False
+    
+    hh_service = HHAccountService(
+        storage=mock_storage,
+        token_manager_cls=MagicMock(return_value=mock_token_manager),
+        session_factory=MagicMock(return_value=mock_session)
+    )
+    
+    results = await asyncio.gather(*(hh_service.refresh_hh_tokens("user123", "org456") for _ in range(5)))
+    
+    assert results == [True] * 5
+    mock_token_manager.get_valid_access_token.assert_awaited_once()
+    mock_storage.update_hh_tokens.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_hh_tokens_skips_unchanged_write(mock_storage):
+    """Если токен-менеджер вернул те же токены, запись в БД не выполняется."""
+    expires_at = time.time() + 3600
+    mock_storage.get_hh_account.return_value = {
+        "user_id": "user123",
+        "org_id": "org456",
+        "access_token": "same_access",
+        "refresh_token": "same_refresh",
+        "expires_at": expires_at,
+        "connected_at": time.time() - 3600
+    }
+    
+    mock_token_manager = MagicMock()
+    mock_token_manager.get_valid_access_token = AsyncMock(return_value="same_access")
+    mock_token_manager.access_token = "same_access"
+    mock_token_manager.refresh_token = "same_refresh"
+    mock_token_manager.expires_at = expires_at + 1
+    
+    mock_session = AsyncMock()
+    mock_session.closed = False
+    
+    hh_service = HHAccountService(
+        storage=mock_storage,
+        token_manager_cls=MagicMock(return_value=mock_token_manager),
+        session_factory=MagicMock(return_value=mock_session)
+    )
+    
+    assert await hh_service.refresh_hh_tokens("user123", "org456") is True
+    mock_storage.update_hh_tokens.assert_not_called()
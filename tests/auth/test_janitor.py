@@ -0,0 +1,61 @@
+# tests/auth/test_janitor.py
+# --- agent_meta ---
+# role: tests-auth-janitor
+# owner: @backend
+# contract: Фоновая чистка удаляет только истекшие сессии; get_session их не отдает
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_janitor_removes_only_expired_sessions()
+#   - test_get_session_hides_expired_until_cleanup()
+#   - test_cleanup_expired_commits_sessions_and_states_together()
+# --- /agent_meta ---
+
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+from src.auth.janitor import _cleanup_expired, run_session_janitor
+from src.auth.storage import AuthStorage
+
+
+@pytest.mark.asyncio
+async def test_janitor_removes_only_expired_sessions(tmp_path):
+    storage = AuthStorage(str(tmp_path / "janitor.sqlite3"))
+    user, org = storage.create_user_with_org("j@example.com", "hash", "Org")
+    expired = storage.create_session(user["id"], org["id"], time.time() - 1, None, None)
+    alive = storage.create_session(user["id"], org["id"], time.time() + 3600, None, None)
+
+    task = asyncio.create_task(run_session_janitor(storage, interval_sec=0.01))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await task
+
+    assert storage.get_session_raw(expired["id"]) is None
+    assert storage.get_session_raw(alive["id"]) is not None
+
+
+def test_get_session_hides_expired_until_cleanup(tmp_path):
+    """Истекшая сессия не видна через get_session, но строка ждет janitor."""
+    storage = AuthStorage(str(tmp_path / "expiry.sqlite3"))
+    user, org = storage.create_user_with_org("e@example.com", "hash", "Org")
+    expired = storage.create_session(user["id"], org["id"], time.time() - 1, None, None)
+
+    assert storage.get_session(expired["id"]) is None
+    assert storage.get_session_raw(expired["id"])["user_id"] == user["id"]
+    assert storage.get_session(expired["id"], now=time.time() - 60) is not None
+
+
+def test_cleanup_expired_commits_sessions_and_states_together(tmp_path):
+    """Если OAuth states в той же БД, сессии и states чистятся одной транзакцией."""
+    storage = AuthStorage(str(tmp_path / "combined.sqlite3"))
+    user, org = storage.create_user_with_org("c@example.com", "hash", "Org")
+    storage.create_session(user["id"], org["id"], time.time() - 1, None, None)
+    storage.save_oauth_state("stale", user["id"], org["id"], "sid", ttl_seconds=-1)
+    storage.save_oauth_state("live", user["id"], org["id"], "sid", ttl_seconds=600)
+
+    assert _cleanup_expired(storage, storage) == (1, 1)
+    assert not storage._conn.in_transaction
+    assert storage.get_oauth_state("live") is not None
@@ -0,0 +1,42 @@
+# tests/auth/test_lazy_logging.py
+# --- agent_meta ---
+# role: tests-auth-lazy-logging
+# owner: @backend
+# contract: Регрессионный тест: логи горячего пути auth не форматируются через f-string
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_hot_path_logs_use_lazy_formatting(path)
+# --- /agent_meta ---
+
+import ast
+from pathlib import Path
+
+import pytest
+
+
+ROOT = Path(__file__).resolve().parents[2]
+HOT_PATH_MODULES = [
+    "src/auth/hh_middleware.py",
+    "src/auth/hh_service.py",
+    "src/auth/router.py",
+    "src/auth/service.py",
+]
+LOG_METHODS = {"debug", "info", "warning", "error", "exception", "critical"}
+
+
+@pytest.mark.parametrize("path", HOT_PATH_MODULES)
+def test_hot_path_logs_use_lazy_formatting(path):
+    """Сообщение лога - шаблон с %s, а не f-string, собираемая до проверки уровня."""
+    tree = ast.parse((ROOT / path).read_text(encoding="utf-8"))
+    offenders = [
+        node.lineno
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr in LOG_METHODS
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == "logger"
+        and node.args
+        and isinstance(node.args[0], ast.JoinedStr)
+    ]
+    assert offenders == [], f"f-string в логах {path}, строки {offenders}"
@@ -0,0 +1,52 @@
+# tests/auth/test_oauth_state_store.py
+# --- agent_meta ---
+# role: tests-auth-oauth-state-store
+# owner: @backend
+# contract: Unit тесты in-memory хранилища OAuth state с TTL
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_consume_returns_state_once()
+#   - test_expired_state_is_rejected_and_cleaned()
+#   - test_store_evicts_oldest_when_full()
+# --- /agent_meta ---
+
+import time
+
+from src.auth.oauth_state_store import OAuthStateStore
+
+
+def test_consume_returns_state_once():
+    """State извлекается ровно один раз."""
+    store = OAuthStateStore()
+    store.save_oauth_state("s1", "user1", "org1", "sess1", ua_hash="ua", ttl_seconds=600)
+
+    assert store.get_oauth_state("s1")["user_id"] == "user1"
+    data = store.consume_oauth_state("s1")
+    assert data["org_id"] == "org1" and data["ua_hash"] == "ua"
+    assert store.consume_oauth_state("s1") is None
+    assert store.delete_oauth_state("s1") is False
+
+
+def test_expired_state_is_rejected_and_cleaned(monkeypatch):
+    """Истекший state не возвращается и удаляется при чистке."""
+    store = OAuthStateStore()
+    store.save_oauth_state("old", "user1", "org1", "sess1", ttl_seconds=1)
+    store.save_oauth_state("new", "user2", "org2", "sess2", ttl_seconds=600)
+
+    later = time.time() + 2
+    monkeypatch.setattr("src.auth.oauth_state_store.time.time", lambda: later)
+
+    assert store.get_oauth_state("old") is None
+    store.save_oauth_state("old2", "user3", "org3", "sess3", ttl_seconds=-1)
+    assert store.cleanup_expired_oauth_states() == 1
+    assert store.consume_oauth_state("new")["user_id"] == "user2"
+
+
+def test_store_evicts_oldest_when_full():
+    """При переполнении вытесняются самые старые states."""
+    store = OAuthStateStore(maxsize=2)
+    for i in range(3):
+        store.save_oauth_state(f"s{i}", "u", "o", "sess")
+
+    assert store.get_oauth_state("s0") is None
+    assert store.get_oauth_state("s2") is not None
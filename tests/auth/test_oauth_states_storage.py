@@ -9,6 +9,7 @@
 #   - test_get_oauth_state_validates_ttl()
 #   - test_delete_oauth_state_consume_pattern()
 #   - test_cleanup_expired_oauth_states()
+#   - test_consume_oauth_state_is_single_use_and_skips_expired()
 # --- /agent_meta ---
 
 import time
@@ -72,7 +73,7 @@ def test_save_oauth_state_persists_data(storage):
 
 
 def test_get_oauth_state_validates_ttl(storage):
-    """Тест автоматического удаления истекших OAuth states."""
+    """Истекший OAuth state не возвращается (строку удаляет фоновая чистка)."""
     state_token = "expired_state"
     
     # Сохраняем state с коротким TTL (1 секунда)
@@ -91,9 +92,10 @@ def test_get_oauth_state_validates_ttl(storage):
     # Ждем истечения TTL
     time.sleep(1.1)
     
-    # После истечения TTL state должен автоматически удалиться
+    # После истечения TTL state недоступен, а строка ждет cleanup
     retrieved_after_expiry = storage.get_oauth_state(state_token)
     assert retrieved_after_expiry is None
+    assert storage.cleanup_expired_oauth_states() == 1
 
 
 def test_get_oauth_state_returns_none_for_nonexistent(storage):
@@ -130,6 +132,22 @@ def test_delete_oauth_state_consume_pattern(storage):
     assert deleted_again is False
 
 
+def test_consume_oauth_state_is_single_use_and_skips_expired(storage):
+    """consume_oauth_state отдает действующий state один раз, истекший - никогда."""
+    storage.save_oauth_state("live", "user1", "org1", "session1", ua_hash="ua", ttl_seconds=600)
+    storage.save_oauth_state("stale", "user2", "org2", "session2", ttl_seconds=-10)
+
+    data = storage.consume_oauth_state("live")
+    assert data["user_id"] == "user1"
+    assert data["session_id"] == "session1"
+    assert data["ua_hash"] == "ua"
+    assert storage.consume_oauth_state("live") is None
+
+    assert storage.consume_oauth_state("stale") is None
+    # Истекший state оставлен фоновой чистке
+    assert storage.cleanup_expired_oauth_states() == 1
+
+
 def test_cleanup_expired_oauth_states(storage):
     """Тест массовой очистки истекших OAuth states."""
     # Создаем несколько states: 2 действительных, 2 истекших
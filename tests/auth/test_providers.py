@@ -0,0 +1,47 @@
+# tests/auth/test_providers.py
+# --- agent_meta ---
+# role: tests-auth-providers
+# owner: @backend
+# contract: Роутер и HH middleware используют один набор storage/сервисов
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_services_share_single_storage()
+#   - test_reset_providers_rebuilds_instances()
+# --- /agent_meta ---
+
+import sys
+
+
+def test_services_share_single_storage(tmp_path, monkeypatch):
+    """Ленивые провайдеры отдают одни и те же экземпляры поверх одного AuthStorage."""
+    monkeypatch.setenv("WEBAPP_DB_PATH", str(tmp_path / "providers.sqlite3"))
+    for mod in list(sys.modules.keys()):
+        if mod.startswith("src.auth"):
+            sys.modules.pop(mod)
+
+    from src.auth import providers
+    import src.auth.hh_middleware  # noqa: F401 - импорт не создает storage
+
+    assert providers._storage is None
+
+    storage = providers.get_storage()
+    assert providers.get_auth_service().storage is storage
+    assert providers.get_hh_service().storage is storage
+    assert providers.get_auth_service() is providers.get_auth_service()
+
+
+def test_reset_providers_rebuilds_instances(tmp_path, monkeypatch):
+    """После reset_providers экземпляры создаются заново по текущему окружению."""
+    from src.auth import providers
+
+    monkeypatch.setenv("WEBAPP_DB_PATH", str(tmp_path / "first.sqlite3"))
+    providers.reset_providers()
+    first = providers.get_storage()
+
+    monkeypatch.setenv("WEBAPP_DB_PATH", str(tmp_path / "second.sqlite3"))
+    providers.reset_providers()
+    second = providers.get_storage()
+
+    assert second is not first
+    assert providers.get_auth_service().storage is second
+    providers.reset_providers()
@@ -0,0 +1,52 @@
+# tests/auth/test_service_login.py
+# --- agent_meta ---
+# role: tests-auth-service-login
+# owner: @backend
+# contract: Unit тесты AuthService.login: неизвестный email стоит один KDF, как неверный пароль
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_login_unknown_email_runs_single_kdf()
+# --- /agent_meta ---
+
+import importlib
+from types import SimpleNamespace
+
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_login_unknown_email_runs_single_kdf(tmp_path, monkeypatch):
+    """И первый (холостой хеш еще не построен), и следующие входы с неизвестным email - один KDF."""
+    # Другие тесты перезагружают src.auth: берем актуальные модули, чтобы
+    # патчить ту же копию crypto, которую вызывает service
+    crypto = importlib.import_module("src.auth.crypto")
+    service_module = importlib.import_module("src.auth.service")
+    InvalidCredentialsError = importlib.import_module("src.auth.exceptions").InvalidCredentialsError
+    AuthStorage = importlib.import_module("src.auth.storage").AuthStorage
+    kdf_calls = []
+    real_hash, real_verify = crypto.hash_password, crypto._verify_uncached
+
+    def counting_hash(password):
+        kdf_calls.append("hash")
+        return real_hash(password)
+
+    def counting_verify(password, stored):
+        kdf_calls.append("verify")
+        return real_verify(password, stored)
+
+    monkeypatch.setattr(crypto, "_DUMMY_STORED", None)
+    monkeypatch.setattr(crypto, "hash_password", counting_hash)
+    monkeypatch.setattr(crypto, "_verify_uncached", counting_verify)
+
+    service = service_module.AuthService(AuthStorage(str(tmp_path / "login.sqlite3")))
+    request = SimpleNamespace(headers={}, client=None)
+
+    with pytest.raises(InvalidCredentialsError):
+        await service.login(email="nobody@example.com", password="secret123", request=request)
+    assert kdf_calls == ["hash"]
+    assert crypto._DUMMY_STORED is not None
+
+    kdf_calls.clear()
+    with pytest.raises(InvalidCredentialsError):
+        await service.login(email="nobody@example.com", password="secret123", request=request)
+    assert kdf_calls == ["verify"]
@@ -0,0 +1,125 @@
+# tests/auth/test_session_cache.py
+# --- agent_meta ---
+# role: tests-auth-session-cache
+# owner: @backend
+# contract: Unit тесты для TTL/LRU кеша сессий HH middleware
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_put_and_get_roundtrip()
+#   - test_put_skips_expiring_hh_account()
+#   - test_invalidate_and_invalidate_user()
+#   - test_user_index_follows_eviction_and_invalidation()
+#   - test_put_me_bounded_by_session_expiry()
+#   - test_get_me_served_from_cache_until_logout()
+# --- /agent_meta ---
+
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.auth import session_cache
+from src.auth.hh_service import HHAccountInfo
+from src.auth.service import AuthService
+
+
+def _me(user_id: str) -> dict:
+    return {"user": {"id": user_id, "email": f"{user_id}@example.com"}, "org_id": "org", "role": "org_admin"}
+
+
+def _hh(user_id: str, expires_in: float = 3600) -> HHAccountInfo:
+    return HHAccountInfo(
+        user_id=user_id,
+        org_id="org",
+        access_token="at",
+        refresh_token="rt",
+        expires_at=time.time() + expires_in,
+    )
+
+
+@pytest.fixture(autouse=True)
+def clean_cache():
+    session_cache._cache.clear()
+    session_cache._me_cache.clear()
+    yield
+    session_cache._cache.clear()
+    session_cache._me_cache.clear()
+
+
+def test_put_and_get_roundtrip():
+    """Сохраненная запись возвращается до истечения TTL."""
+    me, hh = _me("u1"), _hh("u1")
+    session_cache.put("sid1", me, hh)
+    assert session_cache.get("sid1") == (me, hh)
+    assert session_cache.get("missing") is None
+
+
+def test_put_skips_expiring_hh_account():
+    """Аккаунт, который уже в 5-минутном окне истечения, не кешируется."""
+    session_cache.put("sid1", _me("u1"), _hh("u1", expires_in=120))
+    assert session_cache.get("sid1") is None
+
+
+def test_invalidate_and_invalidate_user():
+    """invalidate удаляет сессию, invalidate_user - все сессии пользователя."""
+    session_cache.put("sid1", _me("u1"), _hh("u1"))
+    session_cache.put("sid2", _me("u1"), _hh("u1"))
+    session_cache.put("sid3", _me("u2"), _hh("u2"))
+
+    session_cache.invalidate("sid1")
+    assert session_cache.get("sid1") is None
+
+    session_cache.invalidate_user("u1")
+    assert session_cache.get("sid2") is None
+    assert session_cache.get("sid3") is not None
+
+
+def test_user_index_follows_eviction_and_invalidation():
+    """Индекс user_id -> сессии не держит вытесненные/удаленные записи."""
+    cache = session_cache._TTLCache(maxsize=2)
+    cache.put("sid1", "u1", "a", ttl=60)
+    cache.put("sid2", "u1", "b", ttl=60)
+    cache.put("sid3", "u2", "c", ttl=60)  # вытесняет sid1
+    assert cache._by_user == {"u1": {"sid2"}, "u2": {"sid3"}}
+
+    cache.pop("sid2")
+    assert "u1" not in cache._by_user
+
+    cache.put("sid3", "u3", "d", ttl=60)  # сессия сменила владельца
+    assert cache._by_user == {"u3": {"sid3"}}
+
+    cache.pop_user("u3")
+    assert cache.get("sid3") is None
+    assert cache._by_user == {}
+
+
+def test_put_me_bounded_by_session_expiry():
+    """me_info истекшей сессии не кешируется, invalidate_user чистит и me-кеш."""
+    session_cache.put_me("sid1", _me("u1"), session_expires_at=time.time() - 1)
+    assert session_cache.get_me("sid1") is None
+
+    session_cache.put_me("sid2", _me("u1"), session_expires_at=time.time() + 3600)
+    assert session_cache.get_me("sid2") == _me("u1")
+
+    session_cache.invalidate_user("u1")
+    assert session_cache.get_me("sid2") is None
+
+
+def test_get_me_served_from_cache_until_logout():
+    """Повторный get_me не ходит в storage, logout сбрасывает запись."""
+    storage = MagicMock()
+    storage.get_session.return_value = {
+        "id": "sid1", "user_id": "u1", "org_id": "org", "expires_at": time.time() + 3600,
+    }
+    storage.get_user_by_id.return_value = {"id": "u1", "email": "u1@example.com"}
+    storage.get_membership.return_value = {"role": "org_admin", "status": "active"}
+    service = AuthService(storage)
+
+    first = service.get_me("sid1")
+    assert first["role"] == "org_admin"
+    assert service.get_me("sid1") == first
+    assert storage.get_session.call_count == 1
+
+    service.logout("sid1")
+    storage.get_session.return_value = None
+    assert service.get_me("sid1") is None
@@ -0,0 +1,47 @@
+# tests/auth/test_session_cookie_middleware.py
+# --- agent_meta ---
+# role: tests-auth-session-cookie-middleware
+# owner: @backend
+# contract: SessionCookieMiddleware кладет sid в scope["state"], require_session_id его читает
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_middleware_extracts_sid_for_require_session_id()
+#   - test_find_cookie_matches_whole_name_only()
+# --- /agent_meta ---
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from src.auth.asgi import SessionCookieMiddleware, _find_cookie
+from src.auth.deps import require_session_id
+
+SID = "00000000-0000-4000-8000-000000000000"
+
+
+@pytest.mark.asyncio
+async def test_middleware_extracts_sid_for_require_session_id():
+    app = FastAPI()
+    app.add_middleware(SessionCookieMiddleware)
+
+    @app.get("/sid")
+    async def sid_route(request_sid: str = Depends(require_session_id)):
+        return {"sid": request_sid}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        r = await client.get("/sid")
+        assert r.status_code == 401
+
+        r = await client.get("/sid", headers={"Cookie": f"theme=dark; sid={SID}; lang=ru"})
+        assert r.status_code == 200
+        assert r.json() == {"sid": SID}
+
+
+def test_find_cookie_matches_whole_name_only():
+    """Поиск по байтам не путает sid с cookie, чье имя оканчивается на sid."""
+    assert _find_cookie(b"sid=abc") == "abc"
+    assert _find_cookie(b"xsid=bad; sid=good") == "good"
+    assert _find_cookie(b"theme=dark;sid=abc ; lang=ru") == "abc"
+    assert _find_cookie(b"xsid=bad") is None
+    assert _find_cookie(b"") is None
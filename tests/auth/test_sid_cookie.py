@@ -0,0 +1,40 @@
+# tests/auth/test_sid_cookie.py
+# --- agent_meta ---
+# role: tests-auth-sid-cookie
+# owner: @backend
+# contract: Заранее собранный Set-Cookie совпадает с Response.set_cookie
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_prebuilt_set_cookie_matches_starlette()
+# --- /agent_meta ---
+
+import importlib
+
+from starlette.responses import Response
+
+SID = "00000000-0000-4000-8000-000000000000"
+
+
+def _set_cookie_headers(response: Response) -> list:
+    return [v for k, v in response.raw_headers if k == b"set-cookie"]
+
+
+def test_prebuilt_set_cookie_matches_starlette(monkeypatch):
+    """Байты заголовка те же, что собрал бы Response.set_cookie с теми же настройками."""
+    monkeypatch.setenv("AUTH_COOKIE_SECURE", "true")
+    monkeypatch.setenv("AUTH_COOKIE_SAMESITE", "strict")
+    monkeypatch.setenv("AUTH_COOKIE_DOMAIN", "example.com")
+    router_module = importlib.reload(importlib.import_module("src.auth.router"))
+    try:
+        fast = Response()
+        router_module._set_sid_cookie(fast, SID)
+
+        expected = Response()
+        expected.set_cookie(
+            "sid", SID, httponly=True, secure=True, samesite="strict", domain="example.com", path="/"
+        )
+
+        assert _set_cookie_headers(fast) == _set_cookie_headers(expected)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(router_module)
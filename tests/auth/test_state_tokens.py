@@ -0,0 +1,68 @@
+# tests/auth/test_state_tokens.py
+# --- agent_meta ---
+# role: tests-auth-state-tokens
+# owner: @backend
+# contract: Резерв OAuth state выдает уникальные токены формата token_urlsafe(32)
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_tokens_have_token_urlsafe_format()
+#   - test_tokens_are_unique_across_refills_and_threads()
+#   - test_forked_child_does_not_reuse_parent_pool()
+# --- /agent_meta ---
+import os
+import re
+import threading
+
+import pytest
+
+from src.auth import state_tokens
+from src.auth.state_tokens import STATE_POOL_REFILL, next_state_token
+
+
+_TOKEN_RE = re.compile(r"[A-Za-z0-9_-]{43}")
+
+
+def test_tokens_have_token_urlsafe_format():
+    """Токен совпадает по формату с secrets.token_urlsafe(32)."""
+    for _ in range(STATE_POOL_REFILL + 5):
+        assert _TOKEN_RE.fullmatch(next_state_token())
+
+
+def test_tokens_are_unique_across_refills_and_threads():
+    """Параллельные вызовы не получают один и тот же токен."""
+    state_tokens._state_pool.clear()
+    tokens = []
+    lock = threading.Lock()
+
+    def worker():
+        got = [next_state_token() for _ in range(STATE_POOL_REFILL)]
+        with lock:
+            tokens.extend(got)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(tokens) == 4 * STATE_POOL_REFILL
+    assert len(set(tokens)) == len(tokens)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="нужен os.fork")
+def test_forked_child_does_not_reuse_parent_pool():
+    """После fork ребенок не выдает токены, оставшиеся в резерве родителя."""
+    next_state_token()  # резерв родителя заполнен
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, next_state_token().encode("ascii"))
+        os._exit(0)
+    os.close(write_fd)
+    child_token = os.read(read_fd, 64).decode("ascii")
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+
+    assert child_token
+    assert child_token not in state_tokens._state_pool
@@ -0,0 +1,117 @@
+# tests/auth/test_storage_connections.py
+# --- agent_meta ---
+# role: tests-auth-storage-connections
+# owner: @backend
+# contract: Unit тесты для соединений AuthStorage (по потоку, WAL, :memory:) и индексов
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_threads_use_own_connections_and_share_data()
+#   - test_memory_db_uses_single_connection()
+#   - test_connection_pragmas()
+#   - test_expiry_and_org_queries_use_indexes()
+#   - test_iter_hh_accounts_matches_list()
+#   - test_concurrent_writers_are_serialized()
+# --- /agent_meta ---
+
+import threading
+
+from src.auth.storage import AuthStorage
+
+
+def test_threads_use_own_connections_and_share_data(tmp_path):
+    """Каждый поток получает свое соединение, данные общие через файл БД в WAL."""
+    storage = AuthStorage(str(tmp_path / "conn.sqlite3"))
+    user = storage.create_user("t@example.com", "hash")
+
+    seen = {}
+
+    def worker():
+        seen["conn"] = storage._conn
+        seen["user"] = storage.get_user_by_id(user["id"])
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+
+    assert seen["conn"] is not storage._conn
+    assert seen["user"]["email"] == "t@example.com"
+    assert storage._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_memory_db_uses_single_connection():
+    """Для :memory: все потоки работают с одним соединением (иначе у каждого своя БД)."""
+    storage = AuthStorage(":memory:")
+    user = storage.create_user("m@example.com", "hash")
+
+    seen = {}
+    t = threading.Thread(target=lambda: seen.update(user=storage.get_user_by_id(user["id"])))
+    t.start()
+    t.join()
+
+    assert seen["user"]["email"] == "m@example.com"
+
+
+def test_connection_pragmas(tmp_path):
+    """Соединение файловой БД настроено под WAL; :memory: - без mmap."""
+    conn = AuthStorage(str(tmp_path / "pragma.sqlite3"))._conn
+    pragma = lambda name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("temp_store") == 2  # MEMORY
+    assert pragma("busy_timeout") == 5000
+    assert pragma("cache_size") == -64000
+    assert pragma("mmap_size") == 268435456
+
+    memory_conn = AuthStorage(":memory:")._conn
+    assert memory_conn.execute("PRAGMA mmap_size").fetchone() in (None, (0,))
+
+
+def test_expiry_and_org_queries_use_indexes():
+    """Чистка OAuth states и список HH аккаунтов организации идут по индексам."""
+    from src.auth.storage_hh import _SQL_LIST_HH_ACCOUNTS_BY_ORG
+    from src.auth.storage_oauth import _SQL_DELETE_EXPIRED_OAUTH_STATES
+
+    conn = AuthStorage(":memory:")._conn
+    plan = lambda sql, args: " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, args))
+    assert "idx_oauth_expires" in plan(_SQL_DELETE_EXPIRED_OAUTH_STATES, (0.0,))
+    hh_plan = plan(_SQL_LIST_HH_ACCOUNTS_BY_ORG, ("org",))
+    assert "idx_hh_org_connected" in hh_plan
+    assert "TEMP B-TREE" not in hh_plan
+
+
+def test_iter_hh_accounts_matches_list():
+    """iter_hh_accounts отдает те же строки и в том же порядке, что list_hh_accounts."""
+    storage = AuthStorage(":memory:")
+    for i in range(3):
+        storage.save_hh_account(f"u{i}", "org", "at", "rt", 2e9, connected_at=float(i))
+    storage.save_hh_account("other", "org2", "at", "rt", 2e9, connected_at=10.0)
+
+    streamed = storage.iter_hh_accounts("org")
+    assert next(streamed)["user_id"] == "u2"
+    assert list(storage.iter_hh_accounts("org")) == storage.list_hh_accounts("org")
+    assert [a["user_id"] for a in storage.list_hh_accounts()] == ["other", "u2", "u1", "u0"]
+
+
+def test_concurrent_writers_are_serialized(tmp_path):
+    """Записи из многих потоков проходят без "database is locked"."""
+    storage = AuthStorage(str(tmp_path / "writers.sqlite3"))
+    user, org = storage.create_user_with_org("w@example.com", "hash", "Org")
+    errors = []
+
+    def writer():
+        try:
+            for _ in range(25):
+                with storage.transaction():
+                    storage.create_session(user["id"], org["id"], 2e9, None, None)
+                storage.create_session(user["id"], org["id"], 2e9, None, None)
+        except Exception as e:  # pragma: no cover - сообщение попадет в assert
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    count = storage._conn.execute("SELECT COUNT(*) FROM auth_sessions").fetchone()[0]
+    assert count == 8 * 25 * 2
@@ -0,0 +1,146 @@
+# tests/auth/test_storage_transactions.py
+# --- agent_meta ---
+# role: tests-auth-storage-transactions
+# owner: @backend
+# contract: Unit тесты составных записей AuthStorage (одна транзакция на операцию)
+# last_reviewed: 2025-08-24
+# interfaces:
+#   - test_create_user_with_org_creates_admin_membership()
+#   - test_create_user_with_org_rolls_back_on_duplicate_email()
+#   - test_transaction_commits_batched_writes_once()
+#   - test_transaction_rolls_back_all_writes()
+#   - test_password_rehash_is_visible_immediately()
+#   - test_upserts_update_rows_in_place()
+#   - test_noop_update_does_not_leave_open_transaction()
+#   - test_email_lookup_is_case_insensitive_without_nocase_column()
+# --- /agent_meta ---
+
+import sqlite3
+
+import pytest
+
+from src.auth.storage import AuthStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return AuthStorage(str(tmp_path / "tx.sqlite3"))
+
+
+def _count(storage: AuthStorage, table: str) -> int:
+    return storage._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_create_user_with_org_creates_admin_membership(storage):
+    """Пользователь, организация и membership org_admin появляются вместе."""
+    user, org = storage.create_user_with_org("New@Example.com", "hash", "Main")
+
+    # Storage сам нормализует email: вызывающим не нужен Pydantic-валидатор
+    assert user["email"] == "new@example.com"
+    assert storage.get_user_by_email("NEW@example.com")["id"] == user["id"]
+    memberships = storage.get_memberships_for_user(user["id"])
+    assert [(m["org_id"], m["role"]) for m in memberships] == [(org["id"], "org_admin")]
+
+
+def test_create_user_with_org_rolls_back_on_duplicate_email(storage):
+    """Ошибка INSERT пользователя не оставляет осиротевшую организацию."""
+    storage.create_user_with_org("dup@example.com", "hash", "First")
+
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.create_user_with_org("Dup@Example.com", "hash", "Second")
+
+    assert _count(storage, "users") == 1
+    assert _count(storage, "organizations") == 1
+    assert _count(storage, "memberships") == 1
+
+
+def test_transaction_commits_batched_writes_once(storage):
+    """Методы внутри transaction() не коммитят сами: commit один, в конце блока."""
+    user, org = storage.create_user_with_org("b@example.com", "hash", "Org")
+
+    with storage.transaction():
+        storage.update_user_password_hash(user["id"], "new-hash")
+        session = storage.create_session(user["id"], org["id"], 2e9, None, None)
+        # Обе записи еще не закоммичены
+        assert storage._conn.in_transaction
+
+    assert not storage._conn.in_transaction
+    assert storage.get_user_by_id(user["id"])["password_hash"] == "new-hash"
+    assert storage.get_session(session["id"]) is not None
+
+
+def test_transaction_rolls_back_all_writes(storage):
+    """Исключение внутри transaction() откатывает все записи блока."""
+    user, org = storage.create_user_with_org("r@example.com", "hash", "Org")
+
+    with pytest.raises(RuntimeError):
+        with storage.transaction():
+            storage.update_user_password_hash(user["id"], "new-hash")
+            storage.create_session(user["id"], org["id"], 2e9, None, None)
+            raise RuntimeError("boom")
+
+    assert storage.get_user_by_id(user["id"])["password_hash"] == "hash"
+    assert _count(storage, "auth_sessions") == 0
+
+
+def test_password_rehash_is_visible_immediately(storage):
+    """get_user_by_id читает БД: новый хеш виден сразу, в том числе после transaction()."""
+    user, _ = storage.create_user_with_org("c@example.com", "hash", "Org")
+    assert storage.get_user_by_id(user["id"])["password_hash"] == "hash"
+
+    storage.update_user_password_hash(user["id"], "plain-update")
+    assert storage.get_user_by_id(user["id"])["password_hash"] == "plain-update"
+
+    with storage.transaction():
+        storage.update_user_password_hash(user["id"], "tx-update")
+    assert storage.get_user_by_id(user["id"])["password_hash"] == "tx-update"
+
+
+def test_upserts_update_rows_in_place(storage):
+    """Повторные save_hh_account/create_membership обновляют существующую строку."""
+    user, org = storage.create_user_with_org("u@example.com", "hash", "Org")
+    storage.save_hh_account(user["id"], org["id"], "at1", "rt1", 100.0, connected_at=1.0)
+
+    storage.save_hh_account(user["id"], org["id"], "at2", "rt2", 200.0, scopes="s", connected_at=2.0)
+    account = storage.get_hh_account(user["id"], org["id"])
+    assert (account["access_token"], account["expires_at"], account["scopes"]) == ("at2", 200.0, "s")
+    assert _count(storage, "hh_accounts") == 1
+
+    storage.create_membership(user["id"], org["id"], "viewer", "invited")
+    membership = storage.get_membership(user["id"], org["id"])
+    assert (membership["role"], membership["status"]) == ("viewer", "invited")
+    assert _count(storage, "memberships") == 1
+
+
+def test_noop_update_does_not_leave_open_transaction(storage):
+    """UPDATE/DELETE без затронутых строк закрывается без commit, изменения - коммитятся."""
+    assert storage.update_hh_tokens("nobody", "org", "at", "rt", 1.0) is False
+    assert storage.delete_oauth_state("missing") is False
+    assert not storage._conn.in_transaction
+
+    user, org = storage.create_user_with_org("n@example.com", "hash", "Org")
+    storage.save_hh_account(user["id"], org["id"], "at1", "rt1", 100.0, connected_at=1.0)
+    assert storage.update_hh_tokens(user["id"], org["id"], "at2", "rt2", 200.0) is True
+    assert not storage._conn.in_transaction
+    # Новое соединение видит закоммиченные токены
+    assert AuthStorage(storage._db_path).get_hh_account(user["id"], org["id"])["access_token"] == "at2"
+
+
+def test_email_lookup_is_case_insensitive_without_nocase_column(tmp_path):
+    """В старой БД (users.email без COLLATE NOCASE) поиск по email все равно без учета регистра."""
+    db_path = str(tmp_path / "legacy.sqlite3")
+    conn = sqlite3.connect(db_path)
+    conn.execute(
+        "CREATE TABLE users (id TEXT PRIMARY KEY, email TEXT UNIQUE NOT NULL,"
+        " password_hash TEXT NOT NULL, created_at REAL NOT NULL)"
+    )
+    conn.commit()
+    conn.close()
+    storage = AuthStorage(db_path)
+
+    user = storage.create_user("Old@Example.com", "hash")
+
+    assert user["email"] == "old@example.com"
+    assert storage.get_user_by_email("OLD@example.COM")["id"] == user["id"]
+    with pytest.raises(sqlite3.IntegrityError):
+        storage.create_user("old@EXAMPLE.com", "hash")
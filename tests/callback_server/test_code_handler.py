@@ -57,3 +57,31 @@ def test_read_non_existent_file_raises_error(handler: CodeFileHandler):
     # Проверяем, что вызов read() вызывает ожидаемое исключение
     with pytest.raises(FileNotFoundError):
         handler.read()
+
+def test_write_replaces_atomically_without_leftovers(handler: CodeFileHandler):
+    """Перезапись кода идет через временный файл и os.replace, .tmp не остается."""
+    handler.write("first-code")
+    handler.write("second-code")
+
+    assert handler.read() == "second-code"
+    assert not os.path.exists(handler.file_path + ".tmp")
+
+@pytest.mark.skipif(os.name != "posix", reason="права файла проверяем только на POSIX")
+def test_write_creates_owner_only_file(handler: CodeFileHandler):
+    """Файл с кодом доступен только владельцу (0o600)."""
+    handler.write("secret-code")
+
+    assert os.stat(handler.file_path).st_mode & 0o777 == 0o600
+
+def test_write_failure_removes_tmp_file(handler: CodeFileHandler, monkeypatch):
+    """Если os.replace падает, код не остается в <path>.tmp."""
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+
+    with pytest.raises(OSError):
+        handler.write("secret-code")
+
+    assert not os.path.exists(handler.file_path + ".tmp")
+    assert not handler.exists()
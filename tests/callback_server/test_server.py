@@ -0,0 +1,89 @@
+# tests/callback_server/test_server.py
+# --- agent_meta ---
+# role: unit-test
+# owner: @backend
+# contract: Validates that the callback app hands the OAuth code over in memory and can be reused.
+# last_reviewed: 2025-08-24
+# dependencies: [pytest, httpx]
+# --- /agent_meta ---
+
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from src.callback_server.server import create_app
+
+
+@pytest.mark.asyncio
+async def test_callback_passes_code_to_future_without_file(tmp_path, monkeypatch):
+    """С code_future код попадает в future, файл .auth_code не создается."""
+    monkeypatch.chdir(tmp_path)
+    shutdown_event = asyncio.Event()
+    code_future = asyncio.get_running_loop().create_future()
+    app = create_app(shutdown_event, code_future)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        r = await client.get("/callback", params={"code": "first"})
+        assert r.status_code == 200
+        # Повторный callback не подменяет уже полученный код
+        r = await client.get("/callback", params={"code": "second"})
+        assert r.status_code == 200
+
+    assert shutdown_event.is_set()
+    assert code_future.result() == "first"
+    assert not os.path.exists(".auth_code")
+
+
+@pytest.mark.asyncio
+async def test_callback_reads_current_future_from_app_state():
+    """Одно приложение на несколько запусков: обработчик берет future из app.state."""
+    shutdown_event = asyncio.Event()
+    app = create_app(shutdown_event)
+    loop = asyncio.get_running_loop()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        for code in ("first", "second"):
+            code_future = loop.create_future()
+            app.state.code_future = code_future
+            shutdown_event.clear()
+
+            r = await client.get("/callback", params={"code": code})
+            assert r.status_code == 200
+            assert shutdown_event.is_set()
+            assert code_future.result() == code
+
+
+@pytest.mark.asyncio
+async def test_callback_responses_are_utf8_html():
+    """Готовые тела ответов отдаются как text/html в UTF-8."""
+    app = create_app(asyncio.Event(), asyncio.get_running_loop().create_future())
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        ok = await client.get("/callback", params={"code": "abc"})
+        err = await client.get("/callback")
+
+    assert ok.status_code == 200
+    assert ok.headers["content-type"] == "text/html; charset=utf-8"
+    assert ok.text.startswith("Авторизация успешно завершена")
+    assert err.status_code == 400
+    assert err.text.startswith("Ошибка авторизации")
+
+
+@pytest.mark.asyncio
+async def test_callback_without_future_returns_error_page():
+    """Без code_future в app.state callback отвечает страницей ошибки, а не 500."""
+    shutdown_event = asyncio.Event()
+    app = create_app(shutdown_event)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        r = await client.get("/callback", params={"code": "abc"})
+
+    assert r.status_code == 400
+    assert r.text.startswith("Ошибка авторизации")
+    assert not shutdown_event.is_set()